@@ -44,7 +44,19 @@ PANELEXEMYS_DATA_DIR = _req("PANELEXEMYS_DATA_DIR")
 # ---------------------------------------------------------
 MODBUS_MW_API_BASE = _req("MODBUS_MW_API_BASE")
 MODBUS_MW_HTTP_TIMEOUT = _req_int("MODBUS_MW_HTTP_TIMEOUT")
-MODBUS_HTTP_POLL_SECONDS = _req_int("MODBUS_HTTP_POLL_SECONDS")
+MODBUS_HTTP_POLL_SECONDS = _req_int("MODBUS_HTTP_POLL_SECONDS")  # Antiguedad maxima del resumen de GRD compartido
+# Opcional: JSON {"zona": [id_grd, ...]} para el resumen de conectividad por zona
+GRD_ZONES_PATH = os.getenv("PANELEXEMYS_GRD_ZONES_PATH", "").strip()
+# Espejo local del historial de conexion (tabla grd_historial): sincronizacion cada
+# GRD_HISTORY_SYNC_SECONDS de a lo sumo GRD_HISTORY_SYNC_MAX_PER_RUN GRD; cada GRD se
+# reconcilia con el middleware al menos una vez cada GRD_HISTORY_RECONCILE_SECONDS.
+GRD_HISTORY_SYNC_SECONDS = 60
+GRD_HISTORY_SYNC_MAX_PER_RUN = 20
+GRD_HISTORY_RECONCILE_SECONDS = 6 * 3600
+# Resumen diario de disponibilidad por GRD (tabla grd_disponibilidad_diaria) y largo del
+# ranking de peores GRD del dashboard
+GRD_ROLLUP_SECONDS = 300
+GRD_AVAILABILITY_RANKING = 10
 
 # ---------------------------------------------------------
 # --- Dashboard (dash_config) -----------------------------
@@ -61,6 +73,19 @@ ALARM_CHECK_INTERVAL_SECONDS = _req_int("ALARM_CHECK_INTERVAL_SECONDS")  # Inter
 ALARM_MIN_SUSTAINED_DURATION_MINUTES = _req_int("ALARM_MIN_SUSTAINED_DURATION_MINUTES")  # Cuanto debe sostenerse una alarma para enviar email
 ALARM_EMAIL_RECIPIENT = _req_csv("ALARM_EMAIL_RECIPIENT")
 ALARM_EMAIL_SUBJECT_PREFIX = _req("ALARM_EMAIL_SUBJECT_PREFIX")  # Prefijo para el asunto del email
+# Alarmas disparadas dentro de la ventana (desde la primera) se envian en un solo email resumen.
+# Con el tope horario alcanzado las alarmas se retienen y se suman al proximo resumen.
+ALARM_DIGEST_WINDOW_SECONDS = 60
+ALARM_EMAIL_MAX_PER_HOUR = 20
+# GRD y demonios charito: histeresis de recuperacion (la alarma se resuelve recien tras
+# ALARM_RECOVERY_SECONDS sin volver a caer) y deteccion de intermitencia: con
+# ALARM_FLAP_MAX_CHANGES cambios de estado dentro de ALARM_FLAP_WINDOW_SECONDS se envia
+# una unica alarma de "intermitente" y se suspenden las individuales hasta estabilizarse.
+ALARM_RECOVERY_SECONDS = 120
+ALARM_FLAP_WINDOW_SECONDS = 1800
+ALARM_FLAP_MAX_CHANGES = 6
+# Opcional: graba en JSONL las respuestas upstream de cada chequeo (replay con python -m src.alarmas.replay)
+ALARM_RECORD_PATH = os.getenv("PANELEXEMYS_ALARM_RECORD_PATH", "").strip()
 
 # ---------------------------------------------------------
 # --- Mensagelo (servicio HTTP de mensajeria) -------------
@@ -75,6 +100,30 @@ MENSAGELO_MAX_RETRIES = _req_int("MENSAGELO_MAX_RETRIES")
 MENSAGELO_BACKOFF_INITIAL = _req_float("MENSAGELO_BACKOFF_INITIAL")   # segundos
 MENSAGELO_BACKOFF_MAX = _req_float("MENSAGELO_BACKOFF_MAX")           # segundos
 
+# Entrega de emails de alarma: outbox SQLite + worker con reintentos agendados por tiempo.
+# Backoff entre intentos: MENSAGELO_BACKOFF_INITIAL, duplicando hasta MENSAGELO_BACKOFF_MAX.
+ALARM_DELIVERY_MAX_ATTEMPTS = 10
+ALARM_DELIVERY_POLL_SECONDS = 5
+ALARM_DELIVERY_BATCH = 20
+# Registro de emails enviados (mensajes_enviados): escritura diferida en lotes.
+# Se confirma un lote al juntar MENSAJES_WRITE_BATCH filas o a los MENSAJES_WRITE_FLUSH_SECONDS
+# de la primera pendiente; con MENSAJES_WRITE_MAX_PENDING en cola el llamador escribe el lote y,
+# si la base sigue rechazando escrituras pasados MENSAJES_WRITE_BLOCK_SECONDS, descarta la mas antigua.
+MENSAJES_WRITE_BATCH = 50
+MENSAJES_WRITE_FLUSH_SECONDS = 1.0
+MENSAJES_WRITE_MAX_PENDING = 1000
+MENSAJES_WRITE_BLOCK_SECONDS = 5.0
+# Mantenimiento de la base local: los mensajes mas viejos que DB_RETENTION_DAYS quedan solo
+# como resumen diario (mensajes_diarios); el outbox de alarmas ya resuelto se borra a los
+# DB_OUTBOX_RETENTION_DAYS. Cada corrida procesa hasta DB_ROLLUP_MAX_BATCHES lotes de
+# DB_ROLLUP_BATCH filas y libera hasta DB_VACUUM_MAX_PAGES paginas (auto_vacuum incremental).
+DB_RETENTION_DAYS = 180
+DB_OUTBOX_RETENTION_DAYS = 30
+DB_MAINTENANCE_PERIOD_SECONDS = 3600
+DB_ROLLUP_BATCH = 2000
+DB_ROLLUP_MAX_BATCHES = 10
+DB_VACUUM_MAX_PAGES = 2000
+
 # ---------------------------------------------------------
 # --- MQTT ------------------------------------------------
 # ---------------------------------------------------------
@@ -126,6 +175,18 @@ MQTT_PUBLISH_RETAIN_STATE = _req_bool("MQTT_PUBLISH_RETAIN_STATE")
 MQTT_PUBLISH_QOS_EVENT = _req_int("MQTT_PUBLISH_QOS_EVENT")
 MQTT_PUBLISH_RETAIN_EVENT = _req_bool("MQTT_PUBLISH_RETAIN_EVENT")
 
+# Snapshots retenidos: solo se re-publican si cambia el contenido (sin campos volatiles)
+# o si pasaron MQTT_STATE_MAX_SILENCE_SECONDS desde la ultima publicacion (heartbeat).
+MQTT_STATE_VOLATILE_FIELDS = {"ts"}
+MQTT_STATE_MAX_SILENCE_SECONDS = 900
+
+# Outbox durable (SQLite en PANELEXEMYS_DATA_DIR) para publicaciones hechas sin broker.
+# Al reconectar se drena en lotes de MQTT_OUTBOX_REPLAY_BATCH cada MQTT_OUTBOX_REPLAY_INTERVAL_SECONDS.
+MQTT_OUTBOX_MAX_ROWS = 5000
+MQTT_OUTBOX_MAX_AGE_SECONDS = 86400
+MQTT_OUTBOX_REPLAY_BATCH = 20
+MQTT_OUTBOX_REPLAY_INTERVAL_SECONDS = 1.0
+
 ROUTER_SERVICE_BASE_URL = _req("ROUTER_SERVICE_BASE_URL").rstrip("/")
 ROUTER_CLIENT_TIMEOUT_SECONDS = _req_int("ROUTER_CLIENT_TIMEOUT_SECONDS")
 
@@ -154,6 +215,21 @@ MQTT_RPC_ALLOWED_REPLY_TO = {
     MQTT_TOPIC_EMAIL_EVENT,
 }
 
+# Pool de atencion RPC: workers compartidos, limites por accion y deadline.
+# Un request que espero en cola mas de MQTT_RPC_DEADLINE_SECONDS se responde con error.
+MQTT_RPC_WORKERS = 4
+MQTT_RPC_DEADLINE_SECONDS = 15
+MQTT_RPC_ACTION_LIMITS = {
+    "get_global_status": {"concurrency": 2, "queue": 100},
+    "get_modem_status": {"concurrency": 2, "queue": 100},
+    "send_email_test": {"concurrency": 1, "queue": 5},
+}
+
+# Coalescencia: requests identicos (accion + params) en vuelo comparten una sola consulta.
+# Con BATCH_REPLIES se publica una respuesta por reply_to con la lista "corrs" de todos los pedidos.
+MQTT_RPC_COALESCE_ACTIONS = {"get_global_status", "get_modem_status"}
+MQTT_RPC_BATCH_REPLIES = False
+
 # ---------------------------------------------------------
 # --- Proxmox (PVE) ---------------------------------------
 # ---------------------------------------------------------
@@ -165,3 +241,26 @@ PVE_HTTP_TIMEOUT_SECONDS = _req_int("PVE_HTTP_TIMEOUT_SECONDS")
 PVE_VERIFY_SSL = _req("PVE_VERIFY_SSL").lower() in {"1", "true", "yes", "on"}
 PVE_HISTORY_HOURS = _req_int("PVE_HISTORY_HOURS")
 PVE_MQTT_PUBLISH_FACTOR = _req_int("PVE_MQTT_PUBLISH_FACTOR")
+# el snapshot persistido (arranque sin pve-service) se reescribe solo si cambio y a lo sumo cada N s
+PVE_PERSIST_MIN_SECONDS = 60
+# serie local por VM (PANELEXEMYS_DATA_DIR/pve_history): volcado a disco cada N s y puntos
+# maximos por serie que recibe la vista historica
+PVE_HISTORY_PERSIST_SECONDS = 300
+PVE_HISTORY_MAX_POINTS = 720
+
+# ---------------------------------------------------------
+# --- Agenda de chequeos de alarmas -----------------------
+# ---------------------------------------------------------
+# Cada notificador corre con su propio periodo (s) sobre reloj monotono, sin deriva.
+# jitter: desplazamiento aleatorio maximo (s) por ejecucion; timeout: duracion (s) a partir
+# de la cual una ejecucion se marca como excedida. Si la ejecucion anterior sigue en curso
+# la siguiente se omite (no se solapan).
+ALARM_SCHEDULE = {
+    "grd": {"period": ALARM_CHECK_INTERVAL_SECONDS, "jitter": 0, "timeout": 30},
+    "modem": {"period": ALARM_CHECK_INTERVAL_SECONDS, "jitter": 2, "timeout": 20},
+    "ge": {"period": 15, "jitter": 1, "timeout": 15},
+    "proxmox": {"period": PVE_POLL_INTERVAL_SECONDS, "jitter": 1, "timeout": 30},
+    "charito": {"period": ALARM_CHECK_INTERVAL_SECONDS, "jitter": 2, "timeout": 20},
+    "digest": {"period": 5, "jitter": 0, "timeout": 30},
+    "reglas": {"period": 10, "jitter": 0, "timeout": 10},
+}
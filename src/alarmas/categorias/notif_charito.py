@@ -2,7 +2,7 @@ from datetime import timedelta
 from typing import Any, Dict, List
 
 from src.logger import Logosaurio
-from src.utils import timebox
+from src.alarmas.debounce import SustainedConditionEngine
 import config
 
 
@@ -13,7 +13,12 @@ class NotifCharitoDaemon:
 
     def __init__(self, logger: Logosaurio):
         self.logger = logger
-        self.daemon_states: Dict[str, Dict[str, Any]] = {}
+        self.engine = SustainedConditionEngine(
+            timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES),
+            recovery=config.ALARM_RECOVERY_SECONDS,
+            flap_window=config.ALARM_FLAP_WINDOW_SECONDS,
+            flap_max_changes=config.ALARM_FLAP_MAX_CHANGES,
+        )
 
     def evaluate_condition(self, snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -26,11 +31,7 @@ class NotifCharitoDaemon:
         if not isinstance(items, list):
             return []
 
-        now = timebox.utc_now()
-        min_duration = timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES)
-        alerts: List[Dict[str, Any]] = []
-
-        current_ids = set()
+        current: Dict[str, Dict[str, Any]] = {}
         for item in items:
             if not isinstance(item, dict):
                 continue
@@ -43,57 +44,67 @@ class NotifCharitoDaemon:
                 else:
                     continue
 
-            current_ids.add(instance_id)
+            current[instance_id] = {
+                "alias": alias or instance_id,
+                "status": str(item.get("status") or "unknown").lower(),
+                "received_at": item.get("receivedAt"),
+            }
 
-            status_raw = str(item.get("status") or "unknown").lower()
-            is_online = status_raw == "online"
-            received_at = item.get("receivedAt")
-
-            state = self.daemon_states.setdefault(
-                instance_id,
-                {
-                    "start_time": None,
-                    "triggered": False,
-                    "alias": alias or instance_id,
-                    "status": status_raw,
-                    "received_at": received_at,
-                },
-            )
-            state["alias"] = alias or instance_id
-            state["status"] = status_raw
-            state["received_at"] = received_at
+        # Limpiar estados ya no reportados por el servicio
+        for iid in self.engine.keys() - current.keys():
+            self.engine.discard(iid)
 
-            if not is_online:
-                if state["start_time"] is None:
-                    state["start_time"] = now
-                    self.logger.log(
-                        f"Alarma potencial: charo-daemon {state['alias']} en estado '{status_raw}'. Iniciando conteo.",
-                        origin="NOTIF/CHARITO",
-                    )
+        offline = {iid for iid, info in current.items() if info["status"] != "online"}
+        events = self.engine.update(offline)
 
-                if not state["triggered"] and now - state["start_time"] >= min_duration:
-                    state["triggered"] = True
-                    alerts.append(
-                        {
-                            "instance_id": instance_id,
-                            "alias": state["alias"],
-                            "status": status_raw,
-                            "status_display": status_raw.upper(),
-                            "received_at": received_at,
-                        }
-                    )
-            else:
-                if state["start_time"] is not None:
-                    self.logger.log(
-                        f"Alarma charo-daemon resuelta: {state['alias']} regreso a estado ONLINE.",
-                        origin="NOTIF/CHARITO",
-                    )
-                state["start_time"] = None
-                state["triggered"] = False
+        for iid, _state in events.resolved:
+            self.logger.log(
+                f"Alarma charo-daemon resuelta: {current[iid]['alias']} regreso a estado ONLINE.",
+                origin="NOTIF/CHARITO",
+            )
+        for iid in events.started:
+            info = current[iid]
+            self.logger.log(
+                f"Alarma potencial: charo-daemon {info['alias']} en estado '{info['status']}'. Iniciando conteo.",
+                origin="NOTIF/CHARITO",
+            )
 
-        # Limpiar estados ya no reportados por el servicio
-        obsolete_ids = [iid for iid in list(self.daemon_states.keys()) if iid not in current_ids]
-        for iid in obsolete_ids:
-            del self.daemon_states[iid]
+        alerts: List[Dict[str, Any]] = []
+        for iid in events.flap_started:
+            info = current.get(iid) or {"alias": iid, "status": "unknown", "received_at": None}
+            changes = self.engine.flap_changes(iid)
+            self.logger.log(
+                f"charo-daemon {info['alias']} intermitente: {changes} cambios de estado "
+                f"en {config.ALARM_FLAP_WINDOW_SECONDS // 60} minutos. Se suspenden alarmas individuales.",
+                origin="NOTIF/CHARITO",
+            )
+            alerts.append(
+                {
+                    "instance_id": iid,
+                    "alias": info["alias"],
+                    "status": info["status"],
+                    "status_display": "INTERMITENTE",
+                    "received_at": info["received_at"],
+                    "flapping": True,
+                    "changes": changes,
+                }
+            )
+        for iid in events.flap_ended:
+            alias = current[iid]["alias"] if iid in current else iid
+            self.logger.log(
+                f"charo-daemon {alias} estable: fin de intermitencia.",
+                origin="NOTIF/CHARITO",
+            )
 
+        for iid in events.triggered:
+            info = current[iid]
+            alerts.append(
+                {
+                    "instance_id": iid,
+                    "alias": info["alias"],
+                    "status": info["status"],
+                    "status_display": info["status"].upper(),
+                    "received_at": info["received_at"],
+                }
+            )
         return alerts
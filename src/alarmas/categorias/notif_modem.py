@@ -1,18 +1,19 @@
 from datetime import timedelta
-from typing import Dict, Any
 from src.logger import Logosaurio
-from src.utils import timebox
+from src.alarmas.debounce import SustainedConditionEngine
 from src.web.clients.router_client import router_client
 import config
 
 class NotifModem:
-    def __init__(self, logger: Logosaurio):
+    KEY = "modem"
+
+    def __init__(self, logger: Logosaurio, client=None):
         self.logger = logger
-        self.state: Dict[str, Any] = {
-            'start_time': None,
-            'triggered': False,
-            'description': "Router telef. puerto de escucha cerrado"
-        }
+        self.client = client or router_client
+        self.description = "Router telef. puerto de escucha cerrado"
+        self.engine = SustainedConditionEngine(
+            timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES)
+        )
     
     def evaluate_condition(self) -> bool:
         """
@@ -21,30 +22,19 @@ class NotifModem:
         """
         modem_status = self._get_modem_status()
         is_disconnected = modem_status == "cerrado"
+        events = self.engine.set_active(self.KEY, is_disconnected)
 
-        if is_disconnected:
-            if self.state['start_time'] is None:
-                self.state['start_time'] = timebox.utc_now()
-                self.logger.log("Alarma potencial: Router Modem con puerto cerrado. Iniciando conteo.", origin="NOTIF/MODEM")
-            
-            sustained_duration = timebox.utc_now() - self.state['start_time']
-            min_duration = timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES)
-            
-            if sustained_duration >= min_duration and not self.state['triggered']:
-                self.state['triggered'] = True
-                return True
-        else:
-            if self.state['start_time'] is not None:
-                self.logger.log("Alarma de router modem resuelta (puerto abierto).", origin="NOTIF/MODEM")
-            self.state['start_time'] = None
-            self.state['triggered'] = False
+        if events.started:
+            self.logger.log("Alarma potencial: Router Modem con puerto cerrado. Iniciando conteo.", origin="NOTIF/MODEM")
+        if events.resolved:
+            self.logger.log("Alarma de router modem resuelta (puerto abierto).", origin="NOTIF/MODEM")
 
-        return False
+        return bool(events.triggered)
 
     def _get_modem_status(self) -> str:
         """Consulta router-telef-service para conocer el estado."""
         try:
-            status = router_client.get_status()
+            status = self.client.get_status()
             return str(status.get("state", "cerrado"))
         except Exception as e:
             self.logger.log(f"ERROR consultando router-telef-service: {e}. Asumiendo puerto cerrado.", origin="NOTIF/MODEM")
@@ -1,60 +1,120 @@
 from datetime import timedelta
 from typing import Dict, Any, List
 from src.logger import Logosaurio
-from src.utils import timebox
+from src.alarmas.debounce import SustainedConditionEngine
 import config
 
 class NotifMwNodo:
     def __init__(self, logger: Logosaurio, excluded_grd_ids: set):
         self.logger = logger
-        self.individual_grd_alarm_states: Dict[int, Dict[str, Any]] = {}
+        self.engine = SustainedConditionEngine(
+            timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES),
+            recovery=config.ALARM_RECOVERY_SECONDS,
+            flap_window=config.ALARM_FLAP_WINDOW_SECONDS,
+            flap_max_changes=config.ALARM_FLAP_MAX_CHANGES,
+        )
+        self.descriptions: Dict[int, str] = {}
         self.excluded_grd_ids: set = excluded_grd_ids
+        self._rules = None
+        self._pending_rules = None
+        # intermitencias detectadas con conectividad global baja: se avisan al recuperarse
+        self._flap_pending: set = set()
+
+    def apply_rules(self, rules) -> None:
+        """
+        Publica una nueva version de reglas (AlarmRules); se instala al inicio del proximo chequeo,
+        en el hilo que evalua, sin bloquear ni mezclar versiones dentro de un chequeo.
+        """
+        self._pending_rules = rules
+
+    def rules_version(self) -> int:
+        return self._rules.version if self._rules is not None else 0
+
+    def _install_rules(self, rules) -> None:
+        newly_excluded = set(rules.excluded) - set(self.excluded_grd_ids)
+        self.excluded_grd_ids = set(rules.excluded)
+        for grd_id in newly_excluded:
+            # excluido en caliente: deja de seguirse sin generar "resuelta"
+            self.engine.discard(grd_id)
+            self._flap_pending.discard(grd_id)
+        self.engine.set_durations(
+            {grd_id: timedelta(minutes=minutes) for grd_id, minutes in rules.thresholds_minutes.items()}
+        )
+        self._rules = rules
 
     def evaluate_condition(self, current_percentage: float, disconnected_grds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Evalúa las condiciones de alarma para GRDs individuales.
         Retorna una lista de GRDs para los que la alarma debe ser disparada.
         """
+        rules = self._pending_rules
+        if rules is not None and rules is not self._rules:
+            self._install_rules(rules)
+
+        descriptions = {grd['id_grd']: grd['description'] for grd in disconnected_grds}
+        self.descriptions.update(descriptions)
+        active = descriptions.keys() - self.excluded_grd_ids
+
+        # con conectividad global baja la alarma es global: no se inician conteos nuevos
+        # ni se disparan individuales; los GRD ya seguidos conservan su inicio
+        global_ok = current_percentage >= config.GLOBAL_THRESHOLD_ROJO
+        if not global_ok:
+            active = active & self.engine.keys()
+
+        events = self.engine.update(
+            active,
+            fire=global_ok,
+            meta={grd_id: {'description': descriptions[grd_id]} for grd_id in active - self.engine.keys()},
+        )
+
+        for grd_id, state in events.resolved:
+            self.logger.log(
+                f"Alarma individual para GRD {grd_id} ({state.meta.get('description')}) resuelta.",
+                origin="NOTIF/NODO"
+            )
+
+        for grd_id in events.started:
+            self.logger.log(
+                f"Alarma potencial: GRD {grd_id} ({descriptions[grd_id]}) desconectado. Iniciando conteo.", 
+                origin="NOTIF/NODO"
+            )
+
         grds_to_trigger = []
-        current_disconnected_ids = {grd['id_grd'] for grd in disconnected_grds}
-        
-        # Limpiar estados de GRDs reconectados o no aplicables
-        grds_to_remove = [
-            grd_id
-            for grd_id in list(self.individual_grd_alarm_states.keys())
-            if grd_id not in current_disconnected_ids
-        ]
-               
-        for grd_id in grds_to_remove:
-            if grd_id in self.individual_grd_alarm_states:
-                self.logger.log(
-                    f"Alarma individual para GRD {grd_id} ({self.individual_grd_alarm_states[grd_id]['description']}) resuelta.",
-                    origin="NOTIF/NODO"
-                )
-                del self.individual_grd_alarm_states[grd_id]
-        
-        # Evaluar nuevos estados de desconexion
-        for grd_info in disconnected_grds:
-            grd_id = grd_info['id_grd']
-            grd_description = grd_info['description']
-
-            if current_percentage >= config.GLOBAL_THRESHOLD_ROJO and grd_id not in self.excluded_grd_ids:
-                if grd_id not in self.individual_grd_alarm_states:
-                    self.individual_grd_alarm_states[grd_id] = {
-                        'start_time': timebox.utc_now(),
-                        'triggered': False,
-                        'description': grd_description
-                    }
-                    self.logger.log(
-                        f"Alarma potencial: GRD {grd_id} ({grd_description}) desconectado. Iniciando conteo.", 
-                        origin="NOTIF/NODO"
-                    )
-                else:
-                    sustained_duration = timebox.utc_now() - self.individual_grd_alarm_states[grd_id]['start_time']
-                    min_duration = timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES)
-
-                    if sustained_duration >= min_duration and not self.individual_grd_alarm_states[grd_id]['triggered']:
-                        self.individual_grd_alarm_states[grd_id]['triggered'] = True
-                        grds_to_trigger.append(self.individual_grd_alarm_states[grd_id])
+        for grd_id in events.flap_started:
+            description = self.descriptions.get(grd_id, str(grd_id))
+            self.logger.log(
+                f"GRD {grd_id} ({description}) intermitente: {self.engine.flap_changes(grd_id)} cambios de estado "
+                f"en {config.ALARM_FLAP_WINDOW_SECONDS // 60} minutos. Se suspenden alarmas individuales.",
+                origin="NOTIF/NODO"
+            )
+            self._flap_pending.add(grd_id)
+        for grd_id in events.flap_ended:
+            self._flap_pending.discard(grd_id)
+            self.logger.log(
+                f"GRD {grd_id} ({self.descriptions.get(grd_id, grd_id)}) estable: fin de intermitencia.",
+                origin="NOTIF/NODO"
+            )
+
+        # el aviso de intermitencia espera a que la conectividad global se recupere
+        # (como los conteos en curso), mientras el GRD siga intermitente
+        if global_ok and self._flap_pending:
+            for grd_id in sorted(self._flap_pending):
+                if grd_id in self.excluded_grd_ids or not self.engine.is_flapping(grd_id):
+                    continue
+                grds_to_trigger.append({
+                    'id_grd': grd_id,
+                    'description': self.descriptions.get(grd_id, str(grd_id)),
+                    'flapping': True,
+                    'changes': self.engine.flap_changes(grd_id),
+                })
+            self._flap_pending.clear()
 
+        for grd_id in events.triggered:
+            state = self.engine.get(grd_id)
+            grds_to_trigger.append({
+                'id_grd': grd_id,
+                'start_time': state.start_time,
+                'triggered': True,
+                'description': state.meta.get('description'),
+            })
         return grds_to_trigger
@@ -2,6 +2,7 @@ from datetime import timedelta
 from typing import Any, Dict, List
 
 from src.logger import Logosaurio
+from src.alarmas.debounce import SustainedConditionEngine
 from src.utils import timebox
 import config
 
@@ -11,13 +12,14 @@ class NotifProxmoxHost:
     Supervisa la disponibilidad del hipervisor Proxmox.
     """
 
+    KEY = "pve_host"
+
     def __init__(self, logger: Logosaurio):
         self.logger = logger
-        self.state: Dict[str, Any] = {
-            "start_time": None,
-            "triggered": False,
-            "last_error": "",
-        }
+        self.engine = SustainedConditionEngine(
+            timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES)
+        )
+        self.last_error = ""
 
     def evaluate_condition(self, snapshot: Dict[str, Any]) -> bool:
         """
@@ -55,37 +57,31 @@ class NotifProxmoxHost:
             offline = True
             error_text = error_text or "sin snapshot disponible"
 
-        min_duration = timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES)
-
+        events = self.engine.set_active(self.KEY, offline, now=now)
         if offline:
-            if self.state["start_time"] is None:
-                self.state["start_time"] = now
-                self.state["last_error"] = error_text
+            if events.started:
+                self.last_error = error_text
                 self.logger.log(
                     f"Alarma potencial: hipervisor Proxmox inalcanzable. Motivo: {error_text}",
                     origin="NOTIF/PVE_HOST",
                 )
             else:
-                self.state["last_error"] = error_text or self.state.get("last_error", "")
-
-            if not self.state["triggered"] and now - self.state["start_time"] >= min_duration:
-                self.state["triggered"] = True
-                return True
-        else:
-            if self.state["start_time"] is not None:
-                self.logger.log("Alarma de hipervisor Proxmox resuelta.", origin="NOTIF/PVE_HOST")
-            self.state = {"start_time": None, "triggered": False, "last_error": ""}
+                self.last_error = error_text or self.last_error
+            return bool(events.triggered)
 
+        if events.resolved:
+            self.logger.log("Alarma de hipervisor Proxmox resuelta.", origin="NOTIF/PVE_HOST")
+        self.last_error = ""
         return False
 
     def get_last_error(self) -> str:
-        return self.state.get("last_error") or ""
+        return self.last_error or ""
 
     def is_counting(self) -> bool:
-        return bool(self.state.get("start_time")) and not bool(self.state.get("triggered"))
+        return self.engine.is_tracked(self.KEY) and not self.engine.is_triggered(self.KEY)
 
     def is_triggered(self) -> bool:
-        return bool(self.state.get("triggered"))
+        return self.engine.is_triggered(self.KEY)
 
     def allow_vm_processing(self) -> bool:
         return self.is_triggered() or not self.is_counting()
@@ -98,7 +94,9 @@ class NotifProxmoxVm:
 
     def __init__(self, logger: Logosaurio):
         self.logger = logger
-        self.vm_states: Dict[int, Dict[str, Any]] = {}
+        self.engine = SustainedConditionEngine(
+            timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES)
+        )
 
     def evaluate_condition(self, snapshot: Dict[str, Any], allow_processing: bool = True) -> List[Dict[str, Any]]:
         """
@@ -123,10 +121,12 @@ class NotifProxmoxVm:
                 continue
             vm_map[vmid] = item
 
-        alerts: List[Dict[str, Any]] = []
-        now = timebox.utc_now()
-        min_duration = timedelta(minutes=config.ALARM_MIN_SUSTAINED_DURATION_MINUTES)
+        # Limpiar estados de VMs que ya no están configuradas
+        configured_set = set(configured_ids)
+        for vmid in self.engine.keys() - configured_set:
+            self.engine.discard(vmid)
 
+        current: Dict[int, Dict[str, str]] = {}
         for vmid in configured_ids:
             vm_info = vm_map.get(vmid)
             if vm_info:
@@ -135,50 +135,32 @@ class NotifProxmoxVm:
             else:
                 status_raw = "sin datos"
                 name = f"VM {vmid}"
+            current[vmid] = {"name": name, "status": status_raw}
 
-            is_running = status_raw == "running"
-            state = self.vm_states.setdefault(
-                vmid,
-                {
-                    "start_time": None,
-                    "triggered": False,
-                    "name": name,
-                    "status": status_raw,
-                },
-            )
-            state["name"] = name
-            state["status"] = status_raw
-
-            if not is_running:
-                if state["start_time"] is None:
-                    state["start_time"] = now
-                    self.logger.log(
-                        f"Alarma potencial: VM {vmid} ({name}) en estado '{status_raw}'. Iniciando conteo.",
-                        origin="NOTIF/PVE_VM",
-                    )
-
-                if not state["triggered"] and now - state["start_time"] >= min_duration:
-                    state["triggered"] = True
-                    alerts.append(
-                        {
-                            "vmid": vmid,
-                            "name": name,
-                            "status": status_raw,
-                            "status_display": status_raw.upper(),
-                        }
-                    )
-            else:
-                if state["start_time"] is not None:
-                    self.logger.log(
-                        f"Alarma Proxmox resuelta: VM {vmid} ({name}) regresó a estado RUNNING.",
-                        origin="NOTIF/PVE_VM",
-                    )
-                state["start_time"] = None
-                state["triggered"] = False
+        stopped = {vmid for vmid, info in current.items() if info["status"] != "running"}
+        events = self.engine.update(stopped)
 
-        # Limpiar estados de VMs que ya no están configuradas
-        obsolete_ids = [vmid for vmid in list(self.vm_states.keys()) if vmid not in configured_ids]
-        for vmid in obsolete_ids:
-            del self.vm_states[vmid]
+        for vmid, _state in events.resolved:
+            self.logger.log(
+                f"Alarma Proxmox resuelta: VM {vmid} ({current[vmid]['name']}) regresó a estado RUNNING.",
+                origin="NOTIF/PVE_VM",
+            )
+        for vmid in events.started:
+            info = current[vmid]
+            self.logger.log(
+                f"Alarma potencial: VM {vmid} ({info['name']}) en estado '{info['status']}'. Iniciando conteo.",
+                origin="NOTIF/PVE_VM",
+            )
 
+        alerts: List[Dict[str, Any]] = []
+        for vmid in events.triggered:
+            info = current[vmid]
+            alerts.append(
+                {
+                    "vmid": vmid,
+                    "name": info["name"],
+                    "status": info["status"],
+                    "status_display": info["status"].upper(),
+                }
+            )
         return alerts
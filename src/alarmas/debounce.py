@@ -0,0 +1,384 @@
+"""
+Motor de condiciones sostenidas por clave (debounce).
+
+Cada notificador informa en cada chequeo el conjunto de claves con la condicion activa
+(GRD desconectado, VM detenida, demonio offline, ...). El motor:
+- difiere contra las claves ya seguidas (diferencia de conjuntos): solo procesa altas y bajas;
+- guarda el vencimiento de cada clave en un heap (min-heap por deadline);
+- por chequeo solo revisa los vencimientos ya cumplidos.
+El costo de un chequeo es O(cambios + vencimientos), no O(claves * chequeos).
+Las claves modificadas quedan marcadas para que el llamador las persista (drain_dirty).
+
+Opcionales por motor:
+- recovery: histeresis de recuperacion. Una clave que deja de estar activa se resuelve
+  recien despues de 'recovery' segundos sin volver; si vuelve antes conserva su inicio.
+- flap_window / flap_max_changes: una clave con flap_max_changes cambios de estado dentro
+  de flap_window pasa a 'intermitente' (un evento flap_started) y no dispara alarmas
+  individuales hasta quedar estable una ventana completa (evento flap_ended).
+  La historia por clave es un deque acotado a flap_max_changes instantes.
+"""
+
+import heapq
+import itertools
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union
+
+from src.utils import timebox
+
+
+def _seconds(value: Union[timedelta, float, int, None]) -> timedelta:
+    if isinstance(value, timedelta):
+        return value
+    return timedelta(seconds=float(value or 0))
+
+
+class KeyState:
+    """
+    estado de una clave seguida: inicio de la condicion, si ya disparo y datos asociados.
+    clearing_since: instante en que dejo de estar activa (en recuperacion) o None
+    """
+
+    __slots__ = ("start_time", "triggered", "meta", "gen", "clearing_since")
+
+    def __init__(self, start_time: datetime, meta: Optional[Dict[str, Any]], gen: int):
+        self.start_time = start_time
+        self.triggered = False
+        self.meta: Dict[str, Any] = dict(meta or {})
+        self.gen = gen
+        self.clearing_since: Optional[datetime] = None
+
+
+class _FlapState:
+    """
+    ultimos cambios de estado de una clave (acotado) y si esta intermitente
+    """
+
+    __slots__ = ("changes", "flapping", "since", "gen")
+
+    def __init__(self, max_changes: int):
+        self.changes: Deque[datetime] = deque(maxlen=max_changes)
+        self.flapping = False
+        self.since: Optional[datetime] = None
+        self.gen = 0
+
+
+class DebounceEvents:
+    """
+    resultado de un chequeo: claves que iniciaron conteo, dispararon o se resolvieron,
+    y claves que entraron o salieron de intermitencia
+    """
+
+    __slots__ = ("started", "triggered", "resolved", "flap_started", "flap_ended")
+
+    def __init__(self):
+        self.started: List[Hashable] = []
+        self.triggered: List[Hashable] = []
+        self.resolved: List[Tuple[Hashable, KeyState]] = []
+        self.flap_started: List[Hashable] = []
+        self.flap_ended: List[Hashable] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.started or self.triggered or self.resolved or self.flap_started or self.flap_ended)
+
+
+class SustainedConditionEngine:
+    """
+    Seguimiento de condiciones booleanas por clave con duracion minima sostenida.
+    - update(activas): altas inician conteo, bajas se resuelven, vencidas disparan (una sola vez).
+    - fire=False: procesa altas/bajas pero no dispara (los vencimientos quedan pendientes).
+    - discard(clave): deja de seguir la clave sin evento de resolucion.
+    """
+
+    def __init__(
+        self,
+        min_duration: Union[timedelta, float],
+        recovery: Union[timedelta, float, None] = None,
+        flap_window: Union[timedelta, float, None] = None,
+        flap_max_changes: int = 0,
+    ):
+        self.min_duration = _seconds(min_duration)
+        # duracion propia por clave (reglas por GRD); el resto usa min_duration
+        self._durations: Dict[Hashable, timedelta] = {}
+        self.recovery = _seconds(recovery)
+        self.flap_window = _seconds(flap_window)
+        self.flap_max_changes = max(0, int(flap_max_changes))
+        self._flap_enabled = self.flap_max_changes >= 2 and self.flap_window.total_seconds() > 0
+        self._states: Dict[Hashable, KeyState] = {}
+        # claves seguidas con la condicion presente (las en recuperacion no estan aca)
+        self._active: Set[Hashable] = set()
+        self._heap: List[Tuple[datetime, int, Hashable, int]] = []
+        self._recovery_heap: List[Tuple[datetime, int, Hashable, int, datetime]] = []
+        self._flaps: Dict[Hashable, _FlapState] = {}
+        self._flap_heap: List[Tuple[datetime, int, Hashable, int]] = []
+        self._seq = itertools.count()
+        self._gen = itertools.count(1)
+        # clave -> estado a guardar (None = borrar); se vacia con drain_dirty()
+        self._dirty: Dict[Hashable, Optional[KeyState]] = {}
+        # totales acumulados de eventos desde el arranque (metricas)
+        self.counters: Dict[str, int] = {"started": 0, "triggered": 0, "resolved": 0, "flap_started": 0}
+
+    # ----------------- API -----------------
+
+    def update(
+        self,
+        active: Iterable[Hashable],
+        now: Optional[datetime] = None,
+        fire: bool = True,
+        meta: Optional[Dict[Hashable, Dict[str, Any]]] = None,
+    ) -> DebounceEvents:
+        """
+        aplica el conjunto de claves activas del chequeo actual.
+        meta: datos opcionales por clave, guardados al iniciar el conteo.
+        """
+        now = now or timebox.utc_now()
+        active_set = active if isinstance(active, (set, frozenset)) else set(active)
+        events = DebounceEvents()
+
+        for key in self._active - active_set:
+            self._deactivate(key, now, events)
+        for key in active_set - self._active:
+            self._activate(key, now, events, (meta or {}).get(key))
+
+        self._advance(now, fire, events)
+        self._maybe_compact()
+        self._count(events)
+        return events
+
+    def set_active(self, key: Hashable, active: bool, now: Optional[datetime] = None, fire: bool = True) -> DebounceEvents:
+        """
+        variante para una sola clave (condiciones escalares: global, modem, GE, host)
+        """
+        now = now or timebox.utc_now()
+        events = DebounceEvents()
+        if active and key not in self._active:
+            self._activate(key, now, events, None)
+        elif not active and key in self._active:
+            self._deactivate(key, now, events)
+        self._advance(now, fire, events)
+        self._count(events)
+        return events
+
+    def discard(self, key: Hashable) -> Optional[KeyState]:
+        """
+        deja de seguir una clave sin generar evento (su vencimiento pendiente se ignora)
+        """
+        self._active.discard(key)
+        state = self._states.pop(key, None)
+        if state is not None:
+            self._dirty[key] = None
+        return state
+
+    def restore(self, key: Hashable, start_time: datetime, triggered: bool, meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        reinstala una clave con su inicio original (p. ej. al reiniciar el proceso);
+        no la marca como modificada
+        """
+        self._states.pop(key, None)
+        state = self._track(key, start_time, meta)
+        state.triggered = bool(triggered)
+        self._active.add(key)
+        self._dirty.pop(key, None)
+
+    def set_durations(self, durations: Dict[Hashable, Union[timedelta, float]], now: Optional[datetime] = None) -> None:
+        """
+        reemplaza las duraciones propias por clave; re-agenda las claves seguidas afectadas
+        """
+        now = now or timebox.utc_now()
+        new = {key: _seconds(value) for key, value in durations.items()}
+        changed = {k for k in new.keys() | self._durations.keys() if new.get(k) != self._durations.get(k)}
+        self._durations = new
+        for key in changed:
+            state = self._states.get(key)
+            if state is not None and not state.triggered and state.clearing_since is None:
+                self._push_deadline(key, state, now)
+
+    def duration_for(self, key: Hashable) -> timedelta:
+        return self._durations.get(key, self.min_duration)
+
+    def drain_dirty(self) -> Dict[Hashable, Optional[KeyState]]:
+        """
+        retorna y limpia las claves modificadas desde la ultima llamada (None = resuelta)
+        """
+        dirty, self._dirty = self._dirty, {}
+        return dirty
+
+    def clear(self) -> None:
+        for key in self._states:
+            self._dirty[key] = None
+        self._states.clear()
+        self._active.clear()
+        self._heap.clear()
+        self._recovery_heap.clear()
+        self._flaps.clear()
+        self._flap_heap.clear()
+
+    # ----------------- consulta -----------------
+
+    def get(self, key: Hashable) -> Optional[KeyState]:
+        return self._states.get(key)
+
+    def is_tracked(self, key: Hashable) -> bool:
+        return key in self._states
+
+    def is_triggered(self, key: Hashable) -> bool:
+        state = self._states.get(key)
+        return bool(state and state.triggered)
+
+    def is_flapping(self, key: Hashable) -> bool:
+        flap = self._flaps.get(key)
+        return bool(flap and flap.flapping)
+
+    def flap_changes(self, key: Hashable) -> int:
+        flap = self._flaps.get(key)
+        return len(flap.changes) if flap else 0
+
+    def flapping_keys(self) -> List[Hashable]:
+        return [key for key, flap in self._flaps.items() if flap.flapping]
+
+    def keys(self):
+        return self._states.keys()
+
+    def items(self):
+        return self._states.items()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    # ----------------- transiciones -----------------
+
+    def _count(self, events: DebounceEvents) -> None:
+        if events:
+            counters = self.counters
+            counters["started"] += len(events.started)
+            counters["triggered"] += len(events.triggered)
+            counters["resolved"] += len(events.resolved)
+            counters["flap_started"] += len(events.flap_started)
+
+    def _activate(self, key: Hashable, now: datetime, events: DebounceEvents, meta: Optional[Dict[str, Any]]) -> None:
+        self._active.add(key)
+        self._note_change(key, now, events)
+        state = self._states.get(key)
+        if state is None:
+            self._track(key, now, meta)
+            events.started.append(key)
+        elif state.clearing_since is not None:
+            # volvio dentro de la histeresis: conserva el inicio original
+            state.clearing_since = None
+            if not state.triggered:
+                self._push_deadline(key, state, now)
+
+    def _deactivate(self, key: Hashable, now: datetime, events: DebounceEvents) -> None:
+        self._active.discard(key)
+        self._note_change(key, now, events)
+        state = self._states.get(key)
+        if state is None:
+            return
+        if self.recovery.total_seconds() <= 0:
+            self._resolve(key, events)
+            return
+        state.clearing_since = now
+        heapq.heappush(self._recovery_heap, (now + self.recovery, next(self._seq), key, state.gen, now))
+
+    def _resolve(self, key: Hashable, events: DebounceEvents) -> None:
+        events.resolved.append((key, self._states.pop(key)))
+        self._dirty[key] = None
+
+    def _note_change(self, key: Hashable, now: datetime, events: DebounceEvents) -> None:
+        if not self._flap_enabled:
+            return
+        flap = self._flaps.get(key)
+        if flap is None:
+            flap = self._flaps[key] = _FlapState(self.flap_max_changes)
+        flap.changes.append(now)
+        flap.gen += 1
+        # revision al cerrar la ventana: si no hubo cambios nuevos la clave quedo estable
+        heapq.heappush(self._flap_heap, (now + self.flap_window, next(self._seq), key, flap.gen))
+        if (
+            not flap.flapping
+            and len(flap.changes) == self.flap_max_changes
+            and now - flap.changes[0] <= self.flap_window
+        ):
+            flap.flapping = True
+            flap.since = now
+            events.flap_started.append(key)
+
+    # ----------------- vencimientos -----------------
+
+    def _advance(self, now: datetime, fire: bool, events: DebounceEvents) -> None:
+        heap = self._recovery_heap
+        while heap and heap[0][0] <= now:
+            _, _, key, gen, since = heapq.heappop(heap)
+            state = self._states.get(key)
+            if state is None or state.gen != gen or state.clearing_since != since:
+                continue
+            self._resolve(key, events)
+
+        heap = self._flap_heap
+        while heap and heap[0][0] <= now:
+            _, _, key, gen = heapq.heappop(heap)
+            flap = self._flaps.get(key)
+            if flap is None or flap.gen != gen:
+                continue
+            # una ventana completa sin cambios: fin de intermitencia y se libera la historia
+            del self._flaps[key]
+            if flap.flapping:
+                events.flap_ended.append(key)
+                state = self._states.get(key)
+                if state is not None and not state.triggered and state.clearing_since is None:
+                    self._push_deadline(key, state, now)
+
+        if fire:
+            events.triggered.extend(self._pop_due(now))
+
+    def _track(self, key: Hashable, start_time: datetime, meta: Optional[Dict[str, Any]]) -> KeyState:
+        state = KeyState(start_time, meta, next(self._gen))
+        self._states[key] = state
+        self._dirty[key] = state
+        heapq.heappush(self._heap, (start_time + self.duration_for(key), next(self._seq), key, state.gen))
+        return state
+
+    def _push_deadline(self, key: Hashable, state: KeyState, now: datetime) -> None:
+        deadline = max(now, state.start_time + self.duration_for(key))
+        heapq.heappush(self._heap, (deadline, next(self._seq), key, state.gen))
+
+    def _pop_due(self, now: datetime) -> List[Hashable]:
+        due: List[Hashable] = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, key, gen = heapq.heappop(heap)
+            state = self._states.get(key)
+            # entradas de claves resueltas o re-iniciadas se descartan (borrado perezoso)
+            if state is None or state.gen != gen or state.triggered:
+                continue
+            # en recuperacion o intermitente: se re-agenda al volver / al estabilizarse
+            if state.clearing_since is not None or self.is_flapping(key):
+                continue
+            # la duracion de la clave pudo cambiar (reglas recargadas) despues de agendarla
+            deadline = state.start_time + self.duration_for(key)
+            if deadline > now:
+                heapq.heappush(heap, (deadline, next(self._seq), key, gen))
+                continue
+            state.triggered = True
+            self._dirty[key] = state
+            due.append(key)
+        return due
+
+    def _maybe_compact(self) -> None:
+        # con muchas altas/bajas los heaps acumulan entradas obsoletas: se reconstruyen
+        if len(self._heap) > 2 * len(self._states) + 64:
+            alive = []
+            for entry in self._heap:
+                state = self._states.get(entry[2])
+                if state is not None and state.gen == entry[3] and not state.triggered:
+                    alive.append(entry)
+            heapq.heapify(alive)
+            self._heap = alive
+        if len(self._flap_heap) > 2 * len(self._flaps) + 64:
+            alive_flaps = []
+            for entry in self._flap_heap:
+                flap = self._flaps.get(entry[2])
+                if flap is not None and flap.gen == entry[3]:
+                    alive_flaps.append(entry)
+            heapq.heapify(alive_flaps)
+            self._flap_heap = alive_flaps
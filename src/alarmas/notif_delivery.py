@@ -0,0 +1,168 @@
+"""
+Entrega asincronica de emails de alarma.
+
+NotifManager solo encola en el outbox SQLite (alarm_outbox) y sigue evaluando.
+Un hilo worker toma los pendientes vencidos, hace un unico intento contra mensagelo y:
+- exito: marca sent, registra en mensajes_enviados y publica el evento MQTT;
+- falla transitoria: agenda el proximo intento con backoff exponencial (sin dormir);
+- falla definitiva o intentos agotados: marca failed, registra y publica el evento.
+"""
+
+import threading
+import time
+from typing import List, Optional
+
+from src.alarmas.notif_metrics import alarm_metrics
+from src.dao.dao_alarm_outbox import alarm_outbox_dao
+from src.dao.dao_mensajes_enviados import mensajes_enviados_dao
+from src.logger import Logosaurio
+from src.servicios.mqtt import mqtt_event_bus as bus
+
+
+class AlarmDeliveryWorker:
+    """
+    worker de entrega con reintentos agendados por tiempo
+    """
+
+    def __init__(
+        self,
+        logger: Logosaurio,
+        mail_client,
+        max_attempts: int,
+        backoff_initial: float,
+        backoff_max: float,
+        poll_seconds: float,
+        batch_size: int,
+        subject_prefix: str = "",
+    ):
+        self.logger = logger
+        self.mail_client = mail_client
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_initial = max(0.1, float(backoff_initial))
+        self.backoff_max = max(self.backoff_initial, float(backoff_max))
+        self.poll_seconds = max(0.1, float(poll_seconds))
+        self.batch_size = max(1, int(batch_size))
+        self.subject_prefix = subject_prefix or ""
+        self._origen = "ALRM/EXP"
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        lanza el hilo de entrega (idempotente)
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="alarm-delivery", daemon=True)
+            self._thread.start()
+
+    def submit(
+        self,
+        idem_key: str,
+        timestamp: str,
+        subject: str,
+        body: str,
+        recipients: List[str],
+        message_type: str = "alarm_event",
+        items: Optional[List[dict]] = None,
+        replaces: Optional[List[str]] = None,
+    ) -> bool:
+        """
+        encola el email y despierta al worker; retorna False si la idem_key ya estaba encolada.
+        replaces: alarmas retenidas por AlarmDigest que este email reemplaza (misma transaccion)
+        """
+        queued = alarm_outbox_dao.enqueue(
+            idem_key, timestamp, subject, body, message_type, recipients, items, replaces=replaces
+        )
+        if queued:
+            self._wake.set()
+        else:
+            self.logger.log(f"Alarma ya encolada (idem_key={idem_key}), se omite duplicado.", origin=self._origen)
+        return queued
+
+    # ----------------- ciclo -----------------
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                self.deliver_due()
+            except Exception as exc:
+                self.logger.log(f"ERROR en worker de entrega de alarmas: {exc}", origin=self._origen)
+            self._wake.wait(self._sleep_seconds())
+            self._wake.clear()
+
+    def _sleep_seconds(self) -> float:
+        try:
+            next_at = alarm_outbox_dao.next_due_at()
+        except Exception:
+            next_at = None
+        if next_at is None:
+            return self.poll_seconds
+        return min(self.poll_seconds, max(0.0, next_at - time.time()))
+
+    def deliver_due(self) -> int:
+        """
+        procesa un lote de pendientes vencidos; retorna cuantos se intentaron
+        """
+        rows = alarm_outbox_dao.fetch_due(time.time(), self.batch_size)
+        for row in rows:
+            self._deliver(row)
+        return len(rows)
+
+    def _deliver(self, row: dict) -> None:
+        attempts = int(row["attempts"]) + 1
+        subject = row["subject"]
+        recipients = row["recipients"]
+        started = time.perf_counter()
+        try:
+            ok, msg, retryable = self.mail_client.enqueue_email_once(
+                recipients=recipients,
+                subject=f"{self.subject_prefix}{subject}",
+                body=row["body"],
+                message_type=row["message_type"],
+            )
+        except Exception as exc:
+            ok, msg, retryable = False, str(exc), True
+        alarm_metrics.observe("deliver", "mensagelo", (time.perf_counter() - started) * 1000.0, ok)
+
+        if ok:
+            alarm_outbox_dao.mark_sent(row["id"], attempts)
+            self.logger.log(
+                f"ALARMA DISPARADA: {subject}. Pedido aceptado por mensagelo. Destinatarios: {', '.join(recipients)}",
+                origin=self._origen,
+            )
+            self._record(row, True)
+            return
+
+        if retryable and attempts < self.max_attempts:
+            delay = min(self.backoff_initial * (2 ** (attempts - 1)), self.backoff_max)
+            alarm_outbox_dao.mark_retry(row["id"], attempts, time.time() + delay, msg)
+            self.logger.log(
+                f"mensagelo no disponible para: {subject} (intento {attempts}/{self.max_attempts}). "
+                f"Reintento en {delay:.1f}s. Detalle: {msg}",
+                origin=self._origen,
+            )
+            return
+
+        alarm_outbox_dao.mark_failed(row["id"], attempts, msg)
+        self.logger.log(
+            f"ERROR mensagelo no acepto el pedido para: {subject}. Detalle: {msg}",
+            origin=self._origen,
+        )
+        self._record(row, False)
+
+    @staticmethod
+    def _record(row: dict, ok: bool) -> None:
+        # Registro local en DB con el resultado final del envio
+        mensajes_enviados_dao.insert_sent_message(
+            subject=row["subject"],
+            body=row["body"],
+            timestamp=row["ts"],
+            message_type=row["message_type"],
+            recipients=row["recipients"],
+            success=ok,
+        )
+        # Evento SOLO a 'estado/email' (no retain)
+        bus.publish_email_event(row["subject"], ok, items=row.get("items"))
@@ -0,0 +1,215 @@
+"""
+Agrupamiento de alarmas en emails resumen.
+
+Las alarmas que se disparan dentro de una ventana de ALARM_DIGEST_WINDOW_SECONDS
+(contada desde la primera) se envian juntas: un solo email y un solo evento MQTT
+con el detalle por alarma. Una ventana con una sola alarma se envia tal cual.
+Tope de ALARM_EMAIL_MAX_PER_HOUR emails por hora: al alcanzarlo las alarmas
+quedan retenidas y se suman al proximo resumen (se difieren, no se descartan).
+Con store (alarm_outbox) cada alarma retenida se guarda en SQLite con status 'digest':
+un reinicio dentro de la ventana o con el tope alcanzado no la pierde (restore()), y el
+email final la reemplaza en la misma transaccion.
+El cuerpo del resumen lista alarmas hasta el largo maximo del outbox y cierra con
+"... y N alarmas mas"; el detalle completo va en el evento MQTT.
+"""
+
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.dao.dao_alarm_outbox import BODY_MAX, SUBJECT_MAX
+from src.logger import Logosaurio
+from src.utils import timebox
+
+
+def _digest_subject(items: List[Dict[str, Any]]) -> str:
+    """
+    asunto con hasta 3 alarmas, sin pasar SUBJECT_MAX (el resto se cuenta como "y N mas")
+    """
+    subjects = [it["subject"] for it in items]
+    prefix = f"{len(items)} alarmas: "
+    for shown in range(min(3, len(subjects)), 0, -1):
+        rest = len(subjects) - shown
+        subject = prefix + ", ".join(subjects[:shown]) + (f" y {rest} mas" if rest else "")
+        if len(subject) <= SUBJECT_MAX:
+            return subject
+    return f"{len(items)} alarmas"
+
+
+def _digest_body(items: List[Dict[str, Any]]) -> str:
+    """
+    cuerpo del resumen: lista alarmas mientras entren en BODY_MAX y cierra con las omitidas
+    """
+    header = f"Se registraron {len(items)} alarmas:\n"
+    # lugar reservado para la linea final de omitidas
+    budget = BODY_MAX - len(header) - 120
+    blocks: List[str] = []
+    for idx, it in enumerate(items, start=1):
+        block = f"\n{idx}) {it['subject']} ({timebox.format_local(it['ts'])})\n{it['body'].rstrip()}\n"
+        if len(block) > budget:
+            break
+        blocks.append(block)
+        budget -= len(block)
+    omitted = len(items) - len(blocks)
+    footer = f"\n... y {omitted} alarmas mas (detalle completo en el evento MQTT de email)." if omitted else ""
+    return header + "".join(blocks) + footer
+
+
+class AlarmDigest:
+    """
+    buffer de alarmas por destinatarios con ventana de agrupamiento y tope horario
+    """
+
+    def __init__(
+        self,
+        logger: Logosaurio,
+        delivery,
+        window_seconds: float,
+        max_per_hour: int,
+        clock=None,
+        store=None,
+    ):
+        """
+        clock: funcion de reloj monotono en segundos (por defecto time.monotonic; inyectable para replay)
+        store: outbox durable de alarmas retenidas (hold_digest/load_digest); None = solo memoria
+        """
+        self.logger = logger
+        self._clock = clock or time.monotonic
+        self.delivery = delivery
+        self.store = store
+        self.window = max(0.0, float(window_seconds))
+        self.max_per_hour = max(0, int(max_per_hour))
+        self._origen = "ALRM/DIGEST"
+        self._lock = threading.Lock()
+        # destinatarios -> {"opened": monotono, "items": [...]}
+        self._pending: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._sent: Deque[float] = deque()
+        self._deferred_logged = False
+
+    def add(self, subject: str, body: str, recipients: List[str], idem_key: str) -> None:
+        """
+        agrega una alarma a la ventana abierta de sus destinatarios (o abre una nueva)
+        """
+        item = {"subject": subject, "body": body, "idem_key": idem_key, "ts": timebox.utc_iso()}
+        key = tuple(recipients)
+        with self._lock:
+            if self._holds(key, idem_key):
+                return
+        if self.store is not None:
+            try:
+                if not self.store.hold_digest(idem_key, item["ts"], subject, body, "alarm_event", recipients):
+                    self.logger.log(f"Alarma ya encolada (idem_key={idem_key}), se omite duplicado.", origin=self._origen)
+                    return
+            except Exception as exc:
+                self.logger.log(f"ERROR guardando alarma retenida (queda solo en memoria): {exc}", origin=self._origen)
+        with self._lock:
+            if self._holds(key, idem_key):
+                return
+            self._pending.setdefault(key, {"opened": self._clock(), "items": []})["items"].append(item)
+        if self.window <= 0:
+            self.flush_due()
+
+    def _holds(self, key: Tuple[str, ...], idem_key: str) -> bool:
+        group = self._pending.get(key)
+        return group is not None and any(it["idem_key"] == idem_key for it in group["items"])
+
+    def restore(self) -> int:
+        """
+        recupera las alarmas retenidas antes de un reinicio; la ventana se reabre desde ahora
+        """
+        if self.store is None:
+            return 0
+        try:
+            rows = self.store.load_digest()
+        except Exception as exc:
+            self.logger.log(f"ERROR leyendo alarmas retenidas: {exc}", origin=self._origen)
+            return 0
+        restored = 0
+        with self._lock:
+            for row in rows:
+                key = tuple(row["recipients"])
+                if self._holds(key, row["idem_key"]):
+                    continue
+                group = self._pending.setdefault(key, {"opened": self._clock(), "items": []})
+                group["items"].append(
+                    {"subject": row["subject"], "body": row["body"], "idem_key": row["idem_key"], "ts": row["ts"]}
+                )
+                restored += 1
+        if restored:
+            self.logger.log(f"Alarmas retenidas restauradas: {restored}.", origin=self._origen)
+        return restored
+
+    def flush_due(self, force: bool = False) -> int:
+        """
+        envia las ventanas vencidas respetando el tope horario; retorna emails encolados
+        """
+        now = self._clock()
+        ready: List[Tuple[Tuple[str, ...], List[Dict[str, Any]]]] = []
+        with self._lock:
+            while self._sent and now - self._sent[0] >= 3600.0:
+                self._sent.popleft()
+            for key, group in list(self._pending.items()):
+                if not force and now - group["opened"] < self.window:
+                    continue
+                if self.max_per_hour and len(self._sent) >= self.max_per_hour:
+                    if not self._deferred_logged:
+                        self._deferred_logged = True
+                        self.logger.log(
+                            f"Tope de {self.max_per_hour} emails/hora alcanzado: "
+                            f"{len(group['items'])} alarmas quedan retenidas para el proximo resumen.",
+                            origin=self._origen,
+                        )
+                    continue
+                self._deferred_logged = False
+                self._sent.append(now)
+                ready.append((key, group["items"]))
+                del self._pending[key]
+
+        for key, items in ready:
+            self._send(list(key), items)
+        return len(ready)
+
+    def _submit(self, held: List[Dict[str, Any]], **kwargs) -> None:
+        """
+        encola el email; con store, reemplaza las alarmas retenidas en la misma transaccion
+        """
+        replaces: Optional[List[str]] = [it["idem_key"] for it in held] if self.store is not None else None
+        if replaces:
+            kwargs["replaces"] = replaces
+        self.delivery.submit(**kwargs)
+
+    def _send(self, recipients: List[str], items: List[Dict[str, Any]]) -> None:
+        if len(items) == 1:
+            item = items[0]
+            self._submit(
+                items,
+                idem_key=item["idem_key"],
+                timestamp=item["ts"],
+                subject=item["subject"],
+                body=item["body"],
+                recipients=recipients,
+            )
+            return
+
+        digest_key = hashlib.sha1("|".join(sorted(it["idem_key"] for it in items)).encode("utf-8")).hexdigest()
+        self.logger.log(f"Resumen de {len(items)} alarmas en un solo email.", origin=self._origen)
+        self._submit(
+            items,
+            idem_key=f"digest:{digest_key}",
+            timestamp=items[0]["ts"],
+            subject=_digest_subject(items),
+            body=_digest_body(items),
+            recipients=recipients,
+            items=[{"subject": it["subject"], "ts": it["ts"]} for it in items],
+        )
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(g["items"]) for g in self._pending.values())
+
+    def emails_last_hour(self) -> int:
+        now = self._clock()
+        with self._lock:
+            return sum(1 for t in self._sent if now - t < 3600.0)
@@ -1,73 +1,301 @@
 import os
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional
 from src.logger import Logosaurio
-from ..servicios.mqtt import mqtt_event_bus as bus
 from .categorias.notif_mw_global import NotifMwGlobal
 from .categorias.notif_mw_nodo import NotifMwNodo
 from .categorias.notif_modem import NotifModem
 from .categorias.notif_ge_emar import NotifGeEmar
 from .categorias.notif_proxmox import NotifProxmoxHost, NotifProxmoxVm
 from .categorias.notif_charito import NotifCharitoDaemon
-from src.dao.dao_mensajes_enviados import mensajes_enviados_dao
+from .debounce import SustainedConditionEngine
+from .notif_delivery import AlarmDeliveryWorker
+from .notif_digest import AlarmDigest
+from .notif_metrics import AlarmMetrics, TimedClient, alarm_metrics
+from .recorder import RecordingClient, SnapshotRecorder
+from src.dao.dao_alarm_outbox import alarm_outbox_dao
+from src.dao.dao_alarm_state import alarm_state_dao
 from src.servicios.email.mensagelo_client import MensageloClient
 from src.utils import timebox
 from src.web.clients.modbus_client import modbus_client
 from src.web.clients.group_elect_client import group_elect_client
-from src.web.clients.proxmox_client import ProxmoxClient
+from src.web.clients.router_client import router_client
+from src.servicios.proxmox.pve_poller import pve_poller
+from src.servicios.modbus.grd_state_table import GrdStateTable, grd_state_table
 from src.web.clients.charito_client import CharitoClient
 import config
 
 class NotifManager:
     """
     Orquestador de notificaciones:
-    - Evalua condiciones (global, nodo, modem)
-    - Encola email via mensagelo (asincronico, sin esperar entrega)
-    - Publica evento en MQTT
-    - Registra en DB local el intento de envio
+    - Evalua condiciones (global, nodo, modem, GE, Proxmox, charito); cada chequeo
+      puede correr por separado desde la agenda (NotifScheduler)
+    - Agrupa alarmas cercanas en un email resumen (AlarmDigest) con tope horario
+    - Encola el email en el outbox de alarmas (AlarmDeliveryWorker entrega a mensagelo,
+      publica el evento en MQTT y registra en DB local el resultado)
     """
-    def __init__(self, logger: Logosaurio, excluded_grd_ids: set, key):
+    def __init__(
+        self,
+        logger: Logosaurio,
+        excluded_grd_ids: set,
+        key,
+        clients: Optional[Dict[str, Any]] = None,
+        delivery=None,
+        recorder: Optional[SnapshotRecorder] = None,
+        persist_state: bool = True,
+        digest_clock=None,
+        rules_source=None,
+        metrics: Optional[AlarmMetrics] = None,
+    ):
+        """
+        clients: reemplazos opcionales de los clientes upstream
+                 {"modbus", "router", "ge", "proxmox", "charito"} (replay/benchmark)
+        delivery: reemplazo del worker de entrega (debe exponer submit(...))
+        recorder: si se indica, cada respuesta upstream se graba en JSONL para replay
+        persist_state: False para no leer/escribir alarm_state (replay)
+        rules_source: AlarmRulesSource con exclusiones y umbrales por GRD recargables en caliente
+        metrics: registro de tiempos y contadores (por defecto el global alarm_metrics)
+        """
         self.logger = logger
+        self.persist_state = persist_state
+        clients = dict(clients or {})
+        self.modbus_client = clients.get("modbus", modbus_client)
+        self.router_client = clients.get("router", router_client)
+        self.ge_client = clients.get("ge", group_elect_client)
+        self.proxmox_source = clients.get("proxmox", pve_poller)
+        self.charito_client = clients.get("charito") or CharitoClient(config.CHARITO_API_BASE)
+        if recorder is not None:
+            self.modbus_client = RecordingClient(self.modbus_client, recorder, "modbus")
+            self.router_client = RecordingClient(self.router_client, recorder, "router")
+            self.ge_client = RecordingClient(self.ge_client, recorder, "ge")
+            self.proxmox_source = RecordingClient(self.proxmox_source, recorder, "proxmox")
+            self.charito_client = RecordingClient(self.charito_client, recorder, "charito")
+        self.metrics = metrics or alarm_metrics
+        # la consulta del resumen se mide (y graba) dentro de la tabla: solo cuenta consultas reales
+        summary_client = TimedClient(self.modbus_client, self.metrics, "modbus")
+        # tabla de estados por GRD: la compartida con KPI/RPC, o una propia si se reemplazo el cliente
+        if "modbus" not in clients:
+            grd_state_table.use_client(summary_client)
+            self.grd_table = grd_state_table
+        else:
+            self.grd_table = GrdStateTable(summary_client, ttl_seconds=0)
+        self.router_client = TimedClient(self.router_client, self.metrics, "router")
+        self.ge_client = TimedClient(self.ge_client, self.metrics, "ge")
+        self.charito_client = TimedClient(self.charito_client, self.metrics, "charito")
+
         self.global_notifier = NotifMwGlobal(logger)
         self.nodo_notifier = NotifMwNodo(logger, excluded_grd_ids)
-        self.modem_notifier = NotifModem(logger)
-        self.ge_notifier = NotifGeEmar(logger, group_elect_client, min_duration_seconds=60)
+        self.rules_source = rules_source
+        if rules_source is not None:
+            self.nodo_notifier.apply_rules(rules_source.current())
+        self.modem_notifier = NotifModem(logger, self.router_client)
+        self.ge_notifier = NotifGeEmar(logger, self.ge_client, min_duration_seconds=60)
         self.proxmox_host_notifier = NotifProxmoxHost(logger)
         self.proxmox_vm_notifier = NotifProxmoxVm(logger)
         self.charito_notifier = NotifCharitoDaemon(logger)
-        self.proxmox_client = ProxmoxClient(config.PVE_API_BASE)
-        self.charito_client = CharitoClient(config.CHARITO_API_BASE)
-        self.mail_client = MensageloClient(
-            base_url=config.MENSAGELO_BASE_URL,
-            api_key=key,
-            timeout_seconds=int(config.MENSAGELO_TIMEOUT_SECONDS),
-            max_retries=int(config.MENSAGELO_MAX_RETRIES),
-            backoff_initial=float(config.MENSAGELO_BACKOFF_INITIAL),
-            backoff_max=float(config.MENSAGELO_BACKOFF_MAX)
+        if delivery is None:
+            self.mail_client = MensageloClient(
+                base_url=config.MENSAGELO_BASE_URL,
+                api_key=key,
+                timeout_seconds=int(config.MENSAGELO_TIMEOUT_SECONDS),
+                max_retries=int(config.MENSAGELO_MAX_RETRIES),
+                backoff_initial=float(config.MENSAGELO_BACKOFF_INITIAL),
+                backoff_max=float(config.MENSAGELO_BACKOFF_MAX)
+                )
+            delivery = AlarmDeliveryWorker(
+                logger,
+                self.mail_client,
+                max_attempts=config.ALARM_DELIVERY_MAX_ATTEMPTS,
+                backoff_initial=float(config.MENSAGELO_BACKOFF_INITIAL),
+                backoff_max=float(config.MENSAGELO_BACKOFF_MAX),
+                poll_seconds=config.ALARM_DELIVERY_POLL_SECONDS,
+                batch_size=config.ALARM_DELIVERY_BATCH,
+                subject_prefix=config.ALARM_EMAIL_SUBJECT_PREFIX,
             )
+        self.delivery = delivery
+        for name, engine in self._engines().items():
+            self.metrics.register_counters(name, engine)
+        self.digest = AlarmDigest(
+            logger,
+            self.delivery,
+            window_seconds=config.ALARM_DIGEST_WINDOW_SECONDS,
+            max_per_hour=config.ALARM_EMAIL_MAX_PER_HOUR,
+            clock=digest_clock,
+            store=alarm_outbox_dao if persist_state else None,
+        )
 
     def run_alarm_processing(self):
+        """
+        Ejecuta todos los chequeos en secuencia (un ciclo completo).
+        """
+        self.run_grd_checks()
+        self.run_modem_check()
+        self.run_ge_check()
+        self.run_proxmox_checks()
+        self.run_charito_checks()
+        self.checkpoint_state()
+        self.digest.flush_due()
+
+    def refresh_rules(self) -> None:
+        """
+        Relee la lista de reglas si cambio en disco y publica la nueva version al notificador de nodos.
+        """
+        if self.rules_source is None:
+            return
+        self.rules_source.check()
+        self.nodo_notifier.apply_rules(self.rules_source.current())
+
+    def schedule_jobs(self, scheduler, schedule: dict) -> None:
+        """
+        Registra cada chequeo en la agenda con su periodo, jitter y timeout.
+        schedule: {"grd": {"period": s, "jitter": s, "timeout": s}, ...}
+        """
+        jobs = {
+            "grd": (self.run_grd_checks, ("global", "nodo")),
+            "modem": (self.run_modem_check, ("modem",)),
+            "ge": (self.run_ge_check, ("ge",)),
+            "proxmox": (self.run_proxmox_checks, ("pve_host", "pve_vm")),
+            "charito": (self.run_charito_checks, ("charito",)),
+            "digest": (self.digest.flush_due, ()),
+        }
+        if self.rules_source is not None:
+            jobs["reglas"] = (self.refresh_rules, ())
+        for name, (func, engines) in jobs.items():
+            spec = schedule.get(name) or {}
+            scheduler.add_job(
+                name,
+                self._with_checkpoint(name, func, engines),
+                period=spec.get("period", config.ALARM_CHECK_INTERVAL_SECONDS),
+                jitter=spec.get("jitter", 0),
+                timeout=spec.get("timeout", 0),
+            )
+
+    def _with_checkpoint(self, name: str, func, engines):
+        """
+        ejecuta el chequeo (medido como fase 'job') y luego persiste los cambios de estado de sus notificadores
+        """
+        def _job():
+            try:
+                with self.metrics.timed("job", name):
+                    func()
+            finally:
+                self.checkpoint_state(engines)
+        return _job
+
+    # ----------------- persistencia de estado -----------------
+
+    def _engines(self) -> Dict[str, SustainedConditionEngine]:
+        return {
+            "global": self.global_notifier.engine,
+            "nodo": self.nodo_notifier.engine,
+            "modem": self.modem_notifier.engine,
+            "ge": self.ge_notifier.engine,
+            "pve_host": self.proxmox_host_notifier.engine,
+            "pve_vm": self.proxmox_vm_notifier.engine,
+            "charito": self.charito_notifier.engine,
+        }
+
+    def checkpoint_state(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Guarda en SQLite solo las claves modificadas (una transaccion por llamada).
+        """
+        if not self.persist_state:
+            return
+        engines = self._engines()
+        upserts, deletes = [], []
+        for name in (names if names is not None else engines.keys()):
+            for key, state in engines[name].drain_dirty().items():
+                if state is None:
+                    deletes.append((name, key))
+                else:
+                    upserts.append((name, key, timebox.utc_iso(state.start_time), state.triggered, state.meta))
+        try:
+            alarm_state_dao.apply_changes(upserts, deletes)
+        except Exception as exc:
+            self.logger.log(f"ERROR guardando estado de alarmas: {exc}", origin="ALRM/STATE")
+
+    def restore_state(self) -> int:
+        """
+        Recupera el estado guardado (conteos en curso y alarmas ya disparadas) tras un reinicio,
+        junto con las alarmas que esperaban en la ventana de resumen.
+        Retorna la cantidad de claves restauradas.
+        """
+        if not self.persist_state:
+            return 0
+        self.digest.restore()
+        engines = self._engines()
+        restored = 0
         try:
-            summary = modbus_client.get_summary()
-        except Exception:
-            summary = {"summary": {"porcentaje": 0}, "disconnected": []}
+            rows = alarm_state_dao.load_all()
+        except Exception as exc:
+            self.logger.log(f"ERROR leyendo estado de alarmas: {exc}", origin="ALRM/STATE")
+            return 0
+        for row in rows:
+            engine = engines.get(row["notifier"])
+            if engine is None:
+                continue
+            try:
+                start_time = timebox.parse(row["start_time"])
+            except Exception:
+                continue
+            engine.restore(row["key"], start_time, row["triggered"], row["meta"])
+            restored += 1
+        if restored:
+            self.logger.log(f"Estado de alarmas restaurado: {restored} claves.", origin="ALRM/STATE")
+        return restored
+
+    # ----------------- chequeos -----------------
+
+    def run_grd_checks(self):
+        """
+        Conectividad global y por GRD desde la tabla de estados (mismo porcentaje que KPI y RPC).
+        """
+        summary = self.grd_table.snapshot()
         connection_percentage = summary.get("summary", {}).get("porcentaje", 0)
         disconnected = summary.get("disconnected", [])
         self._process_alarms(connection_percentage, disconnected)
+
+    def run_modem_check(self):
+        with self.metrics.timed("evaluate", "modem"):
+            fired = self.modem_notifier.evaluate_condition()
+        if fired:
+            subject = "Router telef. puerto de escucha cerrado"
+            body = (
+                f"El modem conexion de exemys no puede ser alcanzado hace mas de "
+                f"{config.ALARM_MIN_SUSTAINED_DURATION_MINUTES} minutos."
+            )
+            idem = self._idem_key("modem", NotifModem.KEY, self.modem_notifier.engine)
+            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT, idem)
+
+    def run_ge_check(self):
+        with self.metrics.timed("evaluate", "ge"):
+            fired = self.ge_notifier.evaluate_condition()
+        if fired:
+            subject = "edif. estivariz GE en marcha"
+            body = (
+                "El grupo electrogeno de edif. Estivariz se encuentra en marcha por mas de 1 minuto."
+            )
+            idem = self._idem_key("ge", NotifGeEmar.KEY, self.ge_notifier.engine)
+            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT, idem)
+
+    def run_proxmox_checks(self):
         self._process_proxmox_alarms(self._fetch_proxmox_snapshot())
+
+    def run_charito_checks(self):
         self._process_charito_alarms(self._fetch_charito_snapshot())
 
     def _fetch_proxmox_snapshot(self) -> dict:
         """
-        Consulta directamente el servicio pve-service para obtener el estado actual del hipervisor.
+        Estado del hipervisor tomado del poller compartido (sin consultar pve-service por ciclo).
+        Si la ultima consulta del poller fallo retorna {"error": ...}.
         """
         try:
-            snapshot = self.proxmox_client.get_state()
-            if isinstance(snapshot, dict):
-                return snapshot
-            self.logger.log("Snapshot Proxmox invalido (no dict).", origin="ALRM/PVE")
+            with self.metrics.timed("fetch", "proxmox"):
+                if self.proxmox_source is pve_poller and not pve_poller.is_running():
+                    pve_poller.poll_once()
+                return self.proxmox_source.get_snapshot()
         except Exception as exc:
-            self.logger.log(f"ERROR consultando estado Proxmox: {exc}", origin="ALRM/PVE")
-        return {}
+            self.logger.log(f"ERROR obteniendo estado Proxmox: {exc}", origin="ALRM/PVE")
+            return {"error": str(exc)}
 
     def _fetch_charito_snapshot(self) -> dict:
         """
@@ -83,46 +311,50 @@ class NotifManager:
         return {}
 
     def _process_alarms(self, current_percentage: float, disconnected_grds: list):
-        if self.global_notifier.evaluate_condition(current_percentage):
+        with self.metrics.timed("evaluate", "global"):
+            global_fired = self.global_notifier.evaluate_condition(current_percentage)
+        if global_fired:
             subject = "Middleware sin conexion"
             body = (
                 f"Conectividad global exemys ha caido por debajo del "
                 f"{config.GLOBAL_THRESHOLD_ROJO}% ({current_percentage:.2f}%) por mas de "
                 f"{config.ALARM_MIN_SUSTAINED_DURATION_MINUTES} minutos.\n"
             )
-            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT)
+            idem = self._idem_key("global", NotifMwGlobal.KEY, self.global_notifier.engine)
+            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT, idem)
 
-        grds_to_alert = self.nodo_notifier.evaluate_condition(current_percentage, disconnected_grds)
+        with self.metrics.timed("evaluate", "nodo"):
+            grds_to_alert = self.nodo_notifier.evaluate_condition(current_percentage, disconnected_grds)
         for grd_info in grds_to_alert:
+            if grd_info.get('flapping'):
+                subject = f"{grd_info['description']} con conexion intermitente"
+                body = (
+                    f"GRD {grd_info['description']} cambio de estado {grd_info['changes']} veces en los ultimos "
+                    f"{config.ALARM_FLAP_WINDOW_SECONDS // 60} minutos.\n"
+                    f"Se suspenden sus alarmas individuales hasta que se estabilice.\n"
+                )
+                idem = f"nodo-flap:{grd_info['id_grd']}:{timebox.utc_iso()}"
+                self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT, idem)
+                continue
             subject = f"{grd_info['description']} sin conexion"
+            # umbral propio del GRD (regla minutos=) o el general
+            minutes = self.nodo_notifier.engine.duration_for(grd_info['id_grd']).total_seconds() / 60
             body = (
                 f"GRD {grd_info['description']} sin conexion por mas de "
-                f"{config.ALARM_MIN_SUSTAINED_DURATION_MINUTES} minutos, "
+                f"{minutes:g} minutos, "
                 f"con conectividad global por encima del "
                 f"{config.GLOBAL_THRESHOLD_ROJO}% ({current_percentage:.2f}%).\n"
             )
-            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT)
-
-        if self.modem_notifier.evaluate_condition():
-            subject = "Router telef. puerto de escucha cerrado"
-            body = (
-                f"El modem conexion de exemys no puede ser alcanzado hace mas de "
-                f"{config.ALARM_MIN_SUSTAINED_DURATION_MINUTES} minutos."
-            )
-            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT)
-
-        if self.ge_notifier.evaluate_condition():
-            subject = "edif. estivariz GE en marcha"
-            body = (
-                "El grupo electrogeno de edif. Estivariz se encuentra en marcha por mas de 1 minuto."
-            )
-            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT)
+            idem = self._idem_key("nodo", grd_info['id_grd'], self.nodo_notifier.engine)
+            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT, idem)
 
     def _process_proxmox_alarms(self, snapshot):
         if not isinstance(snapshot, dict):
             snapshot = {}
 
-        if self.proxmox_host_notifier.evaluate_condition(snapshot):
+        with self.metrics.timed("evaluate", "pve_host"):
+            host_fired = self.proxmox_host_notifier.evaluate_condition(snapshot)
+        if host_fired:
             detail = self.proxmox_host_notifier.get_last_error() or ""
             body_lines = [
                 f"El hipervisor Proxmox no responde desde hace al menos {config.ALARM_MIN_SUSTAINED_DURATION_MINUTES} minutos."
@@ -130,26 +362,40 @@ class NotifManager:
             if detail:
                 body_lines.append(f"Detalle detectado: {detail}")
             subject = "Hipervisor Proxmox no responde"
-            self._send_notification_and_log(subject, "\n".join(body_lines), config.ALARM_EMAIL_RECIPIENT)
+            idem = self._idem_key("pve_host", NotifProxmoxHost.KEY, self.proxmox_host_notifier.engine)
+            self._send_notification_and_log(subject, "\n".join(body_lines), config.ALARM_EMAIL_RECIPIENT, idem)
 
         allow_vm_processing = self.proxmox_host_notifier.allow_vm_processing()
-        vm_alerts = self.proxmox_vm_notifier.evaluate_condition(snapshot, allow_processing=allow_vm_processing)
+        with self.metrics.timed("evaluate", "pve_vm"):
+            vm_alerts = self.proxmox_vm_notifier.evaluate_condition(snapshot, allow_processing=allow_vm_processing)
         for vm in vm_alerts:
             subject = f"{vm['name']} detenida en Proxmox"
             body = (
                 f"{vm['name']} (ID {vm['vmid']}) presenta estado '{vm['status_display']}' "
                 f"desde hace al menos {config.ALARM_MIN_SUSTAINED_DURATION_MINUTES} minutos."
             )
-            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT)
+            idem = self._idem_key("pve_vm", vm['vmid'], self.proxmox_vm_notifier.engine)
+            self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT, idem)
 
     def _process_charito_alarms(self, snapshot):
         if not isinstance(snapshot, dict):
             snapshot = {}
 
-        daemon_alerts = self.charito_notifier.evaluate_condition(snapshot)
+        with self.metrics.timed("evaluate", "charito"):
+            daemon_alerts = self.charito_notifier.evaluate_condition(snapshot)
         for daemon in daemon_alerts:
             alias = daemon.get("alias") or daemon.get("instance_id") or "charo-daemon"
             instance_id = daemon.get("instance_id") or alias
+            if daemon.get("flapping"):
+                subject = f"charo-daemon {alias} intermitente"
+                body = (
+                    f"El demonio {alias} (ID {instance_id}) cambio de estado {daemon.get('changes')} veces en los "
+                    f"ultimos {config.ALARM_FLAP_WINDOW_SECONDS // 60} minutos.\n"
+                    f"Se suspenden sus alarmas individuales hasta que se estabilice."
+                )
+                idem = f"charito-flap:{instance_id}:{timebox.utc_iso()}"
+                self._send_notification_and_log(subject, body, config.ALARM_EMAIL_RECIPIENT, idem)
+                continue
             status_display = daemon.get("status_display", "OFFLINE")
             received_at = daemon.get("received_at")
             subject = f"charo-daemon {alias} offline"
@@ -159,45 +405,28 @@ class NotifManager:
             ]
             if received_at:
                 body_lines.append(f"Ultima actualizacion registrada: {received_at}")
-            self._send_notification_and_log(subject, "\n".join(body_lines), config.ALARM_EMAIL_RECIPIENT)
+            idem = self._idem_key("charito", daemon.get("instance_id"), self.charito_notifier.engine)
+            self._send_notification_and_log(subject, "\n".join(body_lines), config.ALARM_EMAIL_RECIPIENT, idem)
+
+    def _idem_key(self, notifier: str, key, engine: SustainedConditionEngine) -> str:
+        """
+        clave de idempotencia de una alarma: notificador + clave + inicio de la condicion
+        """
+        state = engine.get(key)
+        start = timebox.utc_iso(state.start_time) if state is not None else timebox.utc_iso()
+        return f"{notifier}:{key}:{start}"
 
-    def _send_notification_and_log(self, subject: str, body: str, recipient: List[str]):
+    def _send_notification_and_log(self, subject: str, body: str, recipient: List[str], idem_key: Optional[str] = None):
         """
-        Encola el email en mensagelo y registra el intento en DB local.
-        'ok' significa que mensagelo acepto el pedido (no que el SMTP lo haya entregado).
+        Suma la alarma a la ventana de resumen; al cerrar la ventana se encola en el outbox
+        y el worker de entrega reintenta, registra en DB local y publica el evento MQTT.
         """
-        ok = False
-        msg = ""
         try:
-            ok, msg = self.mail_client.enqueue_email(
-                recipients=recipient,
-                subject=f"{config.ALARM_EMAIL_SUBJECT_PREFIX}{subject}",
+            self.digest.add(
+                subject=subject,
                 body=body,
-                message_type="alarm_event",
+                recipients=recipient,
+                idem_key=idem_key or f"{subject}:{timebox.utc_iso()}",
             )
-            if ok:
-                self.logger.log(
-                    f"ALARMA DISPARADA: {subject}. Pedido aceptado por mensagelo. Destinatarios: {', '.join(recipient)}",
-                    origin="ALRM/EXP",
-                )
-            else:
-                self.logger.log(
-                    f"ERROR mensagelo no acepto el pedido para: {subject}. Detalle: {msg}",
-                    origin="ALRM/EXP",
-                )
         except Exception as e:
             self.logger.log(f"ERROR al encolar email de alarma: {e}", origin="ALRM/EXP")
-
-        # Registro local en DB (usa RLock y get_db_connection del dao_base)
-        mensajes_enviados_dao.insert_sent_message(
-            subject=subject,
-            body=body,
-            timestamp=timebox.utc_iso(),
-            message_type="alarm_event",
-            recipients=recipient,
-            success=ok
-        )
-
-        # Evento SOLO a 'estado/email' (no retain)
-        bus.publish_email_event(subject, ok)
-
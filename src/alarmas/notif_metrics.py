@@ -0,0 +1,180 @@
+"""
+Instrumentacion del pipeline de alarmas.
+
+Tiempos por fase, cada uno en un histograma de buckets fijos en memoria:
+- fetch:    consulta a cada upstream (modbus, router, ge, proxmox, charito)
+- evaluate: evaluacion de cada notificador (en modem y ge incluye su consulta)
+- deliver:  entrega de cada email a mensagelo
+- job:      ejecucion completa de cada chequeo de la agenda
+Costo por observacion: una busqueda binaria y tres sumas bajo un lock.
+Los totales de alarmas disparadas/resueltas salen de los contadores de cada motor de debounce.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# limites superiores de los buckets en ms (el ultimo bucket es +inf)
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """
+    histograma de latencias con buckets fijos; los percentiles se estiman por bucket
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total_ms", "max_ms", "last_ms", "errors")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.errors = 0
+
+    def observe(self, ms: float, ok: bool = True) -> None:
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """
+        limite superior del bucket que contiene el percentil q (0..1), acotado al maximo observado
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return min(float(self.bounds[idx]), self.max_ms) if idx < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "last_ms": round(self.last_ms, 2),
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": round(self.percentile(0.50), 2),
+            "p95_ms": round(self.percentile(0.95), 2),
+            "p99_ms": round(self.percentile(0.99), 2),
+            "buckets": [
+                {"le": bound, "count": n}
+                for bound, n in zip(list(self.bounds) + ["+inf"], self.counts)
+            ],
+        }
+
+
+class AlarmMetrics:
+    """
+    registro de histogramas por (fase, nombre) y fuentes de contadores
+    """
+
+    PHASES = ("fetch", "evaluate", "deliver", "job")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self._bounds = tuple(bounds)
+        self._lock = threading.Lock()
+        self._hist: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._counter_sources: Dict[str, Any] = {}
+        self._started = time.time()
+
+    def observe(self, phase: str, name: str, ms: float, ok: bool = True) -> None:
+        with self._lock:
+            hist = self._hist.get((phase, name))
+            if hist is None:
+                hist = self._hist[(phase, name)] = LatencyHistogram(self._bounds)
+            hist.observe(ms, ok)
+
+    @contextmanager
+    def timed(self, phase: str, name: str) -> Iterator[None]:
+        """
+        mide el bloque; si levanta excepcion se cuenta como error y se propaga
+        """
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.observe(phase, name, (time.perf_counter() - started) * 1000.0, ok)
+
+    def register_counters(self, name: str, source: Any) -> None:
+        """
+        source: objeto con atributo 'counters' (dict); se lee al armar el snapshot
+        """
+        self._counter_sources[name] = source
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            phases: Dict[str, Dict[str, Any]] = {phase: {} for phase in self.PHASES}
+            for (phase, name), hist in sorted(self._hist.items()):
+                phases.setdefault(phase, {})[name] = hist.to_dict()
+        counters = {
+            name: dict(getattr(source, "counters", {}) or {})
+            for name, source in sorted(self._counter_sources.items())
+        }
+        totals: Dict[str, int] = {}
+        for values in counters.values():
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0) + int(value)
+        return {
+            "uptime_seconds": round(time.time() - self._started, 1),
+            "phases": phases,
+            "counters": counters,
+            "totals": totals,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+
+
+class TimedClient:
+    """
+    proxy de un cliente upstream: delega cada metodo y registra su duracion en la fase fetch
+    """
+
+    def __init__(self, inner: Any, metrics: AlarmMetrics, source: str):
+        self._inner = inner
+        self._metrics = metrics
+        self._source = source
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._inner, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def _call(*args, **kwargs):
+            with self._metrics.timed("fetch", self._source):
+                return attr(*args, **kwargs)
+
+        return _call
+
+
+def summarize(snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    aplana el snapshot a filas (fase, nombre, percentiles) para tablas
+    """
+    rows: List[Dict[str, Any]] = []
+    for phase, items in snapshot.get("phases", {}).items():
+        for name, data in items.items():
+            row = {"phase": phase, "name": name}
+            row.update({k: v for k, v in data.items() if k != "buckets"})
+            rows.append(row)
+    return rows
+
+
+alarm_metrics = AlarmMetrics()
@@ -0,0 +1,211 @@
+"""
+Agenda de chequeos de alarmas.
+
+- Cada trabajo declara periodo, jitter y timeout.
+- Las ejecuciones se agendan sobre reloj monotono: el proximo turno se calcula desde
+  el turno anterior (no desde que termino), por lo que no hay deriva.
+- Cada trabajo corre en su propio hilo; si la ejecucion anterior sigue en curso
+  el turno se omite (sin solapamiento) y se cuenta como overrun.
+- Una ejecucion que supera el timeout se marca como excedida (no se interrumpe).
+"""
+
+import heapq
+import random
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.logger import Logosaurio
+from src.utils import timebox
+
+
+class _Job:
+    """
+    estado y contadores de un trabajo agendado
+    """
+
+    def __init__(self, name: str, func: Callable[[], None], period: float, jitter: float, timeout: float):
+        self.name = name
+        self.func = func
+        self.period = max(1.0, float(period))
+        self.jitter = max(0.0, min(float(jitter), self.period / 2))
+        self.timeout = max(0.0, float(timeout))
+        self.base_due = 0.0          # turno teorico (sin jitter)
+        self.next_run = 0.0          # turno efectivo (con jitter)
+        self.running = False
+        self.started_mono: Optional[float] = None
+        self.timeout_flagged = False
+        self.skip_logged = False
+        self.stats: Dict[str, Any] = {
+            "runs": 0,
+            "errors": 0,
+            "skipped": 0,
+            "missed": 0,
+            "timeouts": 0,
+            "last_duration_ms": None,
+            "max_duration_ms": 0.0,
+            "last_start": None,
+            "last_error": None,
+        }
+
+
+class NotifScheduler:
+    """
+    agenda de trabajos periodicos con heap de vencimientos
+    """
+
+    def __init__(self, logger: Logosaurio):
+        self.logger = logger
+        self._origen = "ALRM/SCHED"
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, _Job] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, func: Callable[[], None], period: float, jitter: float = 0.0, timeout: float = 0.0) -> None:
+        """
+        registra un trabajo; el primer turno es inmediato (mas jitter)
+        """
+        job = _Job(name, func, period, jitter, timeout)
+        now = time.monotonic()
+        with self._cond:
+            job.base_due = now
+            job.next_run = now + self._jitter(job)
+            self._jobs[name] = job
+            heapq.heappush(self._heap, (job.next_run, name))
+            self._cond.notify()
+
+    @staticmethod
+    def _jitter(job: _Job) -> float:
+        return random.uniform(0.0, job.jitter) if job.jitter > 0 else 0.0
+
+    def start(self) -> None:
+        """
+        lanza el hilo de agenda (idempotente)
+        """
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="notif-scheduler", daemon=True)
+            self._thread.start()
+        self.logger.log(f"Agenda de alarmas iniciada con {len(self._jobs)} trabajos.", origin=self._origen)
+
+    # ----------------- ciclo -----------------
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    self._check_timeouts_locked(now)
+                    if self._heap and self._heap[0][0] <= now:
+                        _, name = heapq.heappop(self._heap)
+                        job = self._jobs.get(name)
+                        if job is not None:
+                            break
+                        continue
+                    wait = self._heap[0][0] - now if self._heap else None
+                    # despertar tambien para revisar timeouts de trabajos en curso
+                    wait = self._timeout_wait_locked(now, wait)
+                    self._cond.wait(wait)
+
+                launch = not job.running
+                log_skip = False
+                if launch:
+                    job.running = True
+                    job.started_mono = now
+                    job.timeout_flagged = False
+                    job.skip_logged = False
+                else:
+                    job.stats["skipped"] += 1
+                    # un aviso por ejecucion trabada, no uno por turno omitido
+                    log_skip = not job.skip_logged
+                    job.skip_logged = True
+                self._reschedule_locked(job, now)
+
+            if launch:
+                threading.Thread(target=self._run_job, args=(job,), name=f"alrm-{job.name}", daemon=True).start()
+            elif log_skip:
+                self.logger.log(
+                    f"Chequeo '{job.name}' omitido: la ejecucion anterior sigue en curso.",
+                    origin=self._origen,
+                )
+
+    def _reschedule_locked(self, job: _Job, now: float) -> None:
+        job.base_due += job.period
+        if job.base_due <= now:
+            # turnos perdidos (hilo demorado o trabajo largo): se saltean sin acumular
+            missed = int((now - job.base_due) // job.period) + 1
+            job.stats["missed"] += missed
+            job.base_due += missed * job.period
+        job.next_run = job.base_due + self._jitter(job)
+        heapq.heappush(self._heap, (job.next_run, job.name))
+
+    def _timeout_wait_locked(self, now: float, wait: Optional[float]) -> Optional[float]:
+        for job in self._jobs.values():
+            if job.running and job.timeout > 0 and not job.timeout_flagged and job.started_mono is not None:
+                remaining = max(0.0, job.started_mono + job.timeout - now)
+                wait = remaining if wait is None else min(wait, remaining)
+        return wait
+
+    def _check_timeouts_locked(self, now: float) -> None:
+        for job in self._jobs.values():
+            if not job.running or job.timeout <= 0 or job.timeout_flagged or job.started_mono is None:
+                continue
+            if now - job.started_mono >= job.timeout:
+                job.timeout_flagged = True
+                job.stats["timeouts"] += 1
+                self.logger.log(
+                    f"Chequeo '{job.name}' excedio el timeout de {job.timeout:g}s.",
+                    origin=self._origen,
+                )
+
+    def _run_job(self, job: _Job) -> None:
+        started = time.monotonic()
+        started_utc = timebox.utc_iso()
+        error: Optional[str] = None
+        try:
+            job.func()
+        except Exception as exc:
+            error = str(exc)
+            self.logger.log(f"ERROR en chequeo '{job.name}': {exc}", origin=self._origen)
+        duration_ms = (time.monotonic() - started) * 1000.0
+
+        with self._cond:
+            st = job.stats
+            st["runs"] += 1
+            st["last_duration_ms"] = round(duration_ms, 2)
+            st["max_duration_ms"] = round(max(st["max_duration_ms"], duration_ms), 2)
+            st["last_start"] = started_utc
+            if error is not None:
+                st["errors"] += 1
+                st["last_error"] = error
+            job.running = False
+            job.started_mono = None
+            self._cond.notify()
+
+    # ----------------- estado -----------------
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        retorna por trabajo: periodo, proximo turno, en curso y contadores de overrun
+        """
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._cond:
+            now_mono = time.monotonic()
+            now_utc = timebox.utc_now()
+            for name, job in self._jobs.items():
+                next_in = max(0.0, job.next_run - now_mono)
+                out[name] = {
+                    "period_s": job.period,
+                    "jitter_s": job.jitter,
+                    "timeout_s": job.timeout,
+                    "running": job.running,
+                    "running_for_s": round(now_mono - job.started_mono, 2) if job.running and job.started_mono else None,
+                    "next_run_in_s": round(next_in, 2),
+                    "next_run": timebox.utc_iso(now_utc + timedelta(seconds=next_in)),
+                    "overruns": job.stats["skipped"] + job.stats["timeouts"],
+                    **job.stats,
+                }
+        return out
@@ -0,0 +1,71 @@
+"""
+Grabacion de respuestas upstream de las alarmas para replay offline.
+
+Cada llamada a un cliente envuelto (modbus, router, GE, Proxmox, charito) se graba
+como una linea JSONL: {"ts": UTC ISO, "source": "...", "method": "...", "data": ... | "error": "..."}.
+El archivo se rota a <path>.1 al superar max_bytes.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Optional
+
+from src.utils import timebox
+
+
+class SnapshotRecorder:
+    """
+    escritor JSONL thread-safe con rotacion simple
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max(1024, int(max_bytes))
+        self._lock = threading.Lock()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+
+    def record(self, source: str, method: str, data: Any = None, error: Optional[str] = None) -> None:
+        line = {"ts": timebox.utc_iso(), "source": source, "method": method}
+        if error is not None:
+            line["error"] = error
+        else:
+            line["data"] = data
+        encoded = json.dumps(line, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write(encoded)
+            except OSError:
+                # la grabacion es auxiliar: nunca interrumpe el chequeo de alarmas
+                pass
+
+
+class RecordingClient:
+    """
+    proxy de un cliente: delega cada metodo y graba la respuesta (o el error)
+    """
+
+    def __init__(self, inner: Any, recorder: SnapshotRecorder, source: str):
+        self._inner = inner
+        self._recorder = recorder
+        self._source = source
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._inner, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def _call(*args, **kwargs):
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as exc:
+                self._recorder.record(self._source, name, error=str(exc))
+                raise
+            self._recorder.record(self._source, name, data=result)
+            return result
+
+        return _call
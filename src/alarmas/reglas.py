@@ -0,0 +1,135 @@
+"""
+Reglas de alarmas recargables en caliente (grd_exclusion_list.txt).
+
+Formato por linea (lineas vacias y '#' se ignoran):
+    <id_grd>                 excluye el GRD de las alarmas individuales
+    <id_grd> minutos=<n>     duracion sostenida propia del GRD (en lugar de ALARM_MIN_SUSTAINED_DURATION_MINUTES)
+
+El archivo se vigila por mtime/tamano desde la agenda de alarmas (sin hilos propios).
+Ante un cambio se re-parsea completo y se publica una nueva version inmutable;
+si el parseo falla se conserva la version anterior.
+"""
+
+import os
+import threading
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from src.logger import Logosaurio
+from src.utils import timebox
+
+
+class AlarmRules:
+    """
+    version inmutable de las reglas (se reemplaza completa, nunca se modifica)
+    """
+
+    __slots__ = ("version", "loaded_at", "excluded", "thresholds_minutes", "errors")
+
+    def __init__(self, version: int, excluded: FrozenSet[int], thresholds_minutes: Dict[int, float], errors: Tuple[str, ...] = ()):
+        self.version = version
+        self.loaded_at = timebox.utc_iso()
+        self.excluded = excluded
+        self.thresholds_minutes = dict(thresholds_minutes)
+        self.errors = errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "excluded": sorted(self.excluded),
+            "thresholds_minutes": {str(k): v for k, v in sorted(self.thresholds_minutes.items())},
+            "errors": list(self.errors),
+        }
+
+
+def parse_rules(text: str) -> Tuple[FrozenSet[int], Dict[int, float], Tuple[str, ...]]:
+    """
+    parsea el contenido del archivo; retorna (excluidos, umbrales por GRD, lineas invalidas)
+    """
+    excluded = set()
+    thresholds: Dict[int, float] = {}
+    errors = []
+    for raw_line in text.splitlines():
+        line = raw_line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        try:
+            grd_id = int(parts[0])
+            if len(parts) == 1:
+                excluded.add(grd_id)
+                continue
+            options = dict(part.split("=", 1) for part in parts[1:])
+            minutes = float(options.pop("minutos"))
+            if options or minutes <= 0:
+                raise ValueError(line)
+            thresholds[grd_id] = minutes
+        except (ValueError, KeyError):
+            errors.append(raw_line.strip())
+    return frozenset(excluded), thresholds, tuple(errors)
+
+
+class AlarmRulesSource:
+    """
+    fuente vigilada de reglas: check() re-carga solo si cambio el archivo
+    """
+
+    def __init__(self, path: str, logger: Logosaurio):
+        self.path = path
+        self.logger = logger
+        self._origen = "ALRM/REGLAS"
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[float, int]] = None
+        self._current = AlarmRules(0, frozenset(), {})
+
+    def current(self) -> AlarmRules:
+        return self._current
+
+    def _stat(self) -> Optional[Tuple[float, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime, st.st_size)
+
+    def check(self) -> bool:
+        """
+        compara mtime/tamano con la version cargada; si cambio re-parsea y publica una nueva version.
+        retorna True si hubo cambio de version
+        """
+        with self._lock:
+            signature = self._stat()
+            if signature == self._signature and self._current.version > 0:
+                return False
+
+            if signature is None:
+                excluded, thresholds, errors = frozenset(), {}, ()
+                self.logger.log("No se encontro grd_exclusion_list.txt. No habra exclusiones.", origin=self._origen)
+            else:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as fh:
+                        excluded, thresholds, errors = parse_rules(fh.read())
+                except Exception as exc:
+                    self.logger.log(f"ERROR leyendo grd_exclusion_list.txt: {exc}", origin=self._origen)
+                    return False
+
+            for line in errors:
+                self.logger.log(f"Entrada invalida en grd_exclusion_list: '{line}'", origin=self._origen)
+
+            self._signature = signature
+            # reemplazo atomico de la referencia: los lectores ven la version vieja o la nueva
+            self._current = AlarmRules(self._current.version + 1, excluded, thresholds, errors)
+            rules = self._current
+
+        self.logger.log(
+            f"Reglas de alarmas v{rules.version}: GRD excluidos {sorted(rules.excluded)}, "
+            f"umbrales propios {rules.thresholds_minutes}",
+            origin=self._origen,
+        )
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        data = self._current.to_dict()
+        data["path"] = self.path
+        data["mtime"] = self._signature[0] if self._signature else None
+        return data
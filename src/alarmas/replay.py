@@ -0,0 +1,231 @@
+"""
+Replay offline del pipeline de alarmas.
+
+Reproduce un archivo grabado por SnapshotRecorder a traves de NotifManager con:
+- reloj virtual (timebox.set_clock), sin esperas reales;
+- clientes locales que responden lo grabado hasta el instante virtual;
+- entrega falsa que solo registra las decisiones (sin mensagelo, MQTT ni SQLite).
+
+Uso:
+    python -m src.alarmas.replay grabacion.jsonl [--scale 10] [--interval 30] [--verbose]
+
+--scale N replica N veces los GRD desconectados (ids desplazados) para medir el motor
+con una flota mayor. Al final informa decisiones, ciclos y ciclos/segundo.
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import config
+from src.utils import timebox
+
+_GRD_ID_STRIDE = 100000
+
+
+class _QuietLogger:
+    def log(self, message: str, origin: str = "") -> None:
+        pass
+
+
+class _PrintLogger:
+    def log(self, message: str, origin: str = "") -> None:
+        print(f"[{timebox.utc_iso()}] [{origin}] {message}")
+
+
+class VirtualClock:
+    """
+    reloj controlado por el replay (UTC aware)
+    """
+
+    def __init__(self, start: datetime):
+        self.now = start
+
+    def utc_now(self) -> datetime:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now.timestamp()
+
+
+class ReplayClient:
+    """
+    responde para cada metodo el ultimo valor grabado (o relanza el error grabado)
+    """
+
+    def __init__(self, source: str, scale: int = 1):
+        self.source = source
+        self.scale = max(1, int(scale))
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        self._latest[record.get("method", "")] = record
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def _call(*args, **kwargs):
+            record = self._latest.get(name)
+            if record is None:
+                raise RuntimeError(f"sin datos grabados para {self.source}.{name}")
+            if "error" in record:
+                raise RuntimeError(record["error"])
+            data = copy.deepcopy(record.get("data"))
+            if self.source == "modbus" and name == "get_summary" and self.scale > 1:
+                data = _scale_summary(data, self.scale)
+            return data
+
+        return _call
+
+
+def _scale_summary(summary: Any, scale: int) -> Any:
+    if not isinstance(summary, dict):
+        return summary
+    base = summary.get("disconnected") or []
+    scaled = list(base)
+    for k in range(1, scale):
+        for grd in base:
+            clone = dict(grd)
+            clone["id_grd"] = int(grd.get("id_grd", 0)) + k * _GRD_ID_STRIDE
+            clone["description"] = f"{grd.get('description', '')} #{k}"
+            scaled.append(clone)
+    summary["disconnected"] = scaled
+    states = summary.get("states") or {}
+    scaled_states = dict(states)
+    for k in range(1, scale):
+        for key, value in states.items():
+            scaled_states[str(int(key) + k * _GRD_ID_STRIDE)] = value
+    summary["states"] = scaled_states
+    return summary
+
+
+class DecisionLog:
+    """
+    entrega falsa: registra cada email que el pipeline habria encolado
+    """
+
+    def __init__(self):
+        self.decisions: List[Dict[str, Any]] = []
+
+    def submit(self, idem_key, timestamp, subject, body, recipients, message_type="alarm_event", items=None) -> bool:
+        self.decisions.append(
+            {"ts": timestamp, "subject": subject, "idem_key": idem_key, "items": len(items or []) or 1}
+        )
+        return True
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for raw in fh:
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                rec = json.loads(raw)
+                rec["_dt"] = timebox.parse(rec["ts"])
+            except Exception:
+                continue
+            records.append(rec)
+    records.sort(key=lambda r: r["_dt"])
+    return records
+
+
+def run_replay(
+    records: List[Dict[str, Any]],
+    interval_seconds: float,
+    scale: int = 1,
+    excluded_grd_ids: Optional[set] = None,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """
+    reproduce las grabaciones ciclo a ciclo y retorna decisiones y metricas
+    """
+    from .notif_manager import NotifManager
+
+    if not records:
+        return {"cycles": 0, "decisions": [], "elapsed_s": 0.0, "cycles_per_s": 0.0}
+
+    clock = VirtualClock(records[0]["_dt"])
+    clients = {name: ReplayClient(name, scale) for name in ("modbus", "router", "ge", "proxmox", "charito")}
+    decisions = DecisionLog()
+    logger = _PrintLogger() if verbose else _QuietLogger()
+
+    timebox.set_clock(clock.utc_now)
+    try:
+        manager = NotifManager(
+            logger,
+            set(excluded_grd_ids or ()),
+            key=None,
+            clients=clients,
+            delivery=decisions,
+            persist_state=False,
+            digest_clock=clock.monotonic,
+        )
+        # cada cliente arranca con su primera respuesta grabada: en un ciclo las fuentes se graban
+        # una tras otra y el primer ciclo virtual corre en el instante del primer registro
+        primed = set()
+        for rec in records:
+            slot = (rec.get("source"), rec.get("method"))
+            client = clients.get(rec.get("source"))
+            if client is None or slot in primed:
+                continue
+            primed.add(slot)
+            client.apply(rec)
+        step = timedelta(seconds=max(1.0, float(interval_seconds)))
+        end = records[-1]["_dt"]
+        idx = 0
+        cycles = 0
+        started = time.perf_counter()
+        while clock.now <= end:
+            while idx < len(records) and records[idx]["_dt"] <= clock.now:
+                rec = records[idx]
+                client = clients.get(rec.get("source"))
+                if client is not None:
+                    client.apply(rec)
+                idx += 1
+            manager.run_alarm_processing()
+            cycles += 1
+            clock.now += step
+        # cierra ventanas de resumen pendientes al final de la grabacion
+        manager.digest.flush_due(force=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        timebox.reset_clock()
+
+    return {
+        "cycles": cycles,
+        "decisions": decisions.decisions,
+        "elapsed_s": elapsed,
+        "cycles_per_s": cycles / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay offline del pipeline de alarmas")
+    parser.add_argument("path", help="archivo JSONL grabado (PANELEXEMYS_ALARM_RECORD_PATH)")
+    parser.add_argument("--interval", type=float, default=float(config.ALARM_CHECK_INTERVAL_SECONDS),
+                        help="segundos virtuales entre ciclos")
+    parser.add_argument("--scale", type=int, default=1, help="factor de replicacion de GRD desconectados")
+    parser.add_argument("--verbose", action="store_true", help="muestra los logs de los notificadores")
+    args = parser.parse_args(argv)
+
+    records = load_records(args.path)
+    result = run_replay(records, args.interval, scale=args.scale, verbose=args.verbose)
+
+    for d in result["decisions"]:
+        print(f"{d['ts']}  {d['subject']}  (alarmas: {d['items']})")
+    print(
+        f"registros: {len(records)}  ciclos: {result['cycles']}  emails: {len(result['decisions'])}  "
+        f"tiempo: {result['elapsed_s']:.3f}s  ciclos/s: {result['cycles_per_s']:.1f}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
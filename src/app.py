@@ -1,8 +1,7 @@
 # src/app.py
 import os
 import threading
-import time
-from flask import request
+from flask import jsonify, request
 from werkzeug.middleware.proxy_fix import ProxyFix
 import dash
 from .web import dash_config
@@ -14,8 +13,19 @@ from src.servicios.mqtt import mqtt_event_bus
 from src.servicios.mqtt.mqtt_rpc import MqttRequestRouter
 
 from src.servicios.email.estado_email import start_email_health_monitor
+from src.servicios.proxmox.pve_poller import pve_poller
 from src.alarmas.notif_manager import NotifManager
+from src.alarmas.notif_metrics import alarm_metrics
+from src.alarmas.notif_scheduler import NotifScheduler
+from src.alarmas.recorder import SnapshotRecorder
+from src.alarmas.reglas import AlarmRulesSource
+from src.dao.dao_maintenance import maintenance_dao
+from src.servicios.db_maintenance import DbMaintenance
+from src.servicios.modbus.grd_disponibilidad import grd_disponibilidad
+from src.servicios.modbus.grd_historial import grd_historial
+from src.servicios.modbus.grd_state_table import grd_state_table
 from src.logger import Logosaurio
+from src.utils import timebox
 import config
 
 
@@ -69,6 +79,105 @@ mqtt_event_bus.set_manager(mqtt_client_manager)
 # router rpc mqtt (suscribe y procesa requests en la cola)
 rpc_router = MqttRequestRouter(logger_app, mqtt_client_manager, api_key, message_queue)
 
+
+@server.route("/dash/api/mqtt/rpc")
+def mqtt_rpc_metrics():
+    """
+    metricas del pool RPC por accion: encolados, vencidos, rechazados y tiempos de cola/atencion (ms)
+    """
+    return jsonify({"ts": timebox.utc_iso(), "actions": rpc_router.get_metrics()})
+
+
+@server.route("/dash/api/mqtt/estado")
+def mqtt_state_stats():
+    """
+    snapshots retenidos por topico: publicados, suprimidos sin cambios y ultima publicacion
+    """
+    return jsonify({"ts": timebox.utc_iso(), "topics": mqtt_event_bus.get_state_stats()})
+
+
+# agenda de chequeos de alarmas (un periodo por notificador)
+alarm_scheduler = NotifScheduler(logger_app)
+
+
+@server.route("/dash/api/alarmas/scheduler")
+def alarm_scheduler_status():
+    """
+    estado de la agenda de alarmas: proximo turno, ejecuciones y overruns por chequeo
+    """
+    return jsonify({"ts": timebox.utc_iso(), "jobs": alarm_scheduler.get_status()})
+
+
+@server.route("/dash/api/alarmas/metrics")
+def alarm_metrics_status():
+    """
+    tiempos del pipeline de alarmas (histogramas por fase y fuente) y contadores por notificador
+    """
+    data = alarm_metrics.snapshot()
+    data["ts"] = timebox.utc_iso()
+    return jsonify(data)
+
+
+# exclusiones y umbrales por GRD; se recargan en caliente desde la agenda (job "reglas")
+alarm_rules = AlarmRulesSource(
+    os.path.join(os.path.dirname(__file__), "alarmas", "grd_exclusion_list.txt"),
+    logger_app,
+)
+
+
+@server.route("/dash/api/alarmas/reglas")
+def alarm_rules_status():
+    """
+    version vigente de las reglas de alarmas (exclusiones, umbrales por GRD y errores de parseo)
+    """
+    return jsonify(alarm_rules.status())
+
+
+# retencion, resumen diario y vacuum incremental de la base local (job "mantenimiento_db")
+db_maintenance = DbMaintenance(
+    logger_app,
+    retention_days=config.DB_RETENTION_DAYS,
+    outbox_retention_days=config.DB_OUTBOX_RETENTION_DAYS,
+    rollup_batch=config.DB_ROLLUP_BATCH,
+    max_batches=config.DB_ROLLUP_MAX_BATCHES,
+    vacuum_max_pages=config.DB_VACUUM_MAX_PAGES,
+)
+
+
+@server.route("/dash/api/db/stats")
+def db_stats():
+    """
+    tamano y paginas de la base local, mas el resultado del ultimo mantenimiento
+    """
+    return jsonify({"ts": timebox.utc_iso(), "stats": maintenance_dao.stats(), "last_run": db_maintenance.get_report()})
+
+
+@server.route("/dash/api/grd/historial/sync")
+def grd_history_sync_status():
+    """
+    resultado de la ultima sincronizacion del espejo local de historial GRD
+    """
+    return jsonify({"ts": timebox.utc_iso(), "last_run": grd_historial.get_report()})
+
+
+@server.route("/dash/api/grd/disponibilidad")
+def grd_availability():
+    """
+    ranking de GRD con peor disponibilidad (?dias=7&limite=10) desde el resumen diario
+    """
+    try:
+        days = int(request.args.get("dias", 7))
+        limit = int(request.args.get("limite", config.GRD_AVAILABILITY_RANKING))
+    except ValueError:
+        return jsonify({"error": "dias y limite deben ser enteros"}), 400
+    return jsonify({
+        "ts": timebox.utc_iso(),
+        "dias": days,
+        "items": grd_disponibilidad.worst(days, limit=limit),
+        "last_run": grd_disponibilidad.get_report(),
+    })
+
+
 # configurar vistas y callbacks dash
 dash_config.configure_dash_app(
     app,
@@ -78,54 +187,48 @@ dash_config.configure_dash_app(
 )
 
 
-def _load_grd_exclusion_ids(logger: Logosaurio) -> set:
-    """
-    Lee la lista de GRD a excluir de alarmas individuales.
-    """
-    exclusion_path = os.path.join(os.path.dirname(__file__), "alarmas", "grd_exclusion_list.txt")
-    excluded: set[int] = set()
-    try:
-        with open(exclusion_path, "r", encoding="utf-8") as fh:
-            for raw_line in fh:
-                line = raw_line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                try:
-                    excluded.add(int(line))
-                except ValueError:
-                    logger.log(f"Entrada invalida en grd_exclusion_list: '{line}'", origin="ALRM/INIT")
-    except FileNotFoundError:
-        logger.log("No se encontro grd_exclusion_list.txt. No habra exclusiones.", origin="ALRM/INIT")
-    except Exception as exc:
-        logger.log(f"ERROR leyendo grd_exclusion_list.txt: {exc}", origin="ALRM/INIT")
-    else:
-        if excluded:
-            logger.log(f"GRD excluidos de alarmas: {sorted(excluded)}", origin="ALRM/INIT")
-    return excluded
-
-
 def _start_alarm_manager(logger: Logosaurio) -> None:
     """
-    Inicializa NotifManager en un hilo en segundo plano.
+    Inicializa NotifManager y registra cada chequeo en la agenda de alarmas.
     """
-    excluded_ids = _load_grd_exclusion_ids(logger)
-    interval = max(1, int(config.ALARM_CHECK_INTERVAL_SECONDS))
-    manager = NotifManager(logger, excluded_ids, api_key)
-
-    def alarm_loop() -> None:
-        while True:
-            try:
-                manager.run_alarm_processing()
-            except Exception as exc:
-                logger.log(f"ERROR en ciclo de NotifManager: {exc}", origin="ALRM/LOOP")
-            time.sleep(interval)
-
-    threading.Thread(target=alarm_loop, name="notif-manager", daemon=True).start()
+    alarm_rules.check()
+    recorder = SnapshotRecorder(config.ALARM_RECORD_PATH) if config.ALARM_RECORD_PATH else None
+    if recorder is not None:
+        logger.log(f"Grabando snapshots de alarmas en {config.ALARM_RECORD_PATH}", origin="ALRM/INIT")
+    manager = NotifManager(logger, set(), api_key, recorder=recorder, rules_source=alarm_rules)
+    # reinicio en caliente: conteos en curso y alarmas ya disparadas sobreviven al reinicio
+    manager.restore_state()
+    manager.delivery.start()
+    manager.schedule_jobs(alarm_scheduler, config.ALARM_SCHEDULE)
+    alarm_scheduler.add_job(
+        "mantenimiento_db",
+        db_maintenance.run,
+        period=config.DB_MAINTENANCE_PERIOD_SECONDS,
+        jitter=60,
+        timeout=600,
+    )
+    # espejo local del historial GRD: cambios observados en el resumen + sincronizacion incremental
+    grd_state_table.subscribe(grd_historial.observe)
+    alarm_scheduler.add_job(
+        "historial_grd",
+        grd_historial.run,
+        period=config.GRD_HISTORY_SYNC_SECONDS,
+        jitter=5,
+        timeout=120,
+    )
+    alarm_scheduler.add_job(
+        "disponibilidad_grd",
+        grd_disponibilidad.run,
+        period=config.GRD_ROLLUP_SECONDS,
+        jitter=10,
+        timeout=300,
+    )
+    alarm_scheduler.start()
 
 
 def _start_background_services():
     """
-    Inicializa servicios permanentes (MQTT, RPC, monitor email y alarmas) una sola vez.
+    Inicializa servicios permanentes (MQTT, RPC, monitor email, poller Proxmox y alarmas) una sola vez.
     """
     global _services_started
     if _services_started:
@@ -152,6 +255,9 @@ def _start_background_services():
             daemon=True,
         ).start()
 
+        logger_app.log("Lanzando poller Proxmox...", origin="APP")
+        pve_poller.start()
+
         logger_app.log("Lanzando gestor de alarmas...", origin="APP")
         _start_alarm_manager(logger_app)
 
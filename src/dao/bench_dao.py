@@ -0,0 +1,118 @@
+"""
+Benchmark de dao_base: conexion nueva por llamada + lock global (esquema anterior)
+contra el pool de conexiones configuradas (with_connection actual).
+
+Uso:
+    python -m src.dao.bench_dao [--ops 2000] [--readers 4] [--db /tmp/bench.db]
+
+Mide, sobre una base temporal (nunca la de produccion):
+- insert: una transaccion por insert, como MensajesEnviadosDAO.insert_sent_message;
+- query:  consulta puntual por id;
+- mixto:  un hilo escritor y N hilos lectores en paralelo (ops/s totales).
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+def _legacy_runner(db_path: str) -> Callable:
+    import sqlite3
+
+    lock = threading.RLock()
+
+    def _with_connection(fn, *args, **kwargs):
+        with lock:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute("PRAGMA foreign_keys=ON;")
+            with conn:
+                return fn(conn, *args, **kwargs)
+
+    return _with_connection
+
+
+def _insert(conn, i: int) -> None:
+    conn.execute(
+        "INSERT INTO bench (ts, subject, body) VALUES (?, ?, ?);",
+        (f"2026-01-01T00:00:{i % 60:02d}Z", f"asunto {i}", "x" * 200),
+    )
+
+
+def _query(conn, i: int):
+    return conn.execute("SELECT id, ts, subject FROM bench WHERE id = ?;", (i,)).fetchone()
+
+
+def _rate(ops: int, elapsed: float) -> float:
+    return ops / elapsed if elapsed > 0 else 0.0
+
+
+def _run_serial(runner: Callable, fn: Callable, ops: int) -> float:
+    started = time.perf_counter()
+    for i in range(1, ops + 1):
+        runner(fn, i)
+    return _rate(ops, time.perf_counter() - started)
+
+
+def _run_mixed(runner: Callable, ops: int, readers: int) -> float:
+    counts: List[int] = [0] * (readers + 1)
+
+    def _writer():
+        for i in range(ops):
+            runner(_insert, i)
+        counts[0] = ops
+
+    def _reader(slot: int):
+        for i in range(1, ops + 1):
+            runner(_query, i)
+        counts[slot] = ops
+
+    threads = [threading.Thread(target=_writer)]
+    threads += [threading.Thread(target=_reader, args=(k + 1,)) for k in range(readers)]
+    started = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return _rate(sum(counts), time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de conexiones SQLite de dao_base")
+    parser.add_argument("--ops", type=int, default=2000, help="operaciones por prueba")
+    parser.add_argument("--readers", type=int, default=4, help="hilos lectores en la prueba mixta")
+    parser.add_argument("--db", default="", help="archivo de base temporal (por defecto en /tmp)")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="panelexemys-bench-"), "bench.db")
+    # dao_base resuelve la ruta al importarse: se apunta a la base temporal antes
+    os.environ["PANELEXEMYS_DB_PATH"] = db_path
+    from src.dao import dao_base
+
+    def _schema(conn):
+        conn.execute("DROP TABLE IF EXISTS bench;")
+        conn.execute(
+            "CREATE TABLE bench (id INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT, subject TEXT, body TEXT);"
+        )
+
+    runners = (("anterior", _legacy_runner(db_path)), ("pool", dao_base.with_connection))
+    print(f"base: {db_path}  ops: {args.ops}  lectores: {args.readers}")
+    print(f"{'esquema':<10}{'insert/s':>12}{'query/s':>12}{'mixto ops/s':>14}")
+    for label, runner in runners:
+        runner(_schema)
+        inserts = _run_serial(runner, _insert, args.ops)
+        queries = _run_serial(runner, _query, args.ops)
+        mixed = _run_mixed(runner, args.ops, args.readers)
+        print(f"{label:<10}{inserts:>12.0f}{queries:>12.0f}{mixed:>14.0f}")
+    dao_base.close_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Dict, List, Sequence
+
+from .dao_base import with_connection
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+STATUS_DIGEST = "digest"
+
+SUBJECT_MAX = 512
+BODY_MAX = 4096
+TRUNCATED_MARK = "\n[... contenido recortado]"
+
+
+def _fit(text: str, limit: int, mark: str = "") -> str:
+    """
+    recorta al limite de la columna dejando una marca visible (nunca en silencio)
+    """
+    if len(text) <= limit:
+        return text
+    return text[: max(0, limit - len(mark))] + mark
+
+
+class AlarmOutboxDAO:
+    """
+    Outbox de emails de alarma (misma base que mensajes_enviados).
+    - idem_key UNIQUE: la misma alarma encolada dos veces se ignora.
+    - next_attempt_at (epoch): los reintentos se agendan por tiempo, sin dormir el hilo.
+    - status: pending -> sent | failed, con cantidad de intentos y ultimo error.
+    - status 'digest': alarma retenida en la ventana de resumen (AlarmDigest); no se entrega,
+      sobrevive a un reinicio y se reemplaza por el email final en la misma transaccion.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        def _init(conn):
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alarm_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idem_key TEXT NOT NULL UNIQUE,
+                    ts TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    message_type TEXT NOT NULL,
+                    recipients TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    items TEXT,
+                    updated_at TEXT DEFAULT (datetime('now'))
+                );
+                """
+            )
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(alarm_outbox);").fetchall()}
+            if "items" not in columns:
+                conn.execute("ALTER TABLE alarm_outbox ADD COLUMN items TEXT;")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alarm_outbox_due ON alarm_outbox(status, next_attempt_at);"
+            )
+
+        with self._lock:
+            with_connection(_init)
+
+    def enqueue(
+        self,
+        idem_key: str,
+        timestamp: str,
+        subject: str,
+        body: str,
+        message_type: str,
+        recipients: Sequence[str],
+        items: Sequence[Dict[str, Any]] | None = None,
+        replaces: Sequence[str] | None = None,
+    ) -> bool:
+        """
+        encola un email; retorna False si ya existia otro con la misma idem_key.
+        items: detalle de alarmas agrupadas cuando el email es un resumen
+        replaces: idem_key de alarmas retenidas (status 'digest') que este email reemplaza
+        """
+        row = self._row(idem_key, timestamp, subject, body, message_type, recipients, STATUS_PENDING, items)
+        keys = [k[:256] for k in (replaces or [])]
+
+        def _insert(conn):
+            if keys:
+                conn.executemany(
+                    "DELETE FROM alarm_outbox WHERE idem_key = ? AND status = ?;",
+                    [(k, STATUS_DIGEST) for k in keys],
+                )
+            cur = conn.execute(
+                """
+                INSERT OR IGNORE INTO alarm_outbox
+                    (idem_key, ts, subject, body, message_type, recipients, status, next_attempt_at, items)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                row,
+            )
+            return cur.rowcount > 0
+
+        with self._lock:
+            return bool(with_connection(_insert))
+
+    @staticmethod
+    def _row(idem_key, timestamp, subject, body, message_type, recipients, status, items=None) -> tuple:
+        return (
+            idem_key[:256],
+            timestamp,
+            _fit(subject, SUBJECT_MAX, "..."),
+            _fit(body, BODY_MAX, TRUNCATED_MARK),
+            message_type[:128],
+            json.dumps(list(recipients)),
+            status,
+            time.time(),
+            json.dumps(list(items), ensure_ascii=False) if items else None,
+        )
+
+    def hold_digest(
+        self,
+        idem_key: str,
+        timestamp: str,
+        subject: str,
+        body: str,
+        message_type: str,
+        recipients: Sequence[str],
+    ) -> bool:
+        """
+        guarda una alarma retenida en la ventana de resumen; False si la idem_key ya existia
+        (retenida o ya encolada)
+        """
+        row = self._row(idem_key, timestamp, subject, body, message_type, recipients, STATUS_DIGEST)
+
+        def _insert(conn):
+            cur = conn.execute(
+                """
+                INSERT OR IGNORE INTO alarm_outbox
+                    (idem_key, ts, subject, body, message_type, recipients, status, next_attempt_at, items)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                row,
+            )
+            return cur.rowcount > 0
+
+        with self._lock:
+            return bool(with_connection(_insert))
+
+    def load_digest(self) -> List[Dict[str, Any]]:
+        """
+        alarmas retenidas en la ventana de resumen, en orden de llegada
+        """
+        def _select(conn):
+            rows = conn.execute(
+                """
+                SELECT idem_key, ts, subject, body, recipients FROM alarm_outbox
+                WHERE status = ? ORDER BY id;
+                """,
+                (STATUS_DIGEST,),
+            ).fetchall()
+            out = []
+            for r in rows:
+                item = dict(r)
+                item["recipients"] = json.loads(item["recipients"])
+                out.append(item)
+            return out
+
+        with self._lock:
+            return with_connection(_select)
+
+    def fetch_due(self, now: float, limit: int) -> List[Dict[str, Any]]:
+        """
+        pendientes cuyo proximo intento ya vencio, en orden de llegada
+        """
+        def _select(conn):
+            rows = conn.execute(
+                """
+                SELECT id, idem_key, ts, subject, body, message_type, recipients, attempts, items
+                FROM alarm_outbox
+                WHERE status = ? AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id
+                LIMIT ?;
+                """,
+                (STATUS_PENDING, float(now), int(limit)),
+            ).fetchall()
+            out = []
+            for r in rows:
+                item = dict(r)
+                item["recipients"] = json.loads(item["recipients"])
+                item["items"] = json.loads(item["items"]) if item["items"] else None
+                out.append(item)
+            return out
+
+        with self._lock:
+            return with_connection(_select)
+
+    def next_due_at(self) -> float | None:
+        """
+        epoch del proximo intento agendado (None si no hay pendientes)
+        """
+        def _select(conn):
+            row = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM alarm_outbox WHERE status = ?;",
+                (STATUS_PENDING,),
+            ).fetchone()
+            return row[0] if row else None
+
+        with self._lock:
+            return with_connection(_select)
+
+    def mark_sent(self, row_id: int, attempts: int) -> None:
+        self._update(row_id, STATUS_SENT, attempts, None, None)
+
+    def mark_retry(self, row_id: int, attempts: int, next_attempt_at: float, error: str) -> None:
+        self._update(row_id, STATUS_PENDING, attempts, next_attempt_at, error)
+
+    def mark_failed(self, row_id: int, attempts: int, error: str) -> None:
+        self._update(row_id, STATUS_FAILED, attempts, None, error)
+
+    def _update(self, row_id: int, status: str, attempts: int, next_attempt_at: float | None, error: str | None) -> None:
+        def _write(conn):
+            conn.execute(
+                """
+                UPDATE alarm_outbox
+                SET status = ?, attempts = ?, next_attempt_at = COALESCE(?, next_attempt_at),
+                    last_error = ?, updated_at = datetime('now')
+                WHERE id = ?;
+                """,
+                (status, int(attempts), next_attempt_at, (error or None) and error[:1024], int(row_id)),
+            )
+
+        with self._lock:
+            with_connection(_write)
+
+    def count_by_status(self) -> Dict[str, int]:
+        def _count(conn):
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM alarm_outbox GROUP BY status;"
+            ).fetchall()
+            return {r["status"]: int(r["n"]) for r in rows}
+
+        with self._lock:
+            return with_connection(_count)
+
+
+alarm_outbox_dao = AlarmOutboxDAO()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .dao_base import with_connection
+
+
+class AlarmStateDAO:
+    """
+    Checkpoint del estado de los notificadores (claves en conteo o ya disparadas).
+    - start_time se guarda en UTC (ISO 8601).
+    - key se guarda serializada en JSON para conservar el tipo (int de GRD/VM, str de demonios).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        def _init(conn):
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alarm_state (
+                    notifier TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    triggered INTEGER NOT NULL,
+                    meta TEXT,
+                    updated_at TEXT DEFAULT (datetime('now')),
+                    PRIMARY KEY (notifier, key)
+                );
+                """
+            )
+
+        with self._lock:
+            with_connection(_init)
+
+    def apply_changes(
+        self,
+        upserts: Iterable[Tuple[str, Any, str, bool, Dict[str, Any]]],
+        deletes: Iterable[Tuple[str, Any]],
+    ) -> None:
+        """
+        aplica en una sola transaccion los cambios de un chequeo.
+        upserts: (notifier, key, start_time_utc_iso, triggered, meta)
+        deletes: (notifier, key)
+        """
+        upsert_rows = [
+            (notifier, json.dumps(key), start_time, int(bool(triggered)), json.dumps(meta or {}, ensure_ascii=False))
+            for notifier, key, start_time, triggered, meta in upserts
+        ]
+        delete_rows = [(notifier, json.dumps(key)) for notifier, key in deletes]
+        if not upsert_rows and not delete_rows:
+            return
+
+        def _write(conn):
+            if delete_rows:
+                conn.executemany(
+                    "DELETE FROM alarm_state WHERE notifier = ? AND key = ?;",
+                    delete_rows,
+                )
+            if upsert_rows:
+                conn.executemany(
+                    """
+                    INSERT INTO alarm_state (notifier, key, start_time, triggered, meta)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(notifier, key) DO UPDATE SET
+                        start_time = excluded.start_time,
+                        triggered = excluded.triggered,
+                        meta = excluded.meta,
+                        updated_at = datetime('now');
+                    """,
+                    upsert_rows,
+                )
+
+        with self._lock:
+            with_connection(_write)
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """
+        retorna todas las claves guardadas: notifier, key, start_time (ISO UTC), triggered, meta
+        """
+        def _select(conn):
+            return conn.execute(
+                "SELECT notifier, key, start_time, triggered, meta FROM alarm_state;"
+            ).fetchall()
+
+        with self._lock:
+            rows = with_connection(_select)
+
+        out: List[Dict[str, Any]] = []
+        for r in rows:
+            try:
+                meta = json.loads(r["meta"]) if r["meta"] else {}
+            except ValueError:
+                meta = {}
+            out.append(
+                {
+                    "notifier": r["notifier"],
+                    "key": json.loads(r["key"]),
+                    "start_time": r["start_time"],
+                    "triggered": bool(r["triggered"]),
+                    "meta": meta,
+                }
+            )
+        return out
+
+    def clear_notifier(self, notifier: str) -> None:
+        def _delete(conn):
+            conn.execute("DELETE FROM alarm_state WHERE notifier = ?;", (notifier,))
+
+        with self._lock:
+            with_connection(_delete)
+
+
+alarm_state_dao = AlarmStateDAO()
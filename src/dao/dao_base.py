@@ -2,6 +2,7 @@ import os
 import sqlite3
 import threading
 from pathlib import Path
+from typing import List
 
 
 def _pick_db_path() -> Path:
@@ -26,7 +27,15 @@ def _safe_path(path: Path) -> Path:
 
 _db_path = _safe_path(_pick_db_path())
 
-_connection_lock = threading.RLock()
+# conexiones configuradas reutilizables (WAL admite lectores concurrentes con un escritor)
+POOL_MAX_IDLE = 8
+BUSY_TIMEOUT_MS = 5000
+CACHED_STATEMENTS = 256
+
+_pool_lock = threading.Lock()
+_idle: List[sqlite3.Connection] = []
+_wal_ready = False
+_local = threading.local()
 
 
 def get_db_path() -> Path:
@@ -34,19 +43,84 @@ def get_db_path() -> Path:
 
 
 def _configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
-    conn.execute("PRAGMA journal_mode=WAL;")
+    global _wal_ready
+    # journal_mode=WAL queda persistido en el archivo: basta con fijarlo una vez por proceso
+    if not _wal_ready:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        _wal_ready = True
     conn.execute("PRAGMA synchronous=NORMAL;")
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
 
 def get_db_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(_db_path, check_same_thread=False)
+    """
+    conexion nueva y configurada (fuera del pool; el llamador la cierra)
+    """
+    conn = sqlite3.connect(
+        _db_path,
+        check_same_thread=False,
+        timeout=BUSY_TIMEOUT_MS / 1000.0,
+        cached_statements=CACHED_STATEMENTS,
+    )
     conn.row_factory = sqlite3.Row
     return _configure_connection(conn)
 
 
+def _acquire() -> sqlite3.Connection:
+    with _pool_lock:
+        if _idle:
+            return _idle.pop()
+    return get_db_connection()
+
+
+def _release(conn: sqlite3.Connection) -> None:
+    with _pool_lock:
+        if len(_idle) < POOL_MAX_IDLE:
+            _idle.append(conn)
+            return
+    conn.close()
+
+
 def with_connection(fn, *args, **kwargs):
-    with _connection_lock:
-        with get_db_connection() as conn:
+    """
+    ejecuta fn(conn) en una transaccion (commit al salir, rollback ante excepcion).
+    La conexion sale del pool y vuelve al terminar; llamadas anidadas en el mismo hilo
+    reutilizan la conexion y la transaccion de la llamada externa.
+    Sin lock global: SQLite serializa escritores (busy_timeout) y los lectores no bloquean.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return fn(conn, *args, **kwargs)
+
+    conn = _acquire()
+    _local.conn = conn
+    try:
+        with conn:
             return fn(conn, *args, **kwargs)
+    except sqlite3.ProgrammingError:
+        # uso invalido de la conexion (p. ej. cerrada por fuera): se descarta en lugar de reciclarla
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        conn = None
+        raise
+    finally:
+        _local.conn = None
+        if conn is not None:
+            _release(conn)
+
+
+def close_all() -> None:
+    """
+    cierra las conexiones ociosas del pool (p. ej. antes de reemplazar el archivo de la base)
+    """
+    with _pool_lock:
+        idle = list(_idle)
+        _idle.clear()
+    for conn in idle:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
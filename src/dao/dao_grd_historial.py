@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .dao_base import with_connection
+
+
+class GrdHistorialDAO:
+    """
+    Espejo local de las transiciones de conexion de cada GRD.
+    - ts en epoch UTC (segundos, entero); clave (grd_id, ts): cubre las consultas por rango.
+    - fuente 'mw' (historial de modbus-mw-service, autoritativo) u 'obs' (cambio observado en
+      el resumen, provisorio hasta la proxima sincronizacion del rango).
+    - grd_historial_sync guarda hasta cuando se sincronizo cada GRD y si ya tiene el historial completo.
+    - grd_disponibilidad_diaria: por GRD y dia UTC, segundos conectado, segundos con estado conocido
+      y caidas, mas los acumulados desde el primer dia (un periodo se resuelve con dos filas por GRD).
+    """
+
+    def __init__(self) -> None:
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        def _init(conn):
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS grd_historial (
+                    grd_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    conectado INTEGER NOT NULL,
+                    fuente TEXT NOT NULL DEFAULT 'mw',
+                    PRIMARY KEY (grd_id, ts)
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS grd_historial_sync (
+                    grd_id INTEGER PRIMARY KEY,
+                    synced_at INTEGER NOT NULL,
+                    completo INTEGER NOT NULL DEFAULT 0
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS grd_disponibilidad_diaria (
+                    grd_id INTEGER NOT NULL,
+                    dia TEXT NOT NULL,
+                    conectado_seg INTEGER NOT NULL,
+                    medido_seg INTEGER NOT NULL,
+                    caidas INTEGER NOT NULL,
+                    acum_conectado INTEGER NOT NULL,
+                    acum_medido INTEGER NOT NULL,
+                    acum_caidas INTEGER NOT NULL,
+                    PRIMARY KEY (grd_id, dia)
+                ) WITHOUT ROWID;
+                """
+            )
+
+        with_connection(_init)
+
+    def replace_range(self, grd_id: int, ts_from: int, ts_to: int, rows: Iterable[Tuple[int, int]]) -> int:
+        """
+        reemplaza las transiciones de [ts_from, ts_to] de un GRD por las informadas por el middleware.
+        rows: (ts, conectado). retorna las filas insertadas
+        """
+        data = [(int(grd_id), int(ts), 1 if conectado == 1 else 0) for ts, conectado in rows]
+
+        def _run(conn):
+            conn.execute(
+                "DELETE FROM grd_historial WHERE grd_id = ? AND ts BETWEEN ? AND ?;",
+                (int(grd_id), int(ts_from), int(ts_to)),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO grd_historial (grd_id, ts, conectado, fuente) VALUES (?, ?, ?, 'mw');",
+                data,
+            )
+            return len(data)
+
+        return int(with_connection(_run))
+
+    def insert_observed(self, rows: Iterable[Tuple[int, int, int]]) -> int:
+        """
+        agrega transiciones observadas (grd_id, ts, conectado); no pisa filas existentes
+        """
+        data = [(int(g), int(ts), 1 if c == 1 else 0) for g, ts, c in rows]
+        if not data:
+            return 0
+
+        def _run(conn):
+            conn.executemany(
+                "INSERT OR IGNORE INTO grd_historial (grd_id, ts, conectado, fuente) VALUES (?, ?, ?, 'obs');",
+                data,
+            )
+            return len(data)
+
+        return int(with_connection(_run))
+
+    def transitions(self, grd_id: int, ts_from: Optional[int] = None, ts_to: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        (ts, conectado) de un GRD en [ts_from, ts_to], en orden cronologico
+        """
+        lo = -(2**62) if ts_from is None else int(ts_from)
+        hi = 2**62 if ts_to is None else int(ts_to)
+
+        def _run(conn):
+            return conn.execute(
+                "SELECT ts, conectado FROM grd_historial WHERE grd_id = ? AND ts BETWEEN ? AND ? ORDER BY ts;",
+                (int(grd_id), lo, hi),
+            ).fetchall()
+
+        return [(int(r[0]), int(r[1])) for r in with_connection(_run)]
+
+    def state_before(self, grd_id: int, ts: int) -> Optional[int]:
+        """
+        estado vigente justo antes de ts (ultima transicion anterior) o None
+        """
+        def _run(conn):
+            return conn.execute(
+                "SELECT conectado FROM grd_historial WHERE grd_id = ? AND ts < ? ORDER BY ts DESC LIMIT 1;",
+                (int(grd_id), int(ts)),
+            ).fetchone()
+
+        row = with_connection(_run)
+        return int(row[0]) if row else None
+
+    def first_ts(self, grd_id: int) -> Optional[int]:
+        def _run(conn):
+            return conn.execute(
+                "SELECT MIN(ts) FROM grd_historial WHERE grd_id = ?;", (int(grd_id),)
+            ).fetchone()
+
+        row = with_connection(_run)
+        return int(row[0]) if row and row[0] is not None else None
+
+    def mark_synced(self, grd_id: int, synced_at: int, completo: bool) -> None:
+        def _run(conn):
+            conn.execute(
+                """
+                INSERT INTO grd_historial_sync (grd_id, synced_at, completo) VALUES (?, ?, ?)
+                ON CONFLICT (grd_id) DO UPDATE SET
+                    synced_at = excluded.synced_at,
+                    completo = MAX(completo, excluded.completo);
+                """,
+                (int(grd_id), int(synced_at), int(bool(completo))),
+            )
+
+        with_connection(_run)
+
+    def sync_state(self) -> Dict[int, Tuple[int, bool]]:
+        """
+        grd_id -> (synced_at, completo)
+        """
+        def _run(conn):
+            return conn.execute("SELECT grd_id, synced_at, completo FROM grd_historial_sync;").fetchall()
+
+        return {int(r[0]): (int(r[1]), bool(r[2])) for r in with_connection(_run)}
+
+    # ----------------- disponibilidad diaria -----------------
+
+    def last_rollup(self, grd_id: int, before_dia: Optional[str] = None) -> Optional[Tuple[str, int, int, int]]:
+        """
+        ultima fila de resumen (dia, acum_conectado, acum_medido, acum_caidas), opcionalmente con dia < before_dia
+        """
+        def _run(conn):
+            if before_dia is None:
+                return conn.execute(
+                    """
+                    SELECT dia, acum_conectado, acum_medido, acum_caidas FROM grd_disponibilidad_diaria
+                    WHERE grd_id = ? ORDER BY dia DESC LIMIT 1;
+                    """,
+                    (int(grd_id),),
+                ).fetchone()
+            return conn.execute(
+                """
+                SELECT dia, acum_conectado, acum_medido, acum_caidas FROM grd_disponibilidad_diaria
+                WHERE grd_id = ? AND dia < ? ORDER BY dia DESC LIMIT 1;
+                """,
+                (int(grd_id), before_dia),
+            ).fetchone()
+
+        row = with_connection(_run)
+        return (str(row[0]), int(row[1]), int(row[2]), int(row[3])) if row else None
+
+    def replace_rollups(self, grd_id: int, from_dia: str, rows: Iterable[Tuple[str, int, int, int, int, int, int]]) -> int:
+        """
+        reemplaza el resumen del GRD desde from_dia inclusive.
+        rows: (dia, conectado_seg, medido_seg, caidas, acum_conectado, acum_medido, acum_caidas)
+        """
+        data = [(int(grd_id),) + tuple(r) for r in rows]
+
+        def _run(conn):
+            conn.execute(
+                "DELETE FROM grd_disponibilidad_diaria WHERE grd_id = ? AND dia >= ?;",
+                (int(grd_id), from_dia),
+            )
+            conn.executemany(
+                """
+                INSERT INTO grd_disponibilidad_diaria
+                    (grd_id, dia, conectado_seg, medido_seg, caidas, acum_conectado, acum_medido, acum_caidas)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                data,
+            )
+            return len(data)
+
+        return int(with_connection(_run))
+
+    def rollups_at(self, grd_ids: Iterable[int], dia: str) -> Dict[int, Tuple[int, int, int]]:
+        """
+        acumulados (conectado, medido, caidas) de cada GRD en el dia exacto (busqueda por clave)
+        """
+        ids = [int(g) for g in grd_ids]
+        if not ids:
+            return {}
+
+        def _run(conn):
+            out = []
+            # de a 500 para no pasar el limite de parametros de SQLite
+            for i in range(0, len(ids), 500):
+                chunk = ids[i: i + 500]
+                marks = ",".join("?" * len(chunk))
+                out += conn.execute(
+                    f"""
+                    SELECT grd_id, acum_conectado, acum_medido, acum_caidas FROM grd_disponibilidad_diaria
+                    WHERE grd_id IN ({marks}) AND dia = ?;
+                    """,
+                    (*chunk, dia),
+                ).fetchall()
+            return out
+
+        return {int(r[0]): (int(r[1]), int(r[2]), int(r[3])) for r in with_connection(_run)}
+
+    def rollup_bounds(self) -> Dict[int, Tuple[str, str]]:
+        """
+        grd_id -> (primer dia, ultimo dia) resumidos
+        """
+        def _run(conn):
+            return conn.execute(
+                "SELECT grd_id, MIN(dia), MAX(dia) FROM grd_disponibilidad_diaria GROUP BY grd_id;"
+            ).fetchall()
+
+        return {int(r[0]): (str(r[1]), str(r[2])) for r in with_connection(_run)}
+
+
+grd_historial_dao = GrdHistorialDAO()
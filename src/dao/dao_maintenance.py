@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict
+
+from .dao_base import get_db_path, with_connection
+
+# tablas informadas en las estadisticas (las que existan)
+_TABLES = ("mensajes_enviados", "mensajes_diarios", "alarm_outbox", "alarm_state", "mqtt_outbox")
+
+
+class MaintenanceDAO:
+    """
+    Operaciones de mantenimiento de la base local:
+    - resumen diario (mensajes_diarios) de los mensajes que salen de la retencion;
+    - purga por lotes de mensajes_enviados y del outbox de alarmas ya resuelto;
+    - auto_vacuum=INCREMENTAL y vaciado acotado de paginas libres;
+    - estadisticas de tamano y paginas.
+    """
+
+    def __init__(self) -> None:
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        def _init(conn):
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS mensajes_diarios (
+                    dia TEXT NOT NULL,
+                    message_type TEXT NOT NULL,
+                    success INTEGER NOT NULL,
+                    cantidad INTEGER NOT NULL,
+                    PRIMARY KEY (dia, message_type, success)
+                );
+                """
+            )
+
+        with_connection(_init)
+
+    def ensure_incremental_vacuum(self) -> bool:
+        """
+        activa auto_vacuum=INCREMENTAL; en una base existente requiere un VACUUM completo (una sola vez).
+        retorna True si hubo que convertir la base
+        """
+        def _mode(conn):
+            return int(conn.execute("PRAGMA auto_vacuum;").fetchone()[0])
+
+        if with_connection(_mode) == 2:
+            return False
+
+        def _convert(conn):
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+            conn.execute("VACUUM;")
+
+        with_connection(_convert)
+        return True
+
+    def rollup_and_purge_messages(self, cutoff_ts: str, batch: int) -> int:
+        """
+        resume por dia/tipo/resultado y borra un lote de mensajes con ts < cutoff_ts
+        (resumen y borrado en la misma transaccion). retorna las filas borradas
+        """
+        def _run(conn):
+            ids = [
+                r[0]
+                for r in conn.execute(
+                    "SELECT id FROM mensajes_enviados WHERE ts < ? ORDER BY ts LIMIT ?;",
+                    (cutoff_ts, int(batch)),
+                ).fetchall()
+            ]
+            if not ids:
+                return 0
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS _purga (id INTEGER PRIMARY KEY);")
+            conn.execute("DELETE FROM _purga;")
+            conn.executemany("INSERT INTO _purga (id) VALUES (?);", [(i,) for i in ids])
+            conn.execute(
+                """
+                INSERT INTO mensajes_diarios (dia, message_type, success, cantidad)
+                SELECT substr(ts, 1, 10), message_type, success, COUNT(*)
+                FROM mensajes_enviados WHERE id IN (SELECT id FROM _purga)
+                GROUP BY substr(ts, 1, 10), message_type, success
+                ON CONFLICT (dia, message_type, success)
+                DO UPDATE SET cantidad = cantidad + excluded.cantidad;
+                """
+            )
+            conn.execute("DELETE FROM mensajes_enviados WHERE id IN (SELECT id FROM _purga);")
+            conn.execute("DELETE FROM _purga;")
+            return len(ids)
+
+        return int(with_connection(_run))
+
+    def purge_alarm_outbox(self, cutoff_sql: str) -> int:
+        """
+        borra del outbox los emails ya enviados o descartados con updated_at < cutoff_sql
+        ('YYYY-MM-DD HH:MM:SS' UTC); los pendientes nunca se tocan
+        """
+        def _run(conn):
+            cur = conn.execute(
+                "DELETE FROM alarm_outbox WHERE status IN ('sent', 'failed') AND updated_at < ?;",
+                (cutoff_sql,),
+            )
+            return cur.rowcount
+
+        try:
+            return int(with_connection(_run))
+        except Exception:
+            # la tabla puede no existir si el worker de entrega nunca se inicio
+            return 0
+
+    def incremental_vacuum(self, max_pages: int) -> int:
+        """
+        devuelve al sistema hasta max_pages paginas libres; retorna las liberadas
+        """
+        def _run(conn):
+            before = int(conn.execute("PRAGMA freelist_count;").fetchone()[0])
+            if before <= 0:
+                return 0
+            # execute() avanza el pragma un solo paso (una pagina); executescript lo corre completo
+            conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+            after = int(conn.execute("PRAGMA freelist_count;").fetchone()[0])
+            return before - after
+
+        return int(with_connection(_run))
+
+    def checkpoint(self) -> None:
+        """
+        vuelca el WAL al archivo principal y lo trunca (las paginas liberadas se ven en el tamano)
+        """
+        with_connection(lambda conn: conn.execute("PRAGMA wal_checkpoint(TRUNCATE);").fetchall())
+
+    def optimize(self) -> None:
+        with_connection(lambda conn: conn.execute("PRAGMA optimize;").fetchall())
+
+    def stats(self) -> Dict[str, Any]:
+        def _run(conn):
+            existing = {
+                r[0]
+                for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';").fetchall()
+            }
+            return {
+                "page_size": int(conn.execute("PRAGMA page_size;").fetchone()[0]),
+                "page_count": int(conn.execute("PRAGMA page_count;").fetchone()[0]),
+                "freelist_count": int(conn.execute("PRAGMA freelist_count;").fetchone()[0]),
+                "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(
+                    int(conn.execute("PRAGMA auto_vacuum;").fetchone()[0]), "?"
+                ),
+                "rows": {
+                    name: int(conn.execute(f"SELECT COUNT(*) FROM {name};").fetchone()[0])
+                    for name in _TABLES
+                    if name in existing
+                },
+            }
+
+        data = with_connection(_run)
+        path = str(get_db_path())
+        data["path"] = path
+        data["file_bytes"] = os.path.getsize(path) if os.path.exists(path) else 0
+        wal = f"{path}-wal"
+        data["wal_bytes"] = os.path.getsize(wal) if os.path.exists(wal) else 0
+        return data
+
+
+maintenance_dao = MaintenanceDAO()
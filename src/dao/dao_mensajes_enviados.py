@@ -1,16 +1,49 @@
 from __future__ import annotations
 
+import atexit
 import json
 import threading
-from typing import Sequence
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from .dao_base import get_db_connection, with_connection
+import config
+
+from src.logger import logger
+
+from .dao_base import with_connection
+
+_INSERT_SQL = """
+    INSERT INTO mensajes_enviados (ts, subject, body, message_type, recipients, success)
+    VALUES (?, ?, ?, ?, ?, ?);
+"""
 
 
 class MensajesEnviadosDAO:
-    def __init__(self) -> None:
-        self._lock = threading.RLock()
+    """
+    Registro de emails enviados con escritura diferida (write-behind).
+    - insert_sent_message solo encola la fila y retorna.
+    - Un hilo escritor confirma lotes con executemany en una sola transaccion, al juntar
+      batch_size filas o a los flush_seconds de la primera fila pendiente.
+    - Cola acotada: con max_pending filas en espera el llamador escribe el lote (contrapresion);
+      si la base no acepta escrituras reintenta hasta block_seconds y luego descarta la fila
+      mas antigua (se registra en el log y se cuenta en dropped_count()).
+    - Tomar y escribir un lote es una sola seccion critica: las filas se confirman en orden de llegada.
+    - flush() vacia la cola en forma sincronica; se registra en atexit.
+    """
+
+    def __init__(self, batch_size: int, flush_seconds: float, max_pending: int, block_seconds: float) -> None:
+        self.batch_size = max(1, int(batch_size))
+        self.flush_seconds = max(0.0, float(flush_seconds))
+        self.max_pending = max(self.batch_size, int(max_pending))
+        self.block_seconds = max(0.0, float(block_seconds))
+        self._cond = threading.Condition()
+        # (instante de encolado, fila): la edad del lote sale de la fila mas antigua que sigue en cola
+        self._pending: List[Tuple[float, Tuple]] = []
+        self._dropped = 0
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
         self._ensure_schema()
+        atexit.register(self.flush)
 
     def _ensure_schema(self) -> None:
         def _init(conn):
@@ -31,9 +64,15 @@ class MensajesEnviadosDAO:
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_mensajes_ts ON mensajes_enviados(ts);"
             )
+            # indices compuestos para filtrar por tipo/resultado y paginar por (ts, id) sin ordenar
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_mensajes_type_ts ON mensajes_enviados(message_type, ts, id);"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_mensajes_success_ts ON mensajes_enviados(success, ts, id);"
+            )
 
-        with self._lock:
-            with_connection(_init)
+        with_connection(_init)
 
     def insert_sent_message(
         self,
@@ -58,17 +97,185 @@ class MensajesEnviadosDAO:
             int(bool(success)),
         )
 
-        def _insert(conn):
-            conn.execute(
-                """
-                INSERT INTO mensajes_enviados (ts, subject, body, message_type, recipients, success)
-                VALUES (?, ?, ?, ?, ?, ?);
-                """,
-                payload,
-            )
+        deadline = time.monotonic() + self.block_seconds
+        while True:
+            dropped = None
+            with self._cond:
+                self._ensure_writer()
+                now = time.monotonic()
+                if len(self._pending) >= self.max_pending and now >= deadline:
+                    _, dropped = self._pending.pop(0)
+                    self._dropped += 1
+                    total = self._dropped
+                if len(self._pending) < self.max_pending:
+                    self._pending.append((now, payload))
+                    if len(self._pending) >= self.batch_size:
+                        self._cond.notify()
+                    if dropped is None:
+                        return
+            if dropped is not None:
+                logger.log(
+                    f"Cola de mensajes_enviados llena ({self.max_pending}) y la base no acepta escrituras: "
+                    f"se descarta la fila mas antigua ({dropped[0]} '{dropped[1]}'). Descartadas: {total}",
+                    origin="DB/MENSAJES",
+                )
+                return
+            # cola llena: el llamador escribe lo pendiente; si la base lo rechaza espera y reintenta
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(max(0.0, min(max(self.flush_seconds, 1.0), deadline - time.monotonic())))
+
+    def query_messages(
+        self,
+        message_type: Optional[str] = None,
+        success: Optional[bool] = None,
+        ts_from: Optional[str] = None,
+        ts_to: Optional[str] = None,
+        subject: Optional[str] = None,
+        after: Optional[Sequence[Any]] = None,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        historial del mas reciente al mas antiguo con paginacion por clave (ts, id).
+        ts_from incluido, ts_to excluido (strings ISO comparables); subject busca por subcadena.
+        solo lee: lo encolado aparece cuando lo confirma el escritor (a lo sumo flush_seconds).
+        after: cursor [ts, id] de la ultima fila de la pagina anterior.
+        retorna {"items": [...], "next": cursor o None}
+        """
+        limit = max(1, min(int(limit), 500))
+        where: List[str] = []
+        params: List[Any] = []
+        if message_type:
+            where.append("message_type = ?")
+            params.append(message_type)
+        if success is not None:
+            where.append("success = ?")
+            params.append(int(bool(success)))
+        if ts_from:
+            where.append("ts >= ?")
+            params.append(ts_from)
+        if ts_to:
+            where.append("ts < ?")
+            params.append(ts_to)
+        if subject:
+            where.append("subject LIKE ? ESCAPE '\\'")
+            escaped = subject.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if after:
+            where.append("(ts, id) < (?, ?)")
+            params.extend([str(after[0]), int(after[1])])
+
+        sql = (
+            "SELECT id, ts, subject, body, message_type, recipients, success FROM mensajes_enviados"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY ts DESC, id DESC LIMIT ?;"
+        )
+        params.append(limit + 1)
+
+        def _select(conn):
+            return conn.execute(sql, params).fetchall()
+
+        rows = [dict(r) for r in with_connection(_select)]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        for row in rows:
+            row["success"] = bool(row["success"])
+            try:
+                recipients = json.loads(row["recipients"])
+            except (TypeError, ValueError):
+                recipients = row["recipients"]
+            row["recipients"] = recipients
+        last = rows[-1] if rows else None
+        return {
+            "items": rows,
+            "next": [last["ts"], last["id"]] if has_more and last else None,
+        }
+
+    def list_message_types(self) -> List[str]:
+        def _select(conn):
+            # recorre idx_mensajes_type_ts saltando entre valores distintos
+            return conn.execute(
+                "SELECT DISTINCT message_type FROM mensajes_enviados ORDER BY message_type;"
+            ).fetchall()
+
+        return [r[0] for r in with_connection(_select)]
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def dropped_count(self) -> int:
+        """
+        filas descartadas por cola llena desde el arranque
+        """
+        with self._cond:
+            return self._dropped
+
+    def flush(self) -> int:
+        """
+        escribe todo lo pendiente; retorna la cantidad de filas confirmadas
+        """
+        written = 0
+        while True:
+            n = self._write_next(self.max_pending)
+            if not n:
+                return written
+            written += n
+
+    # ----------------- escritor -----------------
+
+    def _ensure_writer(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="mensajes-writer", daemon=True)
+            self._thread.start()
+
+    def _take(self, limit: int) -> List[Tuple[float, Tuple]]:
+        with self._cond:
+            batch = self._pending[:limit]
+            del self._pending[:limit]
+            return batch
+
+    def _write_next(self, limit: int) -> int:
+        """
+        toma y escribe el proximo lote bajo el mismo lock (orden de insercion entre el hilo
+        escritor y flush()); retorna las filas confirmadas
+        """
+        with self._write_lock:
+            batch = self._take(limit)
+            if not batch:
+                return 0
+            try:
+                with_connection(lambda conn: conn.executemany(_INSERT_SQL, [row for _, row in batch]))
+            except Exception:
+                # la base no acepto el lote: vuelve entero al frente de la cola (con su instante de encolado)
+                with self._cond:
+                    self._pending[:0] = batch
+                raise
+            return len(batch)
 
-        with self._lock:
-            with_connection(_insert)
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if len(self._pending) >= self.batch_size:
+                        break
+                    if self._pending:
+                        remaining = self._pending[0][0] + self.flush_seconds - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+            try:
+                self._write_next(self.batch_size)
+            except Exception:
+                time.sleep(max(self.flush_seconds, 1.0))
 
 
-mensajes_enviados_dao = MensajesEnviadosDAO()
+mensajes_enviados_dao = MensajesEnviadosDAO(
+    batch_size=config.MENSAJES_WRITE_BATCH,
+    flush_seconds=config.MENSAJES_WRITE_FLUSH_SECONDS,
+    max_pending=config.MENSAJES_WRITE_MAX_PENDING,
+    block_seconds=config.MENSAJES_WRITE_BLOCK_SECONDS,
+)
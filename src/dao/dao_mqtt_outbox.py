@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List
+
+import config
+
+from .dao_base import with_connection
+
+KIND_STATE = "state"
+KIND_EVENT = "event"
+
+
+class MqttOutboxDAO:
+    """
+    Outbox persistente de publicaciones MQTT pendientes (broker no disponible).
+    - state: snapshots retenidos; se conserva solo el ultimo por topico.
+    - event: eventos; se conservan todos en orden FIFO.
+    Limites: antiguedad maxima y cantidad maxima de filas (se descartan los eventos mas viejos).
+    """
+
+    def __init__(self, max_rows: int, max_age_seconds: float) -> None:
+        self._lock = threading.RLock()
+        self.max_rows = max(1, int(max_rows))
+        self.max_age_seconds = float(max_age_seconds)
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        def _init(conn):
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS mqtt_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    topic TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    qos INTEGER NOT NULL,
+                    retain INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_mqtt_outbox_kind ON mqtt_outbox(kind, id);"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_mqtt_outbox_topic ON mqtt_outbox(topic, kind);"
+            )
+
+        with self._lock:
+            with_connection(_init)
+
+    def enqueue(self, topic: str, payload: str, qos: int, retain: bool, kind: str) -> None:
+        """
+        guarda una publicacion pendiente; para kind=state reemplaza el snapshot previo del topico
+        """
+        row = (topic, payload, int(qos), int(bool(retain)), kind, time.time())
+
+        def _insert(conn):
+            if kind == KIND_STATE:
+                conn.execute(
+                    "DELETE FROM mqtt_outbox WHERE topic = ? AND kind = ?;",
+                    (topic, KIND_STATE),
+                )
+            conn.execute(
+                """
+                INSERT INTO mqtt_outbox (topic, payload, qos, retain, kind, created_at)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                row,
+            )
+            self._enforce_limits(conn)
+
+        with self._lock:
+            with_connection(_insert)
+
+    def _enforce_limits(self, conn) -> None:
+        if self.max_age_seconds > 0:
+            conn.execute(
+                "DELETE FROM mqtt_outbox WHERE created_at < ?;",
+                (time.time() - self.max_age_seconds,),
+            )
+        total = conn.execute("SELECT COUNT(*) FROM mqtt_outbox;").fetchone()[0]
+        excess = total - self.max_rows
+        if excess > 0:
+            # los snapshots son uno por topico; se sacrifican los eventos mas viejos
+            conn.execute(
+                """
+                DELETE FROM mqtt_outbox WHERE id IN (
+                    SELECT id FROM mqtt_outbox WHERE kind = ? ORDER BY id LIMIT ?
+                );
+                """,
+                (KIND_EVENT, excess),
+            )
+
+    def fetch_batch(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        retorna hasta 'limit' pendientes: primero snapshots de estado, luego eventos en orden FIFO
+        """
+        def _select(conn):
+            self._enforce_limits(conn)
+            rows = conn.execute(
+                """
+                SELECT id, topic, payload, qos, retain, kind FROM mqtt_outbox
+                ORDER BY CASE kind WHEN ? THEN 0 ELSE 1 END, id
+                LIMIT ?;
+                """,
+                (KIND_STATE, int(limit)),
+            ).fetchall()
+            return [dict(r) for r in rows]
+
+        with self._lock:
+            return with_connection(_select)
+
+    def delete(self, ids: List[int]) -> None:
+        if not ids:
+            return
+
+        def _delete(conn):
+            conn.executemany("DELETE FROM mqtt_outbox WHERE id = ?;", [(int(i),) for i in ids])
+
+        with self._lock:
+            with_connection(_delete)
+
+    def count(self) -> int:
+        def _count(conn):
+            return conn.execute("SELECT COUNT(*) FROM mqtt_outbox;").fetchone()[0]
+
+        with self._lock:
+            return int(with_connection(_count))
+
+
+mqtt_outbox_dao = MqttOutboxDAO(
+    max_rows=config.MQTT_OUTBOX_MAX_ROWS,
+    max_age_seconds=config.MQTT_OUTBOX_MAX_AGE_SECONDS,
+)
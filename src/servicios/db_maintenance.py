@@ -0,0 +1,87 @@
+"""
+Mantenimiento periodico de la base SQLite local (PANELEXEMYS_DATA_DIR).
+
+Cada corrida, acotada en trabajo:
+1. mensajes_enviados mas viejos que DB_RETENTION_DAYS pasan al resumen diario
+   (mensajes_diarios: cantidad por dia/tipo/resultado) y se borran, en lotes;
+2. alarm_outbox: se borran los enviados/descartados mas viejos que DB_OUTBOX_RETENTION_DAYS;
+3. incremental_vacuum de a lo sumo DB_VACUUM_MAX_PAGES paginas;
+4. PRAGMA optimize, checkpoint del WAL y reporte de tamano/paginas (get_report).
+La primera corrida convierte la base a auto_vacuum=INCREMENTAL si hace falta.
+"""
+
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from src.dao.dao_maintenance import maintenance_dao
+from src.logger import Logosaurio
+from src.utils import timebox
+
+
+class DbMaintenance:
+    """
+    job de mantenimiento; run() se registra en la agenda (NotifScheduler)
+    """
+
+    def __init__(
+        self,
+        logger: Logosaurio,
+        retention_days: int,
+        outbox_retention_days: int,
+        rollup_batch: int,
+        max_batches: int,
+        vacuum_max_pages: int,
+    ):
+        self.logger = logger
+        self.retention_days = max(1, int(retention_days))
+        self.outbox_retention_days = max(1, int(outbox_retention_days))
+        self.rollup_batch = max(1, int(rollup_batch))
+        self.max_batches = max(1, int(max_batches))
+        self.vacuum_max_pages = max(1, int(vacuum_max_pages))
+        self._origen = "DB/MANT"
+        self._lock = threading.Lock()
+        self._converted = False
+        self._report: Dict[str, Any] = {}
+
+    def run(self) -> Dict[str, Any]:
+        with self._lock:
+            if not self._converted:
+                if maintenance_dao.ensure_incremental_vacuum():
+                    self.logger.log("Base convertida a auto_vacuum=INCREMENTAL (VACUUM completo).", origin=self._origen)
+                self._converted = True
+
+            now = timebox.utc_now()
+            cutoff = timebox.utc_iso(now - timedelta(days=self.retention_days))
+            purged = 0
+            for _ in range(self.max_batches):
+                n = maintenance_dao.rollup_and_purge_messages(cutoff, self.rollup_batch)
+                purged += n
+                if n < self.rollup_batch:
+                    break
+
+            outbox_cutoff = (now - timedelta(days=self.outbox_retention_days)).strftime("%Y-%m-%d %H:%M:%S")
+            outbox_purged = maintenance_dao.purge_alarm_outbox(outbox_cutoff)
+            freed = maintenance_dao.incremental_vacuum(self.vacuum_max_pages)
+            maintenance_dao.optimize()
+            maintenance_dao.checkpoint()
+            stats = maintenance_dao.stats()
+
+            self._report = {
+                "ts": timebox.utc_iso(),
+                "mensajes_resumidos": purged,
+                "outbox_borrados": outbox_purged,
+                "paginas_liberadas": freed,
+                "stats": stats,
+            }
+            if purged or outbox_purged or freed:
+                self.logger.log(
+                    f"Mantenimiento DB: {purged} mensajes resumidos, {outbox_purged} del outbox borrados, "
+                    f"{freed} paginas liberadas. Tamano {stats['file_bytes'] // 1024} KB "
+                    f"({stats['freelist_count']} paginas libres).",
+                    origin=self._origen,
+                )
+            return self._report
+
+    def get_report(self) -> Optional[Dict[str, Any]]:
+        return dict(self._report) if self._report else None
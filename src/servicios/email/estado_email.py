@@ -1,7 +1,7 @@
 import time
 import subprocess
 import platform
-from typing import Literal, Dict, Optional, Any
+from typing import Literal, Dict, Optional
 
 import requests
 
@@ -117,7 +117,6 @@ def start_email_health_monitor(logger: Logosaurio, mqtt_manager) -> None:
     con subclaves smtp, ping_local y ping_remoto.
     """
     publisher = MqttTopicPublisher(logger=logger, manager=mqtt_manager)
-    last_payload: Optional[Dict[str, Any]] = None
 
     while True:
         try:
@@ -127,14 +126,13 @@ def start_email_health_monitor(logger: Logosaurio, mqtt_manager) -> None:
                 **estados,
                 "ts": timebox.utc_iso(),
             }
-            if enriched_payload != last_payload:
-                publisher.publish_json(
-                    config.MQTT_TOPIC_EMAIL_ESTADO,
-                    enriched_payload,
-                    qos=config.MQTT_PUBLISH_QOS_STATE,
-                    retain=config.MQTT_PUBLISH_RETAIN_STATE,
-                )
-                last_payload = enriched_payload
+            # 'ts' cambia en cada ciclo: la deteccion de cambios lo ignora
+            publisher.publish_state_json(
+                config.MQTT_TOPIC_EMAIL_ESTADO,
+                enriched_payload,
+                qos=config.MQTT_PUBLISH_QOS_STATE,
+                retain=config.MQTT_PUBLISH_RETAIN_STATE,
+            )
             try:
                 logger.log(f"server_email_estado: {enriched_payload}", origin="EMAIL/CHK")
             except Exception:
@@ -50,49 +50,67 @@ class MensageloClient:
 
         while True:
             attempt += 1
-            try:
-                resp = requests.post(
-                    self._send_async_url,
-                    headers=self._headers,
-                    data=json.dumps(payload, ensure_ascii=False),
-                    timeout=self.timeout,
-                )
-            except requests.RequestException as e:
-                # fallo de red o timeout
-                if attempt <= self.max_retries:
-                    time.sleep(min(backoff, self.backoff_max))
-                    backoff = min(backoff * 2.0, self.backoff_max)
-                    continue
-                return False, f"error de red o timeout tras {attempt} intentos: {e}"
+            ok, msg, retryable = self._post_once(payload)
+            if ok or not retryable:
+                return ok, msg
+            if attempt <= self.max_retries:
+                time.sleep(min(backoff, self.backoff_max))
+                backoff = min(backoff * 2.0, self.backoff_max)
+                continue
+            return False, f"{msg} (tras {attempt} intentos)"
 
-            # HTTP recibido
-            if resp.status_code == 202:
-                # esperado: {"ok":true, "queued":true, "message":"..."}
-                try:
-                    data = resp.json()
-                except ValueError:
-                    return False, "respuesta 202 sin JSON valido"
-                ok = bool(data.get("ok")) and bool(data.get("queued"))
-                msg = str(data.get("message", ""))
-                return ok, msg or "pedido aceptado"
-            elif resp.status_code in (401, 403):
-                return False, "no autorizado: ver API key"
-            elif resp.status_code in (429, 503):
-                # sobrecarga/cola llena: reintentar con backoff
-                if attempt <= self.max_retries:
-                    time.sleep(min(backoff, self.backoff_max))
-                    backoff = min(backoff * 2.0, self.backoff_max)
-                    continue
-                try:
-                    err = resp.json().get("detail", "")
-                except Exception:
-                    err = resp.text
-                return False, f"servicio saturado: {err}"
-            else:
-                # otros codigos: no reintentar salvo que quieras ser mas agresivo
-                try:
-                    err = resp.json()
-                except Exception:
-                    err = resp.text
-                return False, f"error http {resp.status_code}: {err}"
+    def enqueue_email_once(self,
+                           recipients: List[str],
+                           subject: str,
+                           body: str,
+                           message_type: Optional[str] = None) -> Tuple[bool, str, bool]:
+        """
+        Un solo intento de POST a /send_async, sin esperas. Retorna (ok, msg, retryable).
+        retryable=True para fallas transitorias (red, timeout, 429, 503): el reintento lo agenda el llamador.
+        """
+        payload = {
+            "recipients": recipients,
+            "subject": subject,
+            "body": body,
+            "message_type": message_type,
+        }
+        return self._post_once(payload)
+
+    def _post_once(self, payload: dict) -> Tuple[bool, str, bool]:
+        try:
+            resp = requests.post(
+                self._send_async_url,
+                headers=self._headers,
+                data=json.dumps(payload, ensure_ascii=False),
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            # fallo de red o timeout
+            return False, f"error de red o timeout: {e}", True
 
+        # HTTP recibido
+        if resp.status_code == 202:
+            # esperado: {"ok":true, "queued":true, "message":"..."}
+            try:
+                data = resp.json()
+            except ValueError:
+                return False, "respuesta 202 sin JSON valido", False
+            ok = bool(data.get("ok")) and bool(data.get("queued"))
+            msg = str(data.get("message", ""))
+            return ok, msg or "pedido aceptado", False
+        elif resp.status_code in (401, 403):
+            return False, "no autorizado: ver API key", False
+        elif resp.status_code in (429, 503):
+            # sobrecarga/cola llena: reintentable
+            try:
+                err = resp.json().get("detail", "")
+            except Exception:
+                err = resp.text
+            return False, f"servicio saturado: {err}", True
+        else:
+            # otros codigos: no reintentar salvo que quieras ser mas agresivo
+            try:
+                err = resp.json()
+            except Exception:
+                err = resp.text
+            return False, f"error http {resp.status_code}: {err}", False
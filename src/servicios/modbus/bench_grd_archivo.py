@@ -0,0 +1,159 @@
+"""
+Benchmark del archivo columnar de GRD (grd_archivo) contra el camino JSON sobre HTTP
+(/api/grd/history servido localmente con la misma forma que modbus-mw-service).
+
+Uso:
+    python -m src.servicios.modbus.bench_grd_archivo [--grds 200] [--years 3] [--queries 200]
+
+Genera transiciones sinteticas (una caida cada ~--gap horas por GRD) y mide, por consulta
+de un GRD al azar y una ventana de 30 dias al azar:
+- http:    GET + json + filtrado por rango + disponibilidad en Python (como la vista);
+- archivo: scan memmap del rango + disponibilidad vectorizada.
+Informa tambien el tamano en disco/red de cada representacion.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+
+
+def _synthetic(n_grds: int, years: float, gap_hours: float, seed: int) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    rng = np.random.default_rng(seed)
+    end = int(time.time())
+    start = end - int(years * 365 * 86400)
+    data = {}
+    for grd_id in range(1, n_grds + 1):
+        n = max(2, int((end - start) / (gap_hours * 3600)))
+        ts = np.sort(rng.integers(start, end, size=n * 2))
+        states = np.tile(np.array([0, 1], dtype=np.int8), n)
+        data[grd_id] = (ts, states)
+    return data
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _serve(data: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> ThreadingHTTPServer:
+    # respuestas pre-serializadas: se mide transporte y parseo, no la generacion
+    bodies = {
+        grd_id: json.dumps({
+            "data": [{"timestamp": _iso(t), "conectado": int(s)} for t, s in zip(ts, states)],
+            "connected_before": 0,
+            "range_start": _iso(ts[0]),
+            "range_end": _iso(ts[-1]),
+            "total_periods": 1,
+        }).encode("utf-8")
+        for grd_id, (ts, states) in data.items()
+    }
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            query = parse_qs(urlparse(self.path).query)
+            body = bodies.get(int(query.get("grd_id", ["0"])[0]), b"{}")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.bodies = bodies
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _availability_json(payload: dict, ts_from: int, ts_to: int) -> float:
+    rows = []
+    for item in payload.get("data", []):
+        ts = int(datetime.strptime(item["timestamp"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp())
+        rows.append((ts, int(item["conectado"])))
+    state = int(payload.get("connected_before", 0))
+    for ts, value in rows:
+        if ts > ts_from:
+            break
+        state = value
+    connected, cursor = 0, ts_from
+    for ts, value in rows:
+        if ts <= ts_from:
+            continue
+        if ts >= ts_to:
+            break
+        if state == 1:
+            connected += ts - cursor
+        cursor, state = ts, value
+    if state == 1:
+        connected += ts_to - cursor
+    return connected / (ts_to - ts_from) * 100
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark archivo columnar de GRD vs JSON/HTTP")
+    parser.add_argument("--grds", type=int, default=200, help="cantidad de GRD")
+    parser.add_argument("--years", type=float, default=3.0, help="anos de historial por GRD")
+    parser.add_argument("--gap", type=float, default=12.0, help="horas promedio entre caidas")
+    parser.add_argument("--queries", type=int, default=200, help="consultas por camino")
+    parser.add_argument("--dir", default="", help="directorio del archivo (por defecto en /tmp)")
+    args = parser.parse_args(argv)
+
+    base_dir = args.dir or tempfile.mkdtemp(prefix="panelexemys-grd-archivo-")
+    # el modulo resuelve su directorio por defecto desde config; el benchmark usa uno propio
+    from src.servicios.modbus.grd_archivo import GrdArchive
+
+    data = _synthetic(args.grds, args.years, args.gap, seed=7)
+    archive = GrdArchive(base_dir)
+    started = time.perf_counter()
+    disk = sum(archive.write(grd_id, ts, states) for grd_id, (ts, states) in data.items())
+    build = time.perf_counter() - started
+    server = _serve(data)
+    wire = sum(len(b) for b in server.bodies.values())
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    session = requests.Session()
+
+    rnd = random.Random(11)
+    queries = []
+    for _ in range(args.queries):
+        grd_id = rnd.randint(1, args.grds)
+        ts = data[grd_id][0]
+        ts_from = rnd.randint(int(ts[0]), int(ts[-1]) - 30 * 86400)
+        queries.append((grd_id, ts_from, ts_from + 30 * 86400))
+
+    started = time.perf_counter()
+    http_results = []
+    for grd_id, ts_from, ts_to in queries:
+        payload = session.get(f"{base_url}/api/grd/history", params={"grd_id": grd_id, "window": "todo", "page": 0}).json()
+        http_results.append(_availability_json(payload, ts_from, ts_to))
+    http_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    archive_results = [archive.availability(g, a, b)["porcentaje"] for g, a, b in queries]
+    archive_elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    mismatch = sum(1 for x, y in zip(http_results, archive_results) if abs(x - y) > 0.01)
+    n_rows = sum(ts.size for ts, _ in data.values())
+    print(f"directorio: {base_dir}")
+    print(f"GRD: {args.grds}  transiciones: {n_rows}  consultas: {args.queries} (ventana 30 dias)")
+    print(f"{'camino':<10}{'bytes':>14}{'ms/consulta':>14}")
+    print(f"{'http':<10}{wire:>14}{http_elapsed / len(queries) * 1000:>14.2f}")
+    print(f"{'archivo':<10}{disk:>14}{archive_elapsed / len(queries) * 1000:>14.2f}")
+    print(f"armado del archivo: {build:.2f} s; diferencias de disponibilidad > 0.01%: {mismatch}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
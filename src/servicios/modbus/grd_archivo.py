@@ -0,0 +1,240 @@
+"""
+Archivo columnar de transiciones de conexion por GRD (solo lectura por rangos).
+
+Un archivo por GRD (grd_<id>.bin), reemplazado en forma atomica al escribir:
+    cabecera  <8s magic, u4 bloque, u1 tipo de delta, 3x pad, i8 n>
+    anclas    i8[ceil(n / bloque)]   instante absoluto del primer elemento de cada bloque
+    deltas    u4|i8[n]               ts[i] - ts[i-1] (el primero de cada bloque vale 0)
+    estados   u1[ceil(n / 8)]        np.packbits de conectado (1 bit por transicion)
+
+Los deltas se guardan en u4 si entran (lo normal: segundos entre transiciones) y si no en i8.
+La lectura usa np.memmap: un rango decodifica solo los bloques que toca (cumsum desde el ancla),
+y la disponibilidad se calcula sobre esos arrays sin armar filas.
+
+Herramienta fuera de linea (la app no lo lee ni lo regenera); se arma a pedido desde el espejo:
+    python -m src.servicios.modbus.grd_archivo [--dir DIR] [--grd ID ...]
+Ver bench_grd_archivo.py para la comparacion contra el camino JSON/HTTP.
+"""
+
+import argparse
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+MAGIC = b"GRDARCH1"
+_HEADER = struct.Struct("<8sIB3xq")
+_DELTA_TYPES = {1: np.dtype("<u4"), 2: np.dtype("<i8")}
+DEFAULT_BLOCK = 1024
+
+
+class _Archive:
+    """
+    vista memmap de un archivo abierto
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as fh:
+            magic, block, dtype_code, n = _HEADER.unpack(fh.read(_HEADER.size))
+        if magic != MAGIC or dtype_code not in _DELTA_TYPES or block <= 0 or block % 8:
+            raise ValueError(f"archivo GRD invalido: {path}")
+        self.block = int(block)
+        self.n = int(n)
+        n_blocks = -(-self.n // self.block)
+        delta_type = _DELTA_TYPES[dtype_code]
+        offset = _HEADER.size
+        self.anchors = np.memmap(path, dtype="<i8", mode="r", offset=offset, shape=(n_blocks,)) if n_blocks else np.empty(0, "<i8")
+        offset += n_blocks * 8
+        self.deltas = np.memmap(path, dtype=delta_type, mode="r", offset=offset, shape=(self.n,)) if self.n else np.empty(0, delta_type)
+        offset += self.n * delta_type.itemsize
+        n_packed = -(-self.n // 8)
+        self.packed = np.memmap(path, dtype="u1", mode="r", offset=offset, shape=(n_packed,)) if n_packed else np.empty(0, "u1")
+
+    def decode(self, b0: int, b1: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        instantes y estados de los bloques [b0, b1)
+        """
+        lo, hi = b0 * self.block, min(b1 * self.block, self.n)
+        if lo >= hi:
+            return np.empty(0, np.int64), np.empty(0, np.int8)
+        ts = self.deltas[lo:hi].astype(np.int64)
+        # cada bloque arranca de su ancla: un error de deltas no se arrastra al resto
+        starts = np.arange(0, hi - lo, self.block)
+        ts[starts] = 0
+        ts = np.cumsum(ts)
+        block_base = np.repeat(self.anchors[b0:b1] - ts[starts], np.diff(np.append(starts, hi - lo)))
+        ts += block_base
+        states = np.unpackbits(self.packed[lo // 8: -(-hi // 8)])[: hi - lo].astype(np.int8)
+        return ts, states
+
+
+class GrdArchive:
+    """
+    archivos por GRD bajo base_dir
+    """
+
+    def __init__(self, base_dir: str, block: int = DEFAULT_BLOCK):
+        if block <= 0 or block % 8:
+            raise ValueError("el bloque debe ser multiplo de 8")
+        self.base_dir = base_dir
+        self.block = int(block)
+        self._open: Dict[int, Tuple[float, _Archive]] = {}
+
+    def path(self, grd_id: int) -> str:
+        return os.path.join(self.base_dir, f"grd_{int(grd_id)}.bin")
+
+    # ----------------- escritura -----------------
+
+    def write(self, grd_id: int, ts: Iterable[int], states: Iterable[int]) -> int:
+        """
+        reemplaza el archivo del GRD con las transiciones dadas (se ordenan por instante).
+        retorna los bytes escritos
+        """
+        ts_arr = np.asarray(list(ts) if not isinstance(ts, np.ndarray) else ts, dtype=np.int64)
+        st_arr = np.asarray(list(states) if not isinstance(states, np.ndarray) else states, dtype=np.int8)
+        if ts_arr.shape != st_arr.shape:
+            raise ValueError("ts y estados deben tener el mismo largo")
+        order = np.argsort(ts_arr, kind="stable")
+        ts_arr, st_arr = ts_arr[order], st_arr[order]
+        n = int(ts_arr.size)
+
+        deltas = np.diff(ts_arr, prepend=ts_arr[:1]) if n else ts_arr
+        anchors = ts_arr[:: self.block]
+        deltas[:: self.block] = 0
+        dtype_code = 1 if (not n or int(deltas.max()) <= np.iinfo(np.uint32).max) else 2
+        payload = b"".join((
+            _HEADER.pack(MAGIC, self.block, dtype_code, n),
+            anchors.astype("<i8").tobytes(),
+            deltas.astype(_DELTA_TYPES[dtype_code]).tobytes(),
+            np.packbits(st_arr == 1).tobytes(),
+        ))
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        path = self.path(grd_id)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(payload)
+        os.replace(tmp, path)
+        self._open.pop(int(grd_id), None)
+        return len(payload)
+
+    def append(self, grd_id: int, ts: Iterable[int], states: Iterable[int]) -> int:
+        """
+        agrega transiciones posteriores a la ultima archivada (las anteriores o repetidas se ignoran)
+        """
+        new_ts = np.asarray(list(ts), dtype=np.int64)
+        new_st = np.asarray(list(states), dtype=np.int8)
+        old_ts, old_st = self.scan(grd_id)
+        if old_ts.size:
+            keep = new_ts > old_ts[-1]
+            new_ts, new_st = new_ts[keep], new_st[keep]
+        if not new_ts.size:
+            return 0
+        self.write(grd_id, np.concatenate((old_ts, new_ts)), np.concatenate((old_st, new_st)))
+        return int(new_ts.size)
+
+    def build_from_mirror(self, dao, grd_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+        """
+        (re)genera los archivos desde el espejo SQLite (GrdHistorialDAO), por defecto de todos
+        los GRD sincronizados; retorna grd_id -> transiciones
+        """
+        out = {}
+        for grd_id in (dao.sync_state().keys() if grd_ids is None else grd_ids):
+            rows = dao.transitions(grd_id)
+            self.write(grd_id, [r[0] for r in rows], [r[1] for r in rows])
+            out[int(grd_id)] = len(rows)
+        return out
+
+    # ----------------- lectura -----------------
+
+    def _archive(self, grd_id: int) -> Optional[_Archive]:
+        path = self.path(grd_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._open.get(int(grd_id))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        archive = _Archive(path)
+        self._open[int(grd_id)] = (mtime, archive)
+        return archive
+
+    def count(self, grd_id: int) -> int:
+        archive = self._archive(grd_id)
+        return archive.n if archive is not None else 0
+
+    def scan(self, grd_id: int, ts_from: Optional[int] = None, ts_to: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        transiciones con ts en [ts_from, ts_to] (ambos opcionales), en orden cronologico
+        """
+        archive = self._archive(grd_id)
+        if archive is None or not archive.n:
+            return np.empty(0, np.int64), np.empty(0, np.int8)
+        anchors = archive.anchors
+        b0 = 0 if ts_from is None else max(0, int(np.searchsorted(anchors, ts_from, side="right")) - 1)
+        b1 = anchors.size if ts_to is None else int(np.searchsorted(anchors, ts_to, side="right"))
+        ts, states = archive.decode(b0, b1)
+        lo = 0 if ts_from is None else int(np.searchsorted(ts, ts_from, side="left"))
+        hi = ts.size if ts_to is None else int(np.searchsorted(ts, ts_to, side="right"))
+        return ts[lo:hi], states[lo:hi]
+
+    def state_at(self, grd_id: int, ts: int) -> Optional[int]:
+        """
+        estado vigente en ts (ultima transicion con instante <= ts) o None
+        """
+        archive = self._archive(grd_id)
+        if archive is None or not archive.n:
+            return None
+        b = int(np.searchsorted(archive.anchors, ts, side="right")) - 1
+        if b < 0:
+            return None
+        block_ts, block_states = archive.decode(b, b + 1)
+        pos = int(np.searchsorted(block_ts, ts, side="right")) - 1
+        return int(block_states[pos])
+
+    def availability(self, grd_id: int, ts_from: int, ts_to: int, default_state: int = 0) -> Dict[str, float]:
+        """
+        segundos conectado y porcentaje en [ts_from, ts_to); el estado previo a la primera
+        transicion archivada es default_state
+        """
+        ts_from, ts_to = int(ts_from), int(ts_to)
+        span = max(0, ts_to - ts_from)
+        if not span:
+            return {"connected_seconds": 0.0, "seconds": 0.0, "porcentaje": 0.0, "caidas": 0}
+        initial = self.state_at(grd_id, ts_from)
+        ts, states = self.scan(grd_id, ts_from + 1, ts_to - 1)
+        edges = np.concatenate(([ts_from], ts, [ts_to]))
+        values = np.concatenate(([default_state if initial is None else initial], states))
+        durations = np.diff(edges)
+        connected = float(durations[values == 1].sum())
+        # caidas que empiezan dentro del rango (transiciones 1 -> 0)
+        outages = int(np.count_nonzero((values[1:] == 0) & (values[:-1] == 1)))
+        return {
+            "connected_seconds": connected,
+            "seconds": float(span),
+            "porcentaje": round(connected / span * 100, 3),
+            "caidas": outages,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Regenera el archivo columnar de GRD desde el espejo SQLite")
+    parser.add_argument("--dir", default=os.path.join(config.PANELEXEMYS_DATA_DIR, "grd_archivo"), help="directorio del archivo")
+    parser.add_argument("--grd", type=int, action="append", help="GRD a regenerar (por defecto todos los sincronizados)")
+    args = parser.parse_args(argv)
+
+    from src.dao.dao_grd_historial import grd_historial_dao
+
+    built = GrdArchive(args.dir).build_from_mirror(grd_historial_dao, args.grd)
+    print(f"directorio: {args.dir}")
+    print(f"GRD: {len(built)}  transiciones: {sum(built.values())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
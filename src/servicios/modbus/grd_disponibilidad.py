@@ -0,0 +1,173 @@
+"""
+Resumen diario de disponibilidad por GRD (tabla grd_disponibilidad_diaria).
+
+- run() (agenda, job "disponibilidad_grd") recalcula por GRD solo desde el dia mas antiguo
+  que cambio en el espejo (GrdHistorySync.drain_touched) o, si no hubo cambios, el ultimo dia
+  resumido (el dia en curso se extiende hasta ahora).
+- Por dia UTC: segundos conectado, segundos con estado conocido y caidas (transiciones 1 -> 0),
+  mas los acumulados desde el primer dia; calculo vectorizado sobre las transiciones.
+- worst() resuelve cualquier periodo de dias con dos busquedas por clave por GRD
+  (acumulado al final menos acumulado del dia anterior al inicio).
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.dao.dao_grd_historial import GrdHistorialDAO, grd_historial_dao
+from src.logger import Logosaurio, logger as default_logger
+from src.servicios.modbus.grd_historial import GrdHistorySync, grd_historial
+from src.utils import timebox
+
+DAY = 86400
+
+
+def _day_start(ts: int) -> int:
+    return int(ts) - int(ts) % DAY
+
+
+def _dia(ts: int) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _dia_epoch(dia: str) -> int:
+    return int(datetime.strptime(dia, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+class GrdAvailabilityRollup:
+    """
+    mantenimiento incremental del resumen diario y ranking de GRD por disponibilidad
+    """
+
+    def __init__(self, logger: Logosaurio, dao: GrdHistorialDAO, historial: GrdHistorySync):
+        self.logger = logger
+        self.dao = dao
+        self.historial = historial
+        self._origen = "GRD/DISP"
+        self._run_lock = threading.Lock()
+        self._report: Dict[str, Any] = {}
+
+    def recompute(self, grd_id: int, since_ts: int, now: Optional[int] = None) -> int:
+        """
+        recalcula los dias del GRD desde el de since_ts hasta hoy; retorna los dias escritos
+        """
+        now = int(time.time()) if now is None else int(now)
+        prev = self.dao.last_rollup(grd_id, before_dia=_dia(since_ts))
+        if prev is not None:
+            # los dias quedan contiguos: se retoma despues del ultimo dia anterior conservado
+            s0 = _dia_epoch(prev[0]) + DAY
+            base = np.array(prev[1:], dtype=np.int64)
+        else:
+            first = self.dao.first_ts(grd_id)
+            if first is None:
+                return 0
+            s0 = _day_start(first)
+            base = np.zeros(3, dtype=np.int64)
+        if s0 > now:
+            return 0
+
+        initial = self.dao.state_before(grd_id, s0)
+        rows = self.dao.transitions(grd_id, s0, now)
+        t = np.array([s0] + [r[0] for r in rows], dtype=np.int64)
+        st = np.array([-1 if initial is None else initial] + [r[1] for r in rows], dtype=np.int8)
+
+        # acumulado conectado/medido en cada transicion; entre transiciones crece con pendiente 0 o 1
+        dur = np.diff(np.append(t, now))
+        conn_at = np.concatenate(([0], np.cumsum(dur * (st == 1))))[: t.size]
+        med_at = np.concatenate(([0], np.cumsum(dur * (st >= 0))))[: t.size]
+        n_days = (_day_start(now) - s0) // DAY + 1
+        bounds = np.minimum(s0 + np.arange(n_days + 1, dtype=np.int64) * DAY, now)
+        k = np.searchsorted(t, bounds, side="right") - 1
+        conn_b = conn_at[k] + (bounds - t[k]) * (st[k] == 1)
+        med_b = med_at[k] + (bounds - t[k]) * (st[k] >= 0)
+        daily_conn = np.diff(conn_b)
+        daily_med = np.diff(med_b)
+        falls = t[1:][(st[1:] == 0) & (st[:-1] == 1)]
+        daily_falls = np.bincount((falls - s0) // DAY, minlength=n_days)[:n_days]
+
+        acum = base[:, None] + np.cumsum(np.vstack((daily_conn, daily_med, daily_falls)), axis=1)
+        out = [
+            (_dia(s0 + i * DAY), int(daily_conn[i]), int(daily_med[i]), int(daily_falls[i]),
+             int(acum[0, i]), int(acum[1, i]), int(acum[2, i]))
+            for i in range(n_days)
+        ]
+        return self.dao.replace_rollups(grd_id, _dia(s0), out)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        job de agenda: extiende el dia en curso y recalcula lo que cambio en el espejo
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return self._report
+        try:
+            now = int(time.time())
+            touched = self.historial.drain_touched()
+            bounds = self.dao.rollup_bounds()
+            grd_ids = set(self.dao.sync_state()) | set(touched)
+            days, errors = 0, 0
+            for grd_id in sorted(grd_ids):
+                last = bounds.get(grd_id)
+                since = _dia_epoch(last[1]) if last else 0
+                if grd_id in touched:
+                    since = min(since, touched[grd_id]) if last else touched[grd_id]
+                try:
+                    days += self.recompute(grd_id, since, now)
+                except Exception as exc:
+                    errors += 1
+                    # se reintenta en la proxima corrida desde el mismo instante
+                    if grd_id in touched:
+                        self.historial.mark_touched(grd_id, touched[grd_id])
+                    self.logger.log(f"Error resumiendo disponibilidad GRD {grd_id}: {exc}", origin=self._origen)
+            self._report = {
+                "ts": timebox.utc_iso(),
+                "grd": len(grd_ids),
+                "recalculados": len(touched),
+                "dias_escritos": days,
+                "errores": errors,
+            }
+            return self._report
+        finally:
+            self._run_lock.release()
+
+    def get_report(self) -> Optional[Dict[str, Any]]:
+        return dict(self._report) if self._report else None
+
+    def worst(self, days: int, limit: int = 10, now: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        GRD con menor disponibilidad en los ultimos `days` dias (incluido hoy), peor primero
+        """
+        now = int(time.time()) if now is None else int(now)
+        days = max(1, int(days))
+        end_dia = _dia(now)
+        start_prev_dia = _dia(_day_start(now) - days * DAY)
+        grd_ids = list(self.dao.sync_state())
+        end = self.dao.rollups_at(grd_ids, end_dia)
+        # GRD sin corrida desde medianoche: su ultimo dia es ayer
+        missing = [g for g in grd_ids if g not in end]
+        if missing:
+            end.update(self.dao.rollups_at(missing, _dia(_day_start(now) - DAY)))
+        start = self.dao.rollups_at(list(end), start_prev_dia)
+
+        out = []
+        for grd_id, (conn_end, med_end, falls_end) in end.items():
+            conn0, med0, falls0 = start.get(grd_id, (0, 0, 0))
+            medido = med_end - med0
+            if medido <= 0:
+                continue
+            conectado = conn_end - conn0
+            out.append({
+                "grd_id": grd_id,
+                "porcentaje": round(conectado / medido * 100, 2),
+                "conectado_seg": conectado,
+                "medido_seg": medido,
+                "desconectado_min": round((medido - conectado) / 60, 1),
+                "caidas": falls_end - falls0,
+            })
+        out.sort(key=lambda item: (item["porcentaje"], -item["caidas"]))
+        return out[: max(1, int(limit))]
+
+
+grd_disponibilidad = GrdAvailabilityRollup(default_logger, grd_historial_dao, grd_historial)
@@ -0,0 +1,259 @@
+"""
+Espejo local del historial de conexion de los GRD (tabla grd_historial).
+
+- Cambios observados en el resumen (GrdStateTable.subscribe) se guardan al instante como
+  transiciones provisorias y marcan el GRD para sincronizar.
+- run() (agenda, job "historial_grd") trae de /api/grd/history solo lo necesario, a lo sumo
+  GRD_HISTORY_SYNC_MAX_PER_RUN GRD por corrida:
+  1. GRD con cambios observados: la ultima semana;
+  2. GRD sin historial completo: una sola vez la ventana "todo";
+  3. GRD sin sincronizar hace GRD_HISTORY_RECONCILE_SECONDS: la ultima semana.
+  Lo traido reemplaza el rango en el espejo (el middleware es la fuente de verdad).
+- Registra desde que instante cambio el espejo de cada GRD (drain_touched) para que el
+  resumen de disponibilidad recalcule solo esos dias.
+- get_history() responde con la forma de /api/grd/history desde el espejo; un GRD que todavia
+  no tiene historial completo se completa en ese momento (una sola consulta).
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from src.dao.dao_grd_historial import GrdHistorialDAO, grd_historial_dao
+from src.logger import Logosaurio, logger as default_logger
+from src.utils import timebox
+from src.web.clients.modbus_client import modbus_client
+
+# ventanas paginadas de la vista; "todo" es una sola pagina
+WINDOW_SECONDS = {"1sem": 7 * 86400, "1mes": 30 * 86400}
+RECENT_WINDOW = "1sem"
+
+
+def _epoch(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(timebox.parse(value, legacy=True).timestamp())
+    except Exception:
+        return None
+
+
+def _iso(ts: int) -> str:
+    return timebox.utc_iso(datetime.fromtimestamp(int(ts), tz=timezone.utc))
+
+
+class GrdHistorySync:
+    """
+    sincronizacion incremental del espejo y consultas locales de historial
+    """
+
+    def __init__(
+        self,
+        logger: Logosaurio,
+        client: Any,
+        dao: GrdHistorialDAO,
+        reconcile_seconds: int,
+        max_per_run: int,
+    ):
+        self.logger = logger
+        self.client = client
+        self.dao = dao
+        self.reconcile_seconds = max(60, int(reconcile_seconds))
+        self.max_per_run = max(1, int(max_per_run))
+        self._origen = "GRD/HIST"
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._pending: List[Tuple[int, int, int]] = []
+        self._dirty: set = set()
+        self._complete: set = set()
+        self._touched: Dict[int, int] = {}
+        self._report: Dict[str, Any] = {}
+
+    # ----------------- alimentacion -----------------
+
+    def observe(self, transitions: List[Tuple[int, int, float]]) -> None:
+        """
+        receptor de GrdStateTable: encola transiciones observadas (id_grd, estado, epoch)
+        """
+        with self._lock:
+            for grd_id, state, ts in transitions:
+                self._pending.append((int(grd_id), int(ts), int(state)))
+                self._dirty.add(int(grd_id))
+                self._touch(int(grd_id), int(ts))
+
+    def _touch(self, grd_id: int, ts: int) -> None:
+        previous = self._touched.get(grd_id)
+        if previous is None or ts < previous:
+            self._touched[grd_id] = ts
+
+    def mark_touched(self, grd_id: int, ts: int) -> None:
+        with self._lock:
+            self._touch(int(grd_id), int(ts))
+
+    def drain_touched(self) -> Dict[int, int]:
+        """
+        grd_id -> instante mas antiguo modificado en el espejo desde la llamada anterior
+        """
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        return touched
+
+    def flush_observed(self) -> int:
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        try:
+            return self.dao.insert_observed(rows)
+        except Exception:
+            with self._lock:
+                self._pending = rows + self._pending
+            raise
+
+    def _fetch(self, grd_id: int, window: str) -> int:
+        """
+        trae la pagina mas reciente de la ventana y reemplaza ese rango en el espejo
+        """
+        payload = self.client.get_history(grd_id, window, 0)
+        rows = []
+        for item in payload.get("data") or []:
+            ts = _epoch(item.get("timestamp"))
+            if ts is None:
+                continue
+            rows.append((ts, int(item.get("conectado", 0))))
+        now = int(time.time())
+        start = _epoch(payload.get("range_start"))
+        end = _epoch(payload.get("range_end"))
+        if start is None:
+            start = min((ts for ts, _ in rows), default=now)
+        if end is None:
+            end = now
+        inserted = self.dao.replace_range(grd_id, start, end, rows)
+        with self._lock:
+            self._touch(int(grd_id), start)
+        self.dao.mark_synced(grd_id, now, completo=(window == "todo"))
+        if window == "todo":
+            self._complete.add(int(grd_id))
+        return inserted
+
+    def run(self) -> Dict[str, Any]:
+        """
+        job de agenda: guarda lo observado y sincroniza los GRD que lo necesitan
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return self._report
+        try:
+            observed = self.flush_observed()
+            try:
+                grd_ids = sorted(int(k) for k in self.client.get_descriptions().keys())
+            except Exception as exc:
+                self.logger.log(f"No se pudo obtener la lista de GRD: {exc}", origin=self._origen)
+                grd_ids = []
+            state = self.dao.sync_state()
+            now = int(time.time())
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+
+            plan: List[Tuple[int, str]] = []
+            for grd_id in sorted(dirty):
+                plan.append((grd_id, RECENT_WINDOW if state.get(grd_id, (0, False))[1] else "todo"))
+            planned = {g for g, _ in plan}
+            plan += [(g, "todo") for g in grd_ids if g not in planned and not state.get(g, (0, False))[1]]
+            planned = {g for g, _ in plan}
+            stale = [g for g in grd_ids if g not in planned and now - state[g][0] >= self.reconcile_seconds]
+            stale.sort(key=lambda g: state[g][0])
+            plan += [(g, RECENT_WINDOW) for g in stale]
+
+            synced, inserted, errors = 0, 0, 0
+            for grd_id, window in plan[: self.max_per_run]:
+                try:
+                    inserted += self._fetch(grd_id, window)
+                    synced += 1
+                except Exception as exc:
+                    errors += 1
+                    if grd_id in dirty:
+                        with self._lock:
+                            self._dirty.add(grd_id)
+                    self.logger.log(f"Error sincronizando historial GRD {grd_id}: {exc}", origin=self._origen)
+            # lo que no entro en esta corrida queda para la siguiente
+            with self._lock:
+                self._dirty |= {g for g, _ in plan[self.max_per_run:] if g in dirty}
+
+            self._report = {
+                "ts": timebox.utc_iso(),
+                "observadas": observed,
+                "grd_sincronizados": synced,
+                "transiciones": inserted,
+                "errores": errors,
+                "pendientes": max(0, len(plan) - self.max_per_run),
+            }
+            return self._report
+        finally:
+            self._run_lock.release()
+
+    def get_report(self) -> Optional[Dict[str, Any]]:
+        return dict(self._report) if self._report else None
+
+    # ----------------- consulta local -----------------
+
+    def _ensure_complete(self, grd_id: int) -> None:
+        if int(grd_id) in self._complete:
+            return
+        self._complete |= {g for g, (_, completo) in self.dao.sync_state().items() if completo}
+        if int(grd_id) in self._complete:
+            return
+        try:
+            self._fetch(int(grd_id), "todo")
+        except Exception as exc:
+            # sin middleware se responde con lo que haya en el espejo
+            self.logger.log(f"No se pudo completar historial GRD {grd_id}: {exc}", origin=self._origen)
+
+    def total_periods(self, grd_id: int, window: str) -> int:
+        size = WINDOW_SECONDS.get(window)
+        if size is None:
+            return 1
+        self._ensure_complete(grd_id)
+        first = self.dao.first_ts(grd_id)
+        if first is None:
+            return 1
+        return max(1, math.ceil((int(time.time()) - first) / size))
+
+    def get_history(self, grd_id: int, window: str, page: int) -> Dict[str, Any]:
+        """
+        pagina del historial con la forma de /api/grd/history (pagina 0 = la mas reciente)
+        """
+        grd_id = int(grd_id)
+        self.flush_observed()
+        self._ensure_complete(grd_id)
+        now = int(time.time())
+        size = WINDOW_SECONDS.get(window)
+        if size is None:
+            end = now
+            start = self.dao.first_ts(grd_id) or now
+        else:
+            end = now - max(0, int(page)) * size
+            start = end - size
+        rows = self.dao.transitions(grd_id, start, end)
+        before = self.dao.state_before(grd_id, start)
+        return {
+            "grd_id": grd_id,
+            "window": window,
+            "page": page,
+            "data": [{"timestamp": _iso(ts), "conectado": state} for ts, state in rows],
+            "connected_before": before if before is not None else 0,
+            "range_start": _iso(start),
+            "range_end": _iso(end),
+            "total_periods": self.total_periods(grd_id, window),
+        }
+
+
+grd_historial = GrdHistorySync(
+    default_logger,
+    modbus_client,
+    grd_historial_dao,
+    reconcile_seconds=config.GRD_HISTORY_RECONCILE_SECONDS,
+    max_per_run=config.GRD_HISTORY_SYNC_MAX_PER_RUN,
+)
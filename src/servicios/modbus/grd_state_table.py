@@ -0,0 +1,371 @@
+"""
+Tabla compacta de estados por GRD compartida por KPI, alarmas y RPC.
+
+- Arrays NumPy ordenados por id: estado (1 conectado / 0 desconectado), instante del
+  ultimo cambio e inicio de la caida en curso; zona de cada GRD como indice.
+- Se alimenta del resumen de modbus-mw-service (apply_summary, diff vectorizado contra
+  la version anterior) o de actualizaciones puntuales (apply_state, O(log n)).
+- Contadores totales y por zona se ajustan solo con los cambios: porcentaje en O(1),
+  desconectados ordenados por antiguedad de la caida en O(k log k).
+- snapshot() consulta el resumen a lo sumo una vez cada ttl segundos, sin importar
+  cuantos consumidores lo pidan, y cachea la salida por version.
+- subscribe(): avisa las transiciones observadas (id, estado, epoch) de GRD ya conocidos,
+  p. ej. al espejo local del historial.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from src.utils import timebox
+from src.web.clients.modbus_client import modbus_client
+
+DEFAULT_ZONE = "general"
+
+
+def load_zones(path: str) -> Dict[int, str]:
+    """
+    lee {"zona": [id_grd, ...]} desde JSON; retorna id_grd -> zona (vacio si no hay archivo)
+    """
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    mapping: Dict[int, str] = {}
+    if isinstance(data, dict):
+        for zone, ids in data.items():
+            for grd_id in ids or []:
+                try:
+                    mapping[int(grd_id)] = str(zone)
+                except (TypeError, ValueError):
+                    continue
+    return mapping
+
+
+def _epoch(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return timebox.parse(value, legacy=True).timestamp()
+    except Exception:
+        return None
+
+
+class GrdStateTable:
+    """
+    estado vigente por GRD con contadores incrementales
+    """
+
+    def __init__(self, client: Any, ttl_seconds: float, zones: Optional[Dict[int, str]] = None):
+        self.client = client
+        self.ttl = max(0.0, float(ttl_seconds))
+        self._lock = threading.RLock()
+        self._fetch_lock = threading.Lock()
+        self._zone_of = dict(zones or {})
+        self._zone_names: List[str] = sorted(set(self._zone_of.values()) | {DEFAULT_ZONE})
+        self._zone_pos = {name: idx for idx, name in enumerate(self._zone_names)}
+
+        self._ids = np.empty(0, dtype=np.int64)
+        self._states = np.empty(0, dtype=np.int8)
+        self._changed_at = np.empty(0, dtype=np.float64)
+        self._down_since = np.empty(0, dtype=np.float64)
+        self._zone_idx = np.empty(0, dtype=np.int16)
+        self._zone_total = np.zeros(len(self._zone_names), dtype=np.int64)
+        self._zone_connected = np.zeros(len(self._zone_names), dtype=np.int64)
+        self._connected = 0
+        self._descriptions: Dict[int, str] = {}
+        # timestamp de caida tal como lo informa el middleware (se devuelve sin reformatear)
+        self._down_raw: Dict[int, Any] = {}
+
+        self.version = 0
+        self._fetched_at: Optional[float] = None
+        self._error: Optional[str] = None
+        self._cache_version = -1
+        self._cache: Dict[str, Any] = {}
+        self._listeners: List[Callable[[List[Tuple[int, int, float]]], None]] = []
+
+    def use_client(self, client: Any) -> None:
+        """
+        reemplaza el cliente del resumen por uno instrumentado (metricas/grabacion) que lo envuelve
+        """
+        with self._fetch_lock:
+            self.client = client
+
+    def subscribe(self, listener: Callable[[List[Tuple[int, int, float]]], None]) -> None:
+        """
+        registra un receptor de transiciones [(id_grd, estado, epoch), ...]; se llama fuera del lock
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, transitions: List[Tuple[int, int, float]]) -> None:
+        if not transitions:
+            return
+        for listener in list(self._listeners):
+            try:
+                listener(transitions)
+            except Exception:
+                continue
+
+    # ----------------- alimentacion -----------------
+
+    def apply_summary(self, summary: Dict[str, Any], now: Optional[float] = None) -> int:
+        """
+        aplica un resumen completo {"states": {id: estado}, "disconnected": [...]};
+        retorna la cantidad de GRD que cambiaron de estado
+        """
+        now = time.time() if now is None else float(now)
+        items = {}
+        for item in summary.get("disconnected") or []:
+            try:
+                items[int(item.get("id_grd"))] = item
+            except (TypeError, ValueError):
+                continue
+
+        states = {int(k): (1 if v == 1 else 0) for k, v in (summary.get("states") or {}).items()}
+        # un desconectado informado sin entrada en states cuenta igual como GRD caido
+        for grd_id in items.keys() - states.keys():
+            states[grd_id] = 0
+        ids = np.fromiter(states.keys(), dtype=np.int64, count=len(states))
+        vals = np.fromiter(states.values(), dtype=np.int8, count=len(states))
+        order = np.argsort(ids, kind="stable")
+        ids, vals = ids[order], vals[order]
+
+        with self._lock:
+            if np.array_equal(ids, self._ids):
+                changed = np.flatnonzero(vals != self._states)
+                moved = changed
+                if changed.size:
+                    delta = vals[changed].astype(np.int64) - self._states[changed]
+                    np.add.at(self._zone_connected, self._zone_idx[changed], delta)
+                    self._connected += int(delta.sum())
+                    self._states[changed] = vals[changed]
+                    self._changed_at[changed] = now
+                    self._down_since[changed] = np.where(vals[changed] == 0, now, np.nan)
+                n_changed = int(changed.size)
+            else:
+                n_changed, moved = self._rebuild(ids, vals, now)
+            transitions = [(int(self._ids[p]), int(self._states[p]), now) for p in moved]
+
+            # la caida informada por el middleware tiene prioridad sobre el instante observado
+            previous_raw, self._down_raw = self._down_raw, {}
+            touched = bool(n_changed)
+            for grd_id, item in items.items():
+                pos = self._position(grd_id)
+                if pos is None:
+                    continue
+                desc = item.get("description")
+                if desc and self._descriptions.get(grd_id) != desc:
+                    self._descriptions[grd_id] = str(desc)
+                    touched = True
+                raw = item.get("last_disconnected_timestamp")
+                if raw is None or self._states[pos] != 0:
+                    continue
+                if previous_raw.get(grd_id) != raw:
+                    ts = _epoch(raw)
+                    if ts is None:
+                        continue
+                    self._down_since[pos] = ts
+                    touched = True
+                self._down_raw[grd_id] = raw
+            touched = touched or previous_raw.keys() != self._down_raw.keys()
+
+            # sin cambios no se invalida la salida cacheada
+            if touched:
+                self.version += 1
+        self._notify(transitions)
+        return n_changed
+
+    def apply_state(self, grd_id: int, state: int, ts: Optional[float] = None) -> bool:
+        """
+        actualizacion puntual de un GRD (p. ej. desde MQTT); retorna True si cambio de estado
+        """
+        now = time.time() if ts is None else float(ts)
+        value = 1 if state == 1 else 0
+        with self._lock:
+            pos = self._position(int(grd_id))
+            if pos is None:
+                ids = np.append(self._ids, np.int64(grd_id))
+                vals = np.append(self._states, np.int8(value))
+                order = np.argsort(ids, kind="stable")
+                self._rebuild(ids[order], vals[order], now)
+                self.version += 1
+                return True
+            old = int(self._states[pos])
+            if old == value:
+                return False
+            delta = value - old
+            self._down_raw.pop(int(grd_id), None)
+            self._states[pos] = value
+            self._changed_at[pos] = now
+            self._down_since[pos] = now if value == 0 else np.nan
+            self._zone_connected[self._zone_idx[pos]] += delta
+            self._connected += delta
+            self.version += 1
+        self._notify([(int(grd_id), value, now)])
+        return True
+
+    def _rebuild(self, ids: np.ndarray, vals: np.ndarray, now: float) -> Tuple[int, np.ndarray]:
+        """
+        cambio en el conjunto de GRD: reconstruye arrays conservando los instantes de los que siguen.
+        retorna (cantidad de cambios, posiciones de GRD ya conocidos que cambiaron de estado)
+        """
+        changed_at = np.full(ids.size, now, dtype=np.float64)
+        down_since = np.where(vals == 0, now, np.nan)
+        n_changed = int(ids.size)
+        moved = np.empty(0, dtype=np.int64)
+        if self._ids.size and ids.size:
+            pos = np.searchsorted(self._ids, ids)
+            pos_clip = np.minimum(pos, self._ids.size - 1)
+            known = self._ids[pos_clip] == ids
+            same = known & (self._states[pos_clip] == vals)
+            changed_at[same] = self._changed_at[pos_clip[same]]
+            down_since[same] = self._down_since[pos_clip[same]]
+            n_changed = int(ids.size - same.sum())
+            moved = np.flatnonzero(known & ~same)
+
+        zone_idx = np.fromiter(
+            (self._zone_pos[self._zone_of.get(int(i), DEFAULT_ZONE)] for i in ids),
+            dtype=np.int16,
+            count=ids.size,
+        )
+        nz = len(self._zone_names)
+        self._ids = ids
+        self._states = vals.copy()
+        self._changed_at = changed_at
+        self._down_since = down_since
+        self._zone_idx = zone_idx
+        self._zone_total = np.bincount(zone_idx, minlength=nz).astype(np.int64)
+        self._zone_connected = np.bincount(zone_idx, weights=vals, minlength=nz).astype(np.int64)
+        self._connected = int(vals.sum())
+        return n_changed, moved
+
+    def _position(self, grd_id: int) -> Optional[int]:
+        pos = int(np.searchsorted(self._ids, grd_id))
+        if pos < self._ids.size and self._ids[pos] == grd_id:
+            return pos
+        return None
+
+    # ----------------- consultas -----------------
+
+    def total(self) -> int:
+        return int(self._ids.size)
+
+    def connected(self) -> int:
+        return self._connected
+
+    def percentage(self) -> float:
+        total = self._ids.size
+        return (self._connected / total) * 100 if total else 0.0
+
+    def disconnected(self) -> List[Dict[str, Any]]:
+        """
+        GRD desconectados, la caida mas antigua primero
+        """
+        with self._lock:
+            idx = np.flatnonzero(self._states == 0)
+            if not idx.size:
+                return []
+            idx = idx[np.argsort(self._down_since[idx], kind="stable")]
+            out = []
+            for pos in idx:
+                grd_id = int(self._ids[pos])
+                since = self._down_since[pos]
+                ts = self._down_raw.get(grd_id)
+                if ts is None and not np.isnan(since):
+                    ts = timebox.utc_iso(datetime.fromtimestamp(float(since), tz=timezone.utc))
+                out.append({
+                    "id_grd": grd_id,
+                    "description": self._descriptions.get(grd_id, f"GRD {grd_id}"),
+                    "last_disconnected_timestamp": ts,
+                })
+            return out
+
+    def zones(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            out = []
+            for idx, name in enumerate(self._zone_names):
+                total = int(self._zone_total[idx])
+                if not total:
+                    continue
+                conn = int(self._zone_connected[idx])
+                out.append({
+                    "zona": name,
+                    "total": total,
+                    "conectados": conn,
+                    "porcentaje": round(conn / total * 100, 2),
+                })
+            return out
+
+    # ----------------- snapshot compartido -----------------
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        consulta el resumen si la ultima consulta vencio (una sola consulta en vuelo)
+        """
+        if not force and not self._stale():
+            return
+        with self._fetch_lock:
+            if not force and not self._stale():
+                return
+            try:
+                summary = self.client.get_summary()
+            except Exception as exc:
+                self._error = str(exc)
+            else:
+                self._error = None
+                self.apply_summary(summary if isinstance(summary, dict) else {})
+            self._fetched_at = time.monotonic()
+
+    def _stale(self) -> bool:
+        return self._fetched_at is None or (time.monotonic() - self._fetched_at) >= self.ttl
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        resumen con la forma de /api/grd/summary (+ zonas), copiado para cada llamador;
+        si la ultima consulta fallo reporta conectividad 0 y sin estados, como hacian los consumidores
+        """
+        self.refresh()
+        if self._error is not None:
+            return {
+                "summary": {"porcentaje": 0, "total": 0, "conectados": 0},
+                "states": {},
+                "disconnected": [],
+                "zones": [],
+                "error": self._error,
+            }
+        with self._lock:
+            if self._cache_version != self.version:
+                self._cache = {
+                    "summary": {
+                        "porcentaje": round(self.percentage(), 2),
+                        "total": self.total(),
+                        "conectados": self.connected(),
+                    },
+                    "states": {str(int(i)): int(s) for i, s in zip(self._ids, self._states)},
+                    "disconnected": self.disconnected(),
+                    "zones": self.zones(),
+                }
+                self._cache_version = self.version
+            cache = self._cache
+        # copia por consumidor (KPI, RPC, alarmas): modificarla no toca la cache compartida
+        return {
+            "summary": dict(cache["summary"]),
+            "states": dict(cache["states"]),
+            "disconnected": [dict(item) for item in cache["disconnected"]],
+            "zones": [dict(item) for item in cache["zones"]],
+        }
+
+
+grd_state_table = GrdStateTable(
+    modbus_client,
+    ttl_seconds=config.MODBUS_HTTP_POLL_SECONDS,
+    zones=load_zones(config.GRD_ZONES_PATH),
+)
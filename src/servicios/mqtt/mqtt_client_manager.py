@@ -1,9 +1,12 @@
 import json
 import queue
+import threading
+import time
 from typing import Callable, List, Tuple, Optional
 
 import config
 from .mqtt_driver import MqttDriver
+from src.dao.dao_mqtt_outbox import mqtt_outbox_dao, KIND_EVENT
 from src.utils import timebox
 
 
@@ -12,6 +15,8 @@ class MqttClientManager:
     Manager que orquesta el driver MQTT.
     - Suscripciones por defecto 100% tomadas de config (sin hardcode).
     - Expone publish() para UI (broker_view) con QoS/retain que le pida la UI.
+    - Publicaciones durables (estado/eventos) que no llegan al broker quedan en un
+      outbox SQLite y se re-publican por lotes al reconectar.
     """
 
     def __init__(self, logger):
@@ -43,6 +48,12 @@ class MqttClientManager:
         # Estado interno
         self._started = False
 
+        # Outbox durable: mientras haya pendientes, lo durable pasa por el outbox para respetar el orden
+        self._outbox = mqtt_outbox_dao
+        self._outbox_lock = threading.Lock()
+        self._outbox_pending = self._outbox_has_rows()
+        self._replay_thread: Optional[threading.Thread] = None
+
     # ----------------- Ciclo de vida
     def start(self) -> bool:
         if self._started:
@@ -70,6 +81,7 @@ class MqttClientManager:
         except TypeError:
             self.log.log("MQTT Client Manager: subscriptions no es iterable en _on_driver_connect.", origin=self._origen)
         self._publish_status(True, "connect")
+        self._start_outbox_replay()
 
     def _on_driver_disconnect(self, client, userdata, rc):
         if rc != 0:
@@ -97,8 +109,30 @@ class MqttClientManager:
                     self.log.log(f"MQTT Client Manager: listener error ({prefix}): {exc}", origin=self._origen)
 
     # ----------------- API hacia el resto del sistema
-    def publish(self, topic: str, payload, qos: int = 0, retain: bool = False):
-        self.driver.publish(topic, payload, qos=qos, retain=retain)
+    def publish(
+        self,
+        topic: str,
+        payload,
+        qos: int = 0,
+        retain: bool = False,
+        durable: bool = False,
+        kind: str = KIND_EVENT,
+    ):
+        """
+        durable=True: si no se puede publicar ahora, se guarda en el outbox.
+        kind lo decide el llamador (no se deduce de retain):
+        KIND_STATE -> snapshot coalescido por topico; KIND_EVENT -> evento FIFO.
+        """
+        if not durable:
+            self.driver.publish(topic, payload, qos=qos, retain=retain)
+            return
+
+        with self._outbox_lock:
+            if not self._outbox_pending and self.driver.publish(topic, payload, qos=qos, retain=retain):
+                return
+            self._outbox_store(topic, payload, qos, retain, kind)
+        if self.driver.is_connected():
+            self._start_outbox_replay()
 
     def subscribe(self, topic: str, qos: int = 0):
         self.subscriptions.append((topic, qos))
@@ -152,3 +186,58 @@ class MqttClientManager:
             )
         except Exception as exc:
             self.log.log(f"No se pudo publicar estado del servicio: {exc}", origin=self._origen)
+
+    # ----------------- Outbox durable
+    def _outbox_has_rows(self) -> bool:
+        try:
+            return self._outbox.count() > 0
+        except Exception as exc:
+            self.log.log(f"MQTT outbox: no se pudo leer la cola pendiente: {exc}", origin=self._origen)
+            return False
+
+    def _outbox_store(self, topic: str, payload, qos: int, retain: bool, kind: str) -> None:
+        data = payload if isinstance(payload, str) else str(payload)
+        try:
+            self._outbox.enqueue(topic, data, qos, retain, kind)
+            self._outbox_pending = True
+        except Exception as exc:
+            self.log.log(f"MQTT outbox: no se pudo guardar '{topic}': {exc}", origin=self._origen)
+
+    def _start_outbox_replay(self) -> None:
+        if not self._outbox_pending:
+            return
+        with self._outbox_lock:
+            if self._replay_thread is not None and self._replay_thread.is_alive():
+                return
+            self._replay_thread = threading.Thread(target=self._replay_outbox, name="mqtt-outbox", daemon=True)
+            self._replay_thread.start()
+
+    def _replay_outbox(self) -> None:
+        """
+        drena el outbox en lotes acotados con pausa entre lotes para no saturar al broker
+        """
+        batch_size = max(1, int(config.MQTT_OUTBOX_REPLAY_BATCH))
+        pause = max(0.0, float(config.MQTT_OUTBOX_REPLAY_INTERVAL_SECONDS))
+        sent_total = 0
+        while self.driver.is_connected():
+            try:
+                with self._outbox_lock:
+                    rows = self._outbox.fetch_batch(batch_size)
+                    if not rows:
+                        self._outbox_pending = False
+                        break
+                sent_ids: List[int] = []
+                for row in rows:
+                    if not self.driver.publish(row["topic"], row["payload"], qos=row["qos"], retain=bool(row["retain"])):
+                        break
+                    sent_ids.append(row["id"])
+                self._outbox.delete(sent_ids)
+                sent_total += len(sent_ids)
+                if len(sent_ids) < len(rows):
+                    break
+            except Exception as exc:
+                self.log.log(f"MQTT outbox: error re-publicando pendientes: {exc}", origin=self._origen)
+                break
+            time.sleep(pause)
+        if sent_total:
+            self.log.log(f"MQTT outbox: re-publicados {sent_total} mensajes pendientes.", origin=self._origen)
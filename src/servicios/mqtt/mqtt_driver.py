@@ -197,15 +197,18 @@ class MqttDriver:
             self._connected = False
             self._connected_event.clear()
 
-    def publish(self, topic: str, payload, qos: int = 0, retain: bool = False):
+    def publish(self, topic: str, payload, qos: int = 0, retain: bool = False) -> bool:
+        """Publica y retorna True si paho acepto el mensaje (rc=MQTT_ERR_SUCCESS)."""
         if not self._connected:
             self.log.log(f"MQTT Driver: publish abortado; cliente desconectado (topic={topic}).", origin=self._origen)
-            return
+            return False
         try:
             res = self.client.publish(topic, payload, qos=qos, retain=retain)
             self.log.log(f"MQTT Driver: publish('{topic}') -> {res.rc}", origin=self._origen)
+            return res.rc == mqtt.MQTT_ERR_SUCCESS
         except Exception as e:
             self.log.log(f"MQTT Driver: error publicando en '{topic}': {e}", origin=self._origen)
+            return False
 
     def subscribe(self, topic: str, qos: int = 0):
         if not self._connected:
@@ -1,8 +1,9 @@
 import json
-from typing import Any
+from typing import Any, List, Optional
 
 import config
 from src.utils import timebox
+from . import mqtt_state_publisher
 
 _manager = None  # instancia de MqttClientManager
 
@@ -16,41 +17,61 @@ def _safe_publish(topic: str, payload: Any, qos: int, retain: bool) -> None:
     if _manager is None:
         return
     try:
-        _manager.publish(topic, payload, qos=qos, retain=retain)
+        # durable: si el broker no esta disponible queda en el outbox y se re-publica al reconectar
+        _manager.publish(topic, payload, qos=qos, retain=retain, durable=True)
     except Exception:
         pass
 
 
+def _safe_publish_state(topic: str, payload: dict, force: bool = False) -> None:
+    """
+    publica un snapshot retenido solo si cambio su contenido (o vencio el heartbeat / force)
+    """
+    if _manager is None:
+        return
+    try:
+        mqtt_state_publisher.for_manager(_manager).publish_state(
+            topic,
+            payload,
+            qos=config.MQTT_PUBLISH_QOS_STATE,
+            retain=config.MQTT_PUBLISH_RETAIN_STATE,
+            force=force,
+        )
+    except Exception:
+        pass
+
+
+def get_state_stats() -> dict:
+    """
+    conteo de publicaciones/supresiones por topico de estado retenido
+    """
+    if _manager is None:
+        return {}
+    return mqtt_state_publisher.for_manager(_manager).get_stats()
+
+
 def publish_email_state(payload: dict) -> None:
     """
     Publica el estado agregado del servidor de correo (retain).
     payload: {"smtp":"conectado","ping_local":"conectado","ping_remoto":"desconectado","ts":"..."}
     """
-    _safe_publish(
-        config.MQTT_TOPIC_EMAIL_ESTADO,
-        json.dumps(payload, ensure_ascii=False),
-        qos=config.MQTT_PUBLISH_QOS_STATE,
-        retain=config.MQTT_PUBLISH_RETAIN_STATE,
-    )
+    _safe_publish_state(config.MQTT_TOPIC_EMAIL_ESTADO, payload)
 
 
-def publish_proxmox_state(payload: dict) -> None:
+def publish_proxmox_state(payload: dict, force: bool = False) -> None:
     """
     Publica el snapshot de estado de Proxmox (retain).
     payload: {"ts":"...","status":"online|offline","node":"...","vms":[...],"missing":[...],"error":str|None}
+    force: re-publica aunque no haya cambios (heartbeat cada PVE_MQTT_PUBLISH_FACTOR consultas)
     """
-    _safe_publish(
-        config.MQTT_TOPIC_PROXMOX_ESTADO,
-        json.dumps(payload, ensure_ascii=False),
-        qos=config.MQTT_PUBLISH_QOS_STATE,
-        retain=config.MQTT_PUBLISH_RETAIN_STATE,
-    )
+    _safe_publish_state(config.MQTT_TOPIC_PROXMOX_ESTADO, payload, force=force)
 
 
-def publish_email_event(subject: str, ok: bool) -> None:
+def publish_email_event(subject: str, ok: bool, items: Optional[List[dict]] = None) -> None:
     """
     Evento de envio de email/alarma (no retain).
     payload: {"type":"email","subject":"...","ok":true|false,"ts":"..."}
+    items: detalle por alarma cuando el email es un resumen ({"subject":"...","ts":"..."}, ...)
     """
     obj = {
         "type": "email",
@@ -58,6 +79,8 @@ def publish_email_event(subject: str, ok: bool) -> None:
         "ok": bool(ok),
         "ts": timebox.utc_iso(),
     }
+    if items:
+        obj["items"] = items
     _safe_publish(
         config.MQTT_TOPIC_EMAIL_EVENT,
         json.dumps(obj, ensure_ascii=False),
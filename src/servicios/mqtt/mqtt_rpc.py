@@ -6,16 +6,24 @@ RPC minimalista sobre MQTT.
 
 - El servidor responde publicando en reply_to uno de los topicos del movil.
 
+- Los requests se atienden en un pool de workers (ver mqtt_rpc_dispatcher).
+
+- Requests identicos en vuelo (misma accion y params) se coalescen: una sola
+  consulta upstream responde a todos los corr pendientes.
+
 """
 
 import json
 import queue
-from typing import Optional, Tuple
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from src.logger import Logosaurio
 from src.utils import timebox
 from src.servicios.email.mensagelo_client import MensageloClient
 from src.servicios.mqtt import mqtt_event_bus
-from src.web.clients.modbus_client import modbus_client
+from src.servicios.mqtt.mqtt_rpc_dispatcher import RpcDispatcher
+from src.servicios.modbus.grd_state_table import grd_state_table
 from src.web.clients.router_client import router_client
 import config
 
@@ -40,7 +48,7 @@ class MqttRequestRouter:
 
         self.queue = message_queue  # mantenido por compatibilidad (no se consume)
 
-        self._listener_queue: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self._listener_queue: "queue.Queue[Tuple[str, str, float]]" = queue.Queue()
 
         self._listener = None
 
@@ -62,6 +70,22 @@ class MqttRequestRouter:
 
             )
 
+        self._dispatcher = RpcDispatcher(
+            logger,
+            workers=config.MQTT_RPC_WORKERS,
+            action_limits=config.MQTT_RPC_ACTION_LIMITS,
+            deadline_seconds=config.MQTT_RPC_DEADLINE_SECONDS,
+        )
+
+        # grupos de requests identicos en vuelo: clave -> lista de (corr, reply_to, received_at)
+        self._inflight: Dict[Tuple[str, str], List[Tuple[str, str, float]]] = {}
+        self._inflight_lock = threading.Lock()
+        self._coalesce_stats: Dict[str, Dict[str, int]] = {}
+        self._builders: Dict[str, Callable[[dict], dict]] = {
+            "get_global_status": self._build_global_status,
+            "get_modem_status": self._build_modem_status,
+        }
+
 
 
     def start(self):
@@ -78,7 +102,8 @@ class MqttRequestRouter:
 
             def _enqueue(topic: str, payload: str) -> None:
 
-                self._listener_queue.put((topic, payload))
+                # se marca la recepcion para medir tiempo en cola y deadline
+                self._listener_queue.put((topic, payload, time.monotonic()))
 
             self._listener = _enqueue
 
@@ -86,11 +111,13 @@ class MqttRequestRouter:
 
         self.log.log(f"RPC MQTT: suscripto a {REQ_PREFIX}/#", origin=self._origen)
 
+        self._dispatcher.start()
+
 
 
         while True:
 
-            topic, payload = self._listener_queue.get()
+            topic, payload, received_at = self._listener_queue.get()
 
 
 
@@ -134,21 +161,145 @@ class MqttRequestRouter:
 
 
 
-            if action == "get_global_status":
+            self._dispatch(action, corr, reply_to, params, received_at)
 
-                self._handle_get_global_status(corr, reply_to)
 
-            elif action == "get_modem_status":
 
-                self._handle_get_modem_status(corr, reply_to)
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        metricas por accion del dispatcher (colas, vencidos, tiempos) y de coalescencia
+        """
+        metrics = self._dispatcher.get_metrics()
+        with self._inflight_lock:
+            for action, stats in self._coalesce_stats.items():
+                metrics.setdefault(action, {}).update(stats)
+        return metrics
 
-            elif action == "send_email_test":
 
-                self._handle_send_email_test(corr, reply_to, params)
+    def _dispatch(self, action: str, corr: str, reply_to: str, params: dict, received_at: float):
+        """
+        deriva el request al pool de workers respetando los limites de la accion
+        """
+        if action in config.MQTT_RPC_COALESCE_ACTIONS and action in self._builders:
+            self._dispatch_coalesced(action, corr, reply_to, params, received_at)
+            return
+
+        def _run() -> None:
+            self._handle_action(action, corr, reply_to, params)
+
+        def _expired(waited: float) -> None:
+            self.log.log(
+                f"RPC MQTT: request '{action}' (corr={corr}) descartado tras {waited:.1f}s en cola",
+                origin=self._origen,
+            )
+            self._emit_error(corr, reply_to, action, "request vencido: servidor ocupado")
+
+        if not self._dispatcher.submit(action, _run, _expired, received_at=received_at):
+            self.log.log(f"RPC MQTT: cola de '{action}' llena; request rechazado", origin=self._origen)
+            self._emit_error(corr, reply_to, action, "servidor ocupado: cola llena")
+
+
+    def _dispatch_coalesced(self, action: str, corr: str, reply_to: str, params: dict, received_at: float):
+        """
+        une el request a un grupo identico en vuelo o crea uno nuevo en el pool
+        """
+        key = (action, json.dumps(params if isinstance(params, dict) else {}, sort_keys=True, ensure_ascii=False))
+        waiter = (corr, reply_to, received_at)
+        with self._inflight_lock:
+            stats = self._coalesce_stats.setdefault(action, {"coalesced": 0, "fanout_max": 0})
+            group = self._inflight.get(key)
+            if group is not None:
+                group.append(waiter)
+                stats["coalesced"] += 1
+                return
+            self._inflight[key] = [waiter]
+
+        def _run() -> None:
+            self._run_group(key, params)
+
+        def _expired(_waited: float) -> None:
+            # el primer request vencio, pero puede haber otros recientes en el grupo
+            self._run_group(key, params)
+
+        if not self._dispatcher.submit(action, _run, _expired, received_at=received_at):
+            with self._inflight_lock:
+                waiters = self._inflight.pop(key, [])
+            self.log.log(f"RPC MQTT: cola de '{action}' llena; request rechazado", origin=self._origen)
+            for w_corr, w_reply_to, _ in waiters:
+                self._emit_error(w_corr, w_reply_to, action, "servidor ocupado: cola llena")
+
+
+    def _run_group(self, key: Tuple[str, str], params: dict):
+        """
+        atiende un grupo coalescido: descarta los vencidos, consulta una vez y responde a todos
+        """
+        action = key[0]
+        deadline = float(config.MQTT_RPC_DEADLINE_SECONDS)
+
+        with self._inflight_lock:
+            waiters = list(self._inflight.get(key, []))
+        now = time.monotonic()
+        stale = [w for w in waiters if deadline > 0 and now - w[2] > deadline]
+        if stale:
+            with self._inflight_lock:
+                group = self._inflight.get(key, [])
+                for w in stale:
+                    if w in group:
+                        group.remove(w)
+                has_fresh = bool(group)
+                if not has_fresh:
+                    self._inflight.pop(key, None)
+            for w_corr, w_reply_to, _ in stale:
+                self._emit_error(w_corr, w_reply_to, action, "request vencido: servidor ocupado")
+            if not has_fresh:
+                return
 
+        try:
+            data = self._builders[action](params)
+            ok, error = True, ""
+        except Exception as exc:
+            data, ok, error = {}, False, str(exc) or "error consultando estado"
+
+        # se cierra el grupo recien con el resultado: los que llegaron durante la consulta lo reciben
+        with self._inflight_lock:
+            waiters = self._inflight.pop(key, [])
+            stats = self._coalesce_stats.setdefault(action, {"coalesced": 0, "fanout_max": 0})
+            stats["fanout_max"] = max(stats["fanout_max"], len(waiters))
+
+        if config.MQTT_RPC_BATCH_REPLIES:
+            by_topic: Dict[str, List[str]] = {}
+            for w_corr, w_reply_to, _ in waiters:
+                by_topic.setdefault(w_reply_to, []).append(w_corr)
+            for reply_to, corrs in by_topic.items():
+                if ok:
+                    self._emit_ok(corrs[0], reply_to, action, data, corrs=corrs)
+                else:
+                    self._emit_error(corrs[0], reply_to, action, error, corrs=corrs)
+            return
+
+        for w_corr, w_reply_to, _ in waiters:
+            if ok:
+                self._emit_ok(w_corr, w_reply_to, action, data)
             else:
+                self._emit_error(w_corr, w_reply_to, action, error)
+
+
+    def _handle_action(self, action: str, corr: str, reply_to: str, params: dict):
+        if action == "get_global_status":
+
+            self._handle_get_global_status(corr, reply_to)
+
+        elif action == "get_modem_status":
+
+            self._handle_get_modem_status(corr, reply_to)
+
+        elif action == "send_email_test":
+
+            self._handle_send_email_test(corr, reply_to, params)
+
+        else:
 
-                self._emit_error(corr, reply_to, action, "accion no implementada")
+            self._emit_error(corr, reply_to, action, "accion no implementada")
 
 
 
@@ -164,32 +315,34 @@ class MqttRequestRouter:
 
         """
 
-        try:
-            summary_payload = modbus_client.get_summary()
-        except Exception:
-            summary_payload = {"summary": {"porcentaje": 0, "total": 0, "conectados": 0}, "states": {}}
-        latest_states = summary_payload.get("states", {})
-        summary = summary_payload.get("summary", {})
-        data = {
+        self._emit_ok(corr, reply_to, "get_global_status", self._build_global_status({}))
+
+
+    def _build_global_status(self, _params: dict) -> dict:
+        summary_payload = grd_state_table.snapshot()
+        return {
             "ts": timebox.utc_iso(),
-            "summary": summary,
-            "states": latest_states
+            "summary": summary_payload.get("summary", {}),
+            "states": summary_payload.get("states", {}),
+            "zones": summary_payload.get("zones", []),
         }
-        self._emit_ok(corr, reply_to, "get_global_status", data)
 
 
     def _handle_get_modem_status(self, corr: str, reply_to: str):
         """
         devuelve estado del modem consultando router-telef-service
         """
+        self._emit_ok(corr, reply_to, "get_modem_status", self._build_modem_status({}))
+
+
+    def _build_modem_status(self, _params: dict) -> dict:
         try:
             status_data = router_client.get_status()
             estado = str(status_data.get("state", "desconocido"))
         except Exception as exc:
             estado = "desconocido"
             self.log.log(f"RPC modem status fallo: {exc}", origin=self._origen)
-        data = {"ts": timebox.utc_iso(), "estado": estado}
-        self._emit_ok(corr, reply_to, "get_modem_status", data)
+        return {"ts": timebox.utc_iso(), "estado": estado}
 
 
     def _handle_send_email_test(self, corr: str, reply_to: str, params: dict):
@@ -320,16 +473,20 @@ class MqttRequestRouter:
 
 
 
-    def _emit_ok(self, corr: Optional[str], reply_to: str, action: str, data: dict):
+    def _emit_ok(self, corr: Optional[str], reply_to: str, action: str, data: dict, corrs: Optional[List[str]] = None):
 
         """
 
-        publica respuesta ok en el topico reply_to
+        publica respuesta ok en el topico reply_to (corrs: respuesta agrupada de varios requests)
 
         """
 
         msg = {"type": "rpc", "action": action, "corr": corr, "ok": True, "data": data}
 
+        if corrs:
+
+            msg["corrs"] = list(corrs)
+
         self.manager.publish(
 
             reply_to,
@@ -344,7 +501,7 @@ class MqttRequestRouter:
 
 
 
-    def _emit_error(self, corr: Optional[str], reply_to: str, action: str, error: str):
+    def _emit_error(self, corr: Optional[str], reply_to: str, action: str, error: str, corrs: Optional[List[str]] = None):
 
         """
 
@@ -358,6 +515,10 @@ class MqttRequestRouter:
 
         msg = {"type": "rpc", "action": action, "corr": corr, "ok": False, "error": error}
 
+        if corrs:
+
+            msg["corrs"] = list(corrs)
+
         self.manager.publish(
 
             reply_to,
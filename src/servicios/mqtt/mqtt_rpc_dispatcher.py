@@ -0,0 +1,207 @@
+"""
+Despachador de requests RPC sobre un pool acotado de workers.
+
+- Cantidad fija de hilos workers compartidos por todas las acciones.
+- Por accion: concurrencia maxima y largo maximo de cola.
+- Deadline: un request que espero en cola mas que el limite se descarta
+  y se responde con error en lugar de atenderlo tarde.
+- Metricas por accion: tiempo en cola y tiempo de atencion.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from src.logger import Logosaurio
+
+
+class _ActionLane:
+    """
+    cola y contadores de una accion
+    """
+
+    def __init__(self, concurrency: int, queue_limit: int):
+        self.concurrency = max(1, int(concurrency))
+        self.queue_limit = max(1, int(queue_limit))
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self.active = 0
+        self.stats: Dict[str, float] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "expired": 0,
+            "queue_ms_total": 0.0,
+            "queue_ms_max": 0.0,
+            "handle_ms_total": 0.0,
+            "handle_ms_max": 0.0,
+        }
+
+
+class RpcDispatcher:
+    """
+    pool de workers con limites por accion y deadline de atencion
+    """
+
+    def __init__(
+        self,
+        logger: Logosaurio,
+        workers: int,
+        action_limits: Dict[str, Dict[str, int]],
+        deadline_seconds: float,
+        default_concurrency: int = 1,
+        default_queue_limit: int = 20,
+    ):
+        self.log = logger
+        self._origen = "OBS/RPC"
+        self._workers = max(1, int(workers))
+        self._deadline = float(deadline_seconds)
+        self._default_concurrency = default_concurrency
+        self._default_queue_limit = default_queue_limit
+        self._cond = threading.Condition()
+        self._lanes: Dict[str, _ActionLane] = {}
+        self._order: List[str] = []
+        self._next_lane = 0
+        self._threads: List[threading.Thread] = []
+
+        for action, limits in (action_limits or {}).items():
+            self._lane(action, limits)
+
+    def _lane(self, action: str, limits: Optional[Dict[str, int]] = None) -> _ActionLane:
+        lane = self._lanes.get(action)
+        if lane is None:
+            limits = limits or {}
+            lane = _ActionLane(
+                limits.get("concurrency", self._default_concurrency),
+                limits.get("queue", self._default_queue_limit),
+            )
+            self._lanes[action] = lane
+            self._order.append(action)
+        return lane
+
+    # ----------------- ciclo de vida -----------------
+
+    def start(self) -> None:
+        """
+        lanza los workers (idempotente)
+        """
+        with self._cond:
+            if self._threads:
+                return
+            for idx in range(self._workers):
+                th = threading.Thread(target=self._worker_loop, name=f"rpc-worker-{idx}", daemon=True)
+                self._threads.append(th)
+                th.start()
+        self.log.log(f"RPC MQTT: dispatcher iniciado con {self._workers} workers", origin=self._origen)
+
+    # ----------------- API -----------------
+
+    def submit(
+        self,
+        action: str,
+        run: Callable[[], None],
+        on_expired: Callable[[float], None],
+        received_at: Optional[float] = None,
+    ) -> bool:
+        """
+        encola un trabajo para la accion; retorna False si la cola de la accion esta llena.
+        run: se ejecuta en un worker si el request sigue vigente.
+        on_expired: se ejecuta (con los segundos esperados) si vencio el deadline.
+        """
+        job = {
+            "run": run,
+            "on_expired": on_expired,
+            "received_at": time.monotonic() if received_at is None else float(received_at),
+        }
+        with self._cond:
+            lane = self._lane(action)
+            if len(lane.pending) >= lane.queue_limit:
+                lane.stats["rejected"] += 1
+                return False
+            lane.pending.append(job)
+            lane.stats["submitted"] += 1
+            self._cond.notify()
+        return True
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        retorna metricas por accion (conteos, colas y tiempos en ms)
+        """
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._cond:
+            for action, lane in self._lanes.items():
+                st = lane.stats
+                started = st["completed"] + st["failed"]
+                dequeued = started + st["expired"]
+                out[action] = {
+                    "submitted": int(st["submitted"]),
+                    "completed": int(st["completed"]),
+                    "failed": int(st["failed"]),
+                    "rejected": int(st["rejected"]),
+                    "expired": int(st["expired"]),
+                    "queued": len(lane.pending),
+                    "active": lane.active,
+                    "concurrency": lane.concurrency,
+                    "queue_limit": lane.queue_limit,
+                    "queue_ms_avg": round(st["queue_ms_total"] / dequeued, 2) if dequeued else 0.0,
+                    "queue_ms_max": round(st["queue_ms_max"], 2),
+                    "handle_ms_avg": round(st["handle_ms_total"] / started, 2) if started else 0.0,
+                    "handle_ms_max": round(st["handle_ms_max"], 2),
+                }
+        return out
+
+    # ----------------- workers -----------------
+
+    def _pick_locked(self):
+        """
+        elige la proxima accion con trabajo pendiente y cupo libre (round-robin)
+        """
+        total = len(self._order)
+        for offset in range(total):
+            idx = (self._next_lane + offset) % total
+            action = self._order[idx]
+            lane = self._lanes[action]
+            if lane.pending and lane.active < lane.concurrency:
+                self._next_lane = (idx + 1) % total
+                return action, lane, lane.pending.popleft()
+        return None
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                picked = self._pick_locked()
+                while picked is None:
+                    self._cond.wait()
+                    picked = self._pick_locked()
+                action, lane, job = picked
+                lane.active += 1
+
+            started = time.monotonic()
+            waited = started - job["received_at"]
+            expired = self._deadline > 0 and waited > self._deadline
+            ok = True
+            try:
+                if expired:
+                    job["on_expired"](waited)
+                else:
+                    job["run"]()
+            except Exception as exc:
+                ok = False
+                self.log.log(f"RPC MQTT: error atendiendo '{action}': {exc}", origin=self._origen)
+            handle_ms = (time.monotonic() - started) * 1000.0
+
+            with self._cond:
+                lane.active -= 1
+                st = lane.stats
+                queue_ms = waited * 1000.0
+                st["queue_ms_total"] += queue_ms
+                st["queue_ms_max"] = max(st["queue_ms_max"], queue_ms)
+                if expired:
+                    st["expired"] += 1
+                else:
+                    st["completed" if ok else "failed"] += 1
+                    st["handle_ms_total"] += handle_ms
+                    st["handle_ms_max"] = max(st["handle_ms_max"], handle_ms)
+                # libera cupo de la accion: otro worker puede estar esperando por ella
+                self._cond.notify_all()
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import config
+from src.dao.dao_mqtt_outbox import KIND_STATE
+from src.utils import timebox
+from src.utils.payload_hash import semantic_hash
+
+
+class MqttStatePublisher:
+    """
+    Publicador de snapshots retenidos con deteccion de cambios por topico.
+    - Compara un hash del contenido semantico (sin campos volatiles como 'ts').
+    - Suprime publicaciones repetidas; re-publica igual si pasaron max_silence segundos (heartbeat).
+    - Lleva conteo de publicados/suprimidos por topico.
+    """
+
+    def __init__(self, manager, max_silence_seconds: float, volatile_fields: Iterable[str]):
+        self._manager = manager
+        self._max_silence = float(max_silence_seconds)
+        self._volatile = set(volatile_fields)
+        self._lock = threading.Lock()
+        self._topics: Dict[str, Dict[str, Any]] = {}
+
+    def publish_state(
+        self,
+        topic: str,
+        payload: Dict[str, Any],
+        qos: int,
+        retain: bool,
+        volatile_fields: Optional[Iterable[str]] = None,
+        force: bool = False,
+    ) -> bool:
+        """
+        publica el snapshot si cambio su contenido o vencio el heartbeat; retorna True si publico.
+        force: publica aunque no haya cambios (heartbeat decidido por el llamador)
+        """
+        volatile = self._volatile if volatile_fields is None else set(volatile_fields)
+        digest = semantic_hash(payload, volatile)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._topics.setdefault(
+                topic,
+                {"hash": None, "last_mono": 0.0, "last_ts": None, "published": 0, "suppressed": 0},
+            )
+            unchanged = entry["hash"] == digest
+            silent_for = now - entry["last_mono"]
+            if not force and unchanged and (self._max_silence <= 0 or silent_for < self._max_silence):
+                entry["suppressed"] += 1
+                return False
+
+        # durable: sin conexion queda en el outbox (coalescido por topico) y se entrega al reconectar
+        self._manager.publish(
+            topic,
+            json.dumps(payload, ensure_ascii=False),
+            qos=qos,
+            retain=retain,
+            durable=True,
+            kind=KIND_STATE,
+        )
+
+        with self._lock:
+            entry["hash"] = digest
+            entry["last_mono"] = now
+            entry["last_ts"] = timebox.utc_iso()
+            entry["published"] += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        retorna publicados/suprimidos y ultima publicacion por topico
+        """
+        with self._lock:
+            return {
+                topic: {
+                    "published": entry["published"],
+                    "suppressed": entry["suppressed"],
+                    "last_publish": entry["last_ts"],
+                }
+                for topic, entry in self._topics.items()
+            }
+
+
+_publishers: Dict[int, MqttStatePublisher] = {}
+_publishers_lock = threading.Lock()
+
+
+def for_manager(manager) -> MqttStatePublisher:
+    """
+    retorna el publicador de estado compartido para un MqttClientManager
+    """
+    with _publishers_lock:
+        pub = _publishers.get(id(manager))
+        if pub is None:
+            pub = MqttStatePublisher(
+                manager,
+                max_silence_seconds=config.MQTT_STATE_MAX_SILENCE_SECONDS,
+                volatile_fields=config.MQTT_STATE_VOLATILE_FIELDS,
+            )
+            _publishers[id(manager)] = pub
+        return pub
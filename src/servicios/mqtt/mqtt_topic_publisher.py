@@ -2,6 +2,7 @@ import json
 
 from typing import Any, Optional
 import config
+from . import mqtt_state_publisher
 
 class MqttTopicPublisher:
     """
@@ -52,4 +53,19 @@ class MqttTopicPublisher:
                      qos: Optional[int] = None, retain: Optional[bool] = None):
         self.publish(topic, json.dumps(obj, ensure_ascii=False), qos=qos, retain=retain)
 
-
+    def publish_state_json(self, topic: str, obj: dict,
+                           qos: Optional[int] = None, retain: Optional[bool] = None) -> bool:
+        """
+        Publica un snapshot de estado solo si cambio su contenido semantico
+        (ignora campos volatiles como 'ts') o vencio el heartbeat.
+        """
+        if not self._ensure_started():
+            self.log.log(f"No se pudo conectar para publicar en '{topic}'.", origin=self._origen)
+            return False
+        q = self._qos_state if qos is None else int(qos)
+        r = self._retain_state if retain is None else bool(retain)
+        try:
+            return mqtt_state_publisher.for_manager(self._manager).publish_state(topic, obj, qos=q, retain=r)
+        except Exception as e:
+            self.log.log(f"Error publicando en '{topic}': {e}", origin=self._origen)
+            return False
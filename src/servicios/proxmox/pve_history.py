@@ -0,0 +1,286 @@
+"""
+Serie de tiempo local de las VM de Proxmox.
+
+- Un buffer circular NumPy de tamano fijo por VM (ts, cpu_pct, mem_pct, disk_read_bytes,
+  disk_write_bytes), alimentado por el poller con cada snapshot de /api/pve/state:
+  la ingesta es O(VM) por consulta y nunca se pide /api/pve/history.
+- Ventana de PVE_HISTORY_HOURS: capacidad = ventana / PVE_POLL_INTERVAL_SECONDS puntos.
+- Persistencia periodica a binario (.npy por VM, escritura atomica) solo de las VM con
+  puntos nuevos; al iniciar se recargan los archivos descartando lo que salio de la ventana.
+- history_map() devuelve la forma que usaba /api/pve/history ({vmid: {"name", "history"}}),
+  reducida a lo sumo a max_points puntos por serie (promedio por bloques).
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import warnings
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import config
+from src.utils import timebox
+
+# columnas de cada punto; ts en epoch (s)
+FIELDS = ("ts", "cpu_pct", "mem_pct", "disk_read_bytes", "disk_write_bytes")
+_TS = 0
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _vm_point(vm: Dict[str, Any], ts: float) -> np.ndarray:
+    cpu = vm.get("cpu_usage_pct") if vm.get("cpu_usage_pct") is not None else vm.get("cpu_pct")
+    mem = _float(vm.get("mem_pct"))
+    if np.isnan(mem):
+        used, total = _float(vm.get("mem_used_gb")), _float(vm.get("mem_total_gb"))
+        if total > 0:
+            mem = used / total * 100
+    return np.array(
+        [ts, _float(cpu), mem, _float(vm.get("disk_read_bytes")), _float(vm.get("disk_write_bytes"))],
+        dtype=np.float64,
+    )
+
+
+class _Ring:
+    """
+    buffer circular de puntos (capacidad fija)
+    """
+
+    def __init__(self, capacity: int):
+        self.data = np.full((capacity, len(FIELDS)), np.nan, dtype=np.float64)
+        self.head = 0  # proxima posicion a escribir
+        self.count = 0
+
+    def append(self, point: np.ndarray) -> None:
+        self.data[self.head] = point
+        self.head = (self.head + 1) % self.data.shape[0]
+        self.count = min(self.count + 1, self.data.shape[0])
+
+    def last_ts(self) -> float:
+        if not self.count:
+            return -np.inf
+        return float(self.data[self.head - 1, _TS])
+
+    def ordered(self) -> np.ndarray:
+        """
+        puntos en orden cronologico (copia)
+        """
+        if self.count < self.data.shape[0]:
+            return self.data[: self.count].copy()
+        return np.concatenate((self.data[self.head:], self.data[: self.head]))
+
+
+class PveHistoryStore:
+    """
+    almacen de series por VM; ingest() desde el poller, history_map() para la vista
+    """
+
+    def __init__(self, base_dir: str, capacity: int, window_seconds: float, persist_seconds: float, max_points: int):
+        self.base_dir = base_dir
+        self.capacity = max(2, int(capacity))
+        self.window_seconds = max(1.0, float(window_seconds))
+        self.persist_seconds = max(0.0, float(persist_seconds))
+        self.max_points = max(2, int(max_points))
+        self._lock = threading.RLock()
+        self._rings: Dict[int, _Ring] = {}
+        self._names: Dict[int, str] = {}
+        self._dirty: set = set()
+        self._persisted_at = time.monotonic()
+        self.version = 0
+        self._load()
+
+    # ----------------- ingesta -----------------
+
+    def ingest(self, snapshot: Dict[str, Any]) -> int:
+        """
+        agrega un punto por VM del snapshot; retorna la cantidad de puntos nuevos
+        """
+        vms = snapshot.get("vms") if isinstance(snapshot, dict) else None
+        if not isinstance(vms, list) or snapshot.get("error"):
+            return 0
+        try:
+            ts = timebox.parse(snapshot.get("ts"), legacy=True).timestamp()
+        except Exception:
+            ts = time.time()
+        added = 0
+        with self._lock:
+            for vm in vms:
+                if not isinstance(vm, dict):
+                    continue
+                try:
+                    vmid = int(vm.get("vmid"))
+                except (TypeError, ValueError):
+                    continue
+                ring = self._rings.get(vmid)
+                if ring is None:
+                    ring = self._rings[vmid] = _Ring(self.capacity)
+                # el mismo snapshot puede llegar dos veces (p. ej. consulta fallida y reintento)
+                if ts <= ring.last_ts():
+                    continue
+                ring.append(_vm_point(vm, ts))
+                if vm.get("name"):
+                    self._names[vmid] = str(vm["name"])
+                self._dirty.add(vmid)
+                added += 1
+            if added:
+                self.version += 1
+        return added
+
+    # ----------------- consulta -----------------
+
+    def series(self, vmid: int) -> np.ndarray:
+        """
+        puntos de la ventana vigente de una VM, en orden cronologico (n x len(FIELDS))
+        """
+        with self._lock:
+            ring = self._rings.get(int(vmid))
+            if ring is None:
+                return np.empty((0, len(FIELDS)), dtype=np.float64)
+            data = ring.ordered()
+        cutoff = time.time() - self.window_seconds
+        return data[data[:, _TS] >= cutoff]
+
+    def _downsample(self, data: np.ndarray) -> np.ndarray:
+        n = data.shape[0]
+        if n <= self.max_points:
+            return data
+        block = -(-n // self.max_points)
+        # el bloque incompleto queda al principio: los puntos mas recientes no se mezclan
+        pad = (-n) % block
+        padded = np.vstack((np.full((pad, data.shape[1]), np.nan), data)) if pad else data
+        blocks = padded.reshape(-1, block, data.shape[1])
+        with warnings.catch_warnings():
+            # bloques sin datos de un campo: nanmean da NaN (esperado) y avisa
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            out = np.nanmean(blocks, axis=1)
+        out[:, _TS] = np.nanmax(blocks[:, :, _TS], axis=1)
+        return out
+
+    def history(self, vmid: int, fields: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        {campo: [{"ts": iso, "value": v}, ...]} de una VM, reducido a max_points
+        """
+        data = self._downsample(self.series(vmid))
+        if not data.shape[0]:
+            return {}
+        stamps = np.datetime_as_string(data[:, _TS].astype("datetime64[s]"), unit="s", timezone="UTC")
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        for name in fields or FIELDS[1:]:
+            col = data[:, FIELDS.index(name)]
+            valid = np.flatnonzero(~np.isnan(col))
+            out[name] = [{"ts": str(stamps[i]), "value": float(col[i])} for i in valid]
+        return out
+
+    def history_map(self, fields: Optional[List[str]] = None) -> Dict[int, Dict[str, Any]]:
+        with self._lock:
+            vmids = sorted(self._rings)
+            names = dict(self._names)
+        out: Dict[int, Dict[str, Any]] = {}
+        for vmid in vmids:
+            hist = self.history(vmid, fields)
+            if hist:
+                out[vmid] = {"name": names.get(vmid), "history": hist}
+        return out
+
+    def latest_iso(self) -> Optional[str]:
+        """
+        instante del ultimo punto de cualquier VM (ISO UTC) o None
+        """
+        with self._lock:
+            latest = max((ring.last_ts() for ring in self._rings.values()), default=-np.inf)
+        if not np.isfinite(latest):
+            return None
+        return str(np.datetime_as_string(np.datetime64(int(latest), "s"), unit="s", timezone="UTC"))
+
+    # ----------------- persistencia -----------------
+
+    def _vm_path(self, vmid: int) -> str:
+        return os.path.join(self.base_dir, f"vm_{vmid}.npy")
+
+    def _names_path(self) -> str:
+        return os.path.join(self.base_dir, "names.json")
+
+    def maybe_persist(self) -> int:
+        """
+        persiste si vencio el intervalo; retorna la cantidad de VM escritas
+        """
+        if time.monotonic() - self._persisted_at < self.persist_seconds:
+            return 0
+        return self.persist()
+
+    def persist(self) -> int:
+        with self._lock:
+            dirty = {vmid: self._rings[vmid].ordered() for vmid in self._dirty}
+            names = dict(self._names)
+            self._dirty = set()
+            self._persisted_at = time.monotonic()
+        if not dirty:
+            return 0
+        os.makedirs(self.base_dir, exist_ok=True)
+        written = 0
+        for vmid, data in dirty.items():
+            path = self._vm_path(vmid)
+            tmp = f"{path}.tmp"
+            try:
+                with open(tmp, "wb") as fh:
+                    np.save(fh, data, allow_pickle=False)
+                os.replace(tmp, path)
+                written += 1
+            except OSError:
+                with self._lock:
+                    self._dirty.add(vmid)
+        try:
+            tmp = f"{self._names_path()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({str(k): v for k, v in names.items()}, fh, ensure_ascii=False)
+            os.replace(tmp, self._names_path())
+        except OSError:
+            pass
+        return written
+
+    def _load(self) -> None:
+        if not os.path.isdir(self.base_dir):
+            return
+        try:
+            with open(self._names_path(), "r", encoding="utf-8") as fh:
+                self._names = {int(k): str(v) for k, v in json.load(fh).items()}
+        except (OSError, ValueError):
+            self._names = {}
+        cutoff = time.time() - self.window_seconds
+        for entry in os.listdir(self.base_dir):
+            if not (entry.startswith("vm_") and entry.endswith(".npy")):
+                continue
+            try:
+                vmid = int(entry[3:-4])
+                data = np.load(os.path.join(self.base_dir, entry), allow_pickle=False)
+            except (OSError, ValueError):
+                continue
+            if data.ndim != 2 or data.shape[1] != len(FIELDS):
+                continue
+            data = data[data[:, _TS] >= cutoff][-self.capacity:]
+            ring = _Ring(self.capacity)
+            ring.data[: data.shape[0]] = data
+            ring.count = data.shape[0]
+            ring.head = data.shape[0] % self.capacity
+            self._rings[vmid] = ring
+
+
+_WINDOW_SECONDS = config.PVE_HISTORY_HOURS * 3600
+
+pve_history = PveHistoryStore(
+    os.path.join(config.PANELEXEMYS_DATA_DIR, "pve_history"),
+    capacity=_WINDOW_SECONDS // max(1, config.PVE_POLL_INTERVAL_SECONDS),
+    window_seconds=_WINDOW_SECONDS,
+    persist_seconds=config.PVE_HISTORY_PERSIST_SECONDS,
+    max_points=config.PVE_HISTORY_MAX_POINTS,
+)
+
+atexit.register(pve_history.persist)
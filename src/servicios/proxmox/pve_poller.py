@@ -0,0 +1,193 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import config
+from src.logger import Logosaurio, logger as default_logger
+from src.servicios.mqtt import mqtt_event_bus as bus
+from src.servicios.proxmox.pve_history import PveHistoryStore, pve_history
+from src.utils import timebox
+from src.utils.paths import load_proxmox_state, update_proxmox_state
+from src.utils.payload_hash import semantic_hash
+from src.web.clients.proxmox_client import ProxmoxClient
+
+
+class ProxmoxPoller:
+    """
+    Poller de fondo de pve-service.
+    - Consulta /api/pve/state una vez cada PVE_POLL_INTERVAL_SECONDS, sin importar cuantos
+      navegadores o chequeos de alarma lean el estado.
+    - Mantiene el snapshot compartido por la vista Proxmox y las alarmas.
+    - Publica en MQTT_TOPIC_PROXMOX_ESTADO cuando cambia el contenido o cada
+      PVE_MQTT_PUBLISH_FACTOR consultas (heartbeat).
+    - Unico escritor del snapshot persistido: se escribe solo si cambio el contenido (hash
+      sin "ts") y a lo sumo una vez cada PVE_PERSIST_MIN_SECONDS; un cambio que cae dentro
+      del intervalo queda pendiente para la siguiente consulta habilitada.
+    - Alimenta la serie local por VM (pve_history) con cada snapshot valido.
+    """
+
+    def __init__(
+        self,
+        logger: Logosaurio,
+        client: ProxmoxClient,
+        interval_seconds: int,
+        publish_factor: int,
+        persist_min_seconds: float = 0,
+        history: Optional[PveHistoryStore] = None,
+    ):
+        self.logger = logger
+        self.client = client
+        self.interval = max(1, int(interval_seconds))
+        self.publish_factor = max(1, int(publish_factor))
+        self.persist_min_seconds = max(0.0, float(persist_min_seconds))
+        self.history = history
+        self._origen = "PVE/POLL"
+        self._lock = threading.Lock()
+        self._snapshot: Dict[str, Any] = {}
+        self._last_error: Optional[str] = None
+        self._last_signature: Optional[str] = None
+        self._polls = 0
+        self._persisted_signature: Optional[str] = None
+        self._persisted_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        lanza el hilo de consulta (idempotente)
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="pve-poller", daemon=True)
+            self._thread.start()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _loop(self) -> None:
+        next_run = time.monotonic()
+        while True:
+            try:
+                self.poll_once()
+            except Exception as exc:
+                self.logger.log(f"ERROR en ciclo de poller Proxmox: {exc}", origin=self._origen)
+            # agenda fija sobre reloj monotono: la duracion de la consulta no desplaza el periodo
+            next_run += self.interval
+            now = time.monotonic()
+            if next_run < now:
+                next_run = now
+            time.sleep(next_run - now)
+
+    def poll_once(self) -> Dict[str, Any]:
+        """
+        consulta pve-service, actualiza el snapshot compartido y publica si corresponde
+        """
+        try:
+            snapshot = self.client.get_state()
+            if not isinstance(snapshot, dict):
+                raise ValueError("snapshot Proxmox invalido (no dict)")
+        except Exception as exc:
+            with self._lock:
+                self._last_error = str(exc) or "pve-service no responde"
+                self._polls += 1
+                polls = self._polls
+            self.logger.log(f"ERROR consultando estado Proxmox: {exc}", origin=self._origen)
+            self._publish(self._offline_payload(), polls)
+            return {}
+
+        with self._lock:
+            self._snapshot = snapshot
+            self._last_error = None
+            self._polls += 1
+            polls = self._polls
+        self._persist(snapshot)
+        if self.history is not None:
+            try:
+                self.history.ingest(snapshot)
+                self.history.maybe_persist()
+            except Exception as exc:
+                self.logger.log(f"No se pudo actualizar la serie Proxmox: {exc}", origin=self._origen)
+        self._publish(self._mqtt_payload(snapshot), polls)
+        return snapshot
+
+    def _persist(self, snapshot: Dict[str, Any]) -> bool:
+        """
+        persiste el snapshot si cambio su contenido y paso el intervalo minimo; retorna True si escribio.
+        si la escritura a disco viene fallando el snapshot queda en la cache y el store la reintenta.
+        """
+        signature = semantic_hash(snapshot)
+        now = time.monotonic()
+        if signature == self._persisted_signature:
+            return False
+        if self._persisted_at is not None and now - self._persisted_at < self.persist_min_seconds:
+            return False
+        written = update_proxmox_state(snapshot)
+        if not written:
+            self.logger.log(
+                "Snapshot Proxmox actualizado en memoria; la escritura a disco viene fallando y se reintenta.",
+                origin=self._origen,
+            )
+        self._persisted_signature = signature
+        self._persisted_at = now
+        return written
+
+    def _offline_payload(self) -> Dict[str, Any]:
+        return {
+            "ts": timebox.utc_iso(),
+            "status": "offline",
+            "node": config.PVE_NODE_NAME,
+            "vms": [],
+            "missing": [],
+            "error": self._last_error,
+        }
+
+    @staticmethod
+    def _mqtt_payload(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        payload = dict(snapshot)
+        payload.setdefault("status", "offline" if snapshot.get("error") else "online")
+        payload.setdefault("node", config.PVE_NODE_NAME)
+        return payload
+
+    def _publish(self, payload: Dict[str, Any], polls: int) -> None:
+        signature = semantic_hash(payload)
+        with self._lock:
+            changed = signature != self._last_signature
+            self._last_signature = signature
+        heartbeat = polls % self.publish_factor == 0
+        if changed or heartbeat:
+            bus.publish_proxmox_state(payload, force=heartbeat)
+
+    # ----------------- lectura -----------------
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """
+        estado actual para alarmas: si la ultima consulta fallo retorna {"error": ...}
+        """
+        with self._lock:
+            if self._last_error is not None:
+                return {"error": self._last_error, "ts": self._snapshot.get("ts")}
+            return dict(self._snapshot)
+
+    def get_last_good(self) -> Dict[str, Any]:
+        """
+        ultimo snapshot obtenido de pve-service (o el persistido si todavia no hubo consulta)
+        """
+        with self._lock:
+            if self._snapshot:
+                return dict(self._snapshot)
+        persisted = load_proxmox_state({})
+        return persisted if isinstance(persisted, dict) else {}
+
+    def has_error(self) -> bool:
+        with self._lock:
+            return self._last_error is not None
+
+
+pve_poller = ProxmoxPoller(
+    default_logger,
+    ProxmoxClient(config.PVE_API_BASE),
+    interval_seconds=config.PVE_POLL_INTERVAL_SECONDS,
+    publish_factor=config.PVE_MQTT_PUBLISH_FACTOR,
+    persist_min_seconds=config.PVE_PERSIST_MIN_SECONDS,
+    history=pve_history,
+)
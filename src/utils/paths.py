@@ -1,7 +1,11 @@
+import atexit
+import copy
 import os
 import json
 import threading
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.logger import logger
 
 # -------------------------
 # resolucion de rutas base
@@ -73,21 +77,161 @@ def _load_json_file(path: str) -> Dict[str, Any]:
             content = f.read().strip()
             if not content:
                 return {}
-            return json.loads(content)
+            data = json.loads(content)
+            return data if isinstance(data, dict) else {}
     except Exception:
         return {}
 
-def _save_json_file(path: str, data: Dict[str, Any]) -> bool:
+def _save_json_file(path: str, data: Dict[str, Any]) -> None:
     """
-    persiste dict como json; retorna True si tuvo exito
+    persiste dict como json en forma atomica (archivo temporal + rename); ante un error lo relanza
     """
+    tmp_path = f"{path}.tmp"
     try:
         _ensure_parent_dir(path)
-        with open(path, "w", encoding="utf-8") as f:
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=4)
-        return True
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
     except Exception:
-        return False
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+RETRY_MAX_SECONDS = 60.0
+
+
+class _JsonStore:
+    """
+    cache en memoria de un archivo json de claves.
+    - lecturas: desde memoria; se re-lee el archivo solo si cambio su mtime/tamano (edicion externa).
+    - escrituras: en memoria y flush diferido (se juntan los cambios de flush_delay segundos)
+      con escritura atomica; flush() fuerza la escritura (tambien al salir del proceso).
+    - si la escritura falla se registra y se reintenta con espera creciente (hasta RETRY_MAX_SECONDS);
+      replace/update retornan False mientras el ultimo intento de escritura haya fallado.
+    - los valores se entregan copiados: el llamador puede modificarlos sin tocar la cache.
+    """
+
+    def __init__(self, path_fn: Callable[[], str], lock: threading.RLock, flush_delay: float = 1.0):
+        self._path_fn = path_fn
+        self._lock = lock
+        self.flush_delay = float(flush_delay)
+        self._data: Optional[Dict[str, Any]] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._failures = 0
+
+    def _current(self) -> Dict[str, Any]:
+        path = self._path_fn()
+        if self._dirty and self._data is not None:
+            # hay cambios propios sin escribir: la memoria manda
+            return self._data
+        signature = _file_signature(path)
+        if self._data is None or signature != self._signature:
+            self._data = _load_json_file(path)
+            self._signature = signature
+        return self._data
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._current())
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            data = self._current()
+            if key not in data:
+                return default
+            return copy.deepcopy(data[key])
+
+    def replace(self, data: Dict[str, Any]) -> bool:
+        with self._lock:
+            self._data = copy.deepcopy(dict(data))
+            self._mark_dirty()
+            return self._failures == 0
+
+    def update(self, values: Dict[str, Any]) -> bool:
+        with self._lock:
+            data = self._current()
+            changed = False
+            for key, value in values.items():
+                if key not in data or data[key] != value:
+                    data[key] = copy.deepcopy(value)
+                    changed = True
+            if changed:
+                self._mark_dirty()
+            return self._failures == 0
+
+    @property
+    def pending_failures(self) -> int:
+        """
+        intentos de escritura fallidos consecutivos (0 si el ultimo flush escribio)
+        """
+        with self._lock:
+            return self._failures
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+        self._arm(self.flush_delay)
+
+    def _arm(self, delay: float) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        with self._lock:
+            self._timer = None
+            if not self._dirty or self._data is None:
+                return True
+            path = self._path_fn()
+            try:
+                _save_json_file(path, self._data)
+            except Exception as exc:
+                # sin reintento el cambio quedaria sin escribir y las ediciones externas ignoradas
+                self._failures += 1
+                delay = min(max(self.flush_delay, 1.0) * 2 ** (self._failures - 1), RETRY_MAX_SECONDS)
+                logger.log(
+                    f"No se pudo escribir {path} (intento {self._failures}): {exc}. Reintento en {delay:.0f}s.",
+                    origin="APP/JSON",
+                )
+                self._arm(delay)
+                return False
+            self._failures = 0
+            self._dirty = False
+            self._signature = _file_signature(path)
+            return True
+
+
+_OBSERVAR_STORE = _JsonStore(get_observar_path, _OBSERVAR_LOCK)
+_CHARO_STORE = _JsonStore(get_charo_state_path, _CHARO_LOCK)
+_PROX_OBSERVAR_STORE = _JsonStore(get_proxmox_observar_path, _PROX_OBSERVAR_LOCK)
+
+
+def flush_all() -> None:
+    """
+    escribe los cambios pendientes de todos los archivos cacheados
+    """
+    for store in (_OBSERVAR_STORE, _CHARO_STORE, _PROX_OBSERVAR_STORE):
+        store.flush()
+
+
+atexit.register(flush_all)
 
 # -------------------------
 # api especifica observar.json
@@ -97,32 +241,25 @@ def load_observar() -> Dict[str, Any]:
     """
     retorna todo el contenido de observar.json como dict
     """
-    with _OBSERVAR_LOCK:
-        return _load_json_file(get_observar_path())
+    return _OBSERVAR_STORE.load()
 
 def save_observar(data: Dict[str, Any]) -> bool:
     """
     guarda el dict completo en observar.json
     """
-    with _OBSERVAR_LOCK:
-        return _save_json_file(get_observar_path(), data)
+    return _OBSERVAR_STORE.replace(data)
 
 def load_observar_key(key: str, default: Optional[Any] = None) -> Any:
     """
     retorna el valor de una clave en observar.json o default si no existe
     """
-    data = load_observar()
-    return data.get(key, default)
+    return _OBSERVAR_STORE.get(key, default)
 
 def update_observar_key(key: str, value: Any) -> bool:
     """
     actualiza una clave en observar.json preservando el resto
     """
-    with _OBSERVAR_LOCK:
-        path = get_observar_path()
-        data = _load_json_file(path)
-        data[key] = value
-        return _save_json_file(path, data)
+    return _OBSERVAR_STORE.update({key: value})
 
 # -------------------------
 # api especifica charo.json
@@ -132,49 +269,40 @@ def load_charo_state() -> Dict[str, Any]:
     """
     retorna el contenido de charo.json como dict
     """
-    with _CHARO_LOCK:
-        return _load_json_file(get_charo_state_path())
+    return _CHARO_STORE.load()
 
 def save_charo_state(data: Dict[str, Any]) -> bool:
     """
     persiste el estado completo en charo.json
     """
-    with _CHARO_LOCK:
-        return _save_json_file(get_charo_state_path(), data)
+    return _CHARO_STORE.replace(data)
 
 def load_proxmox_observar() -> Dict[str, Any]:
     """
     retorna el contenido del snapshot de proxmox
     """
-    with _PROX_OBSERVAR_LOCK:
-        return _load_json_file(get_proxmox_observar_path())
+    return _PROX_OBSERVAR_STORE.load()
 
 def save_proxmox_observar(data: Dict[str, Any]) -> bool:
     """
     persiste el snapshot de proxmox completo
     """
-    with _PROX_OBSERVAR_LOCK:
-        return _save_json_file(get_proxmox_observar_path(), data)
+    return _PROX_OBSERVAR_STORE.replace(data)
 
 def load_proxmox_state(default: Optional[Any] = None) -> Any:
     """
     retorna el valor de la clave proxmox_estado en el snapshot dedicado
     """
-    data = load_proxmox_observar()
-    return data.get("proxmox_estado", default)
+    return _PROX_OBSERVAR_STORE.get("proxmox_estado", default)
 
 def update_proxmox_state(snapshot: Any) -> bool:
     """
     actualiza la clave proxmox_estado
     """
-    with _PROX_OBSERVAR_LOCK:
-        path = get_proxmox_observar_path()
-        data = _load_json_file(path)
-        data["proxmox_estado"] = snapshot
-        return _save_json_file(path, data)
+    return _PROX_OBSERVAR_STORE.update({"proxmox_estado": snapshot})
 
 def load_proxmox_view_preference(default: str = "historico") -> str:
-    pref = str(load_proxmox_observar().get("proxmox_vistadefault", default)).strip().lower()
+    pref = str(_PROX_OBSERVAR_STORE.get("proxmox_vistadefault", default)).strip().lower()
     if pref not in _PROX_VIEW_VALUES:
         pref = default if default in _PROX_VIEW_VALUES else "historico"
     return pref
@@ -183,8 +311,4 @@ def update_proxmox_view_preference(preference: str) -> bool:
     normalized = str(preference).strip().lower()
     if normalized not in _PROX_VIEW_VALUES:
         raise ValueError("proxmox_vistadefault debe ser 'vivo' o 'historico'")
-    with _PROX_OBSERVAR_LOCK:
-        path = get_proxmox_observar_path()
-        data = _load_json_file(path)
-        data["proxmox_vistadefault"] = normalized
-        return _save_json_file(path, data)
+    return _PROX_OBSERVAR_STORE.update({"proxmox_vistadefault": normalized})
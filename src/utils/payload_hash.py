@@ -0,0 +1,24 @@
+import hashlib
+import json
+from typing import Any, Iterable
+
+
+def strip_fields(value: Any, fields: Iterable[str]) -> Any:
+    """
+    retorna una copia del valor sin las claves indicadas (recursivo en dicts y listas)
+    """
+    excluded = set(fields)
+    if isinstance(value, dict):
+        return {k: strip_fields(v, excluded) for k, v in value.items() if k not in excluded}
+    if isinstance(value, (list, tuple)):
+        return [strip_fields(v, excluded) for v in value]
+    return value
+
+
+def semantic_hash(value: Any, volatile_fields: Iterable[str] = ("ts",)) -> str:
+    """
+    hash estable del contenido semantico: ignora campos volatiles y el orden de claves
+    """
+    stable = strip_fields(value, volatile_fields)
+    raw = json.dumps(stable, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
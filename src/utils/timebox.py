@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Union
+from datetime import date, datetime, time
+from typing import Callable, Optional, Union
 
 from timeauthority import TimeAuthority, get_time_authority
 
@@ -9,16 +9,36 @@ _AUTH = get_time_authority()
 
 TimestampLike = Union[str, datetime]
 
+# reloj inyectable (replay/benchmark): funcion sin argumentos que retorna datetime UTC aware
+_clock: Optional[Callable[[], datetime]] = None
+
 
 def authority() -> TimeAuthority:
     return _AUTH
 
 
+def set_clock(clock: Callable[[], datetime]) -> None:
+    """
+    reemplaza la fuente de utc_now() (reloj virtual); reset_clock() vuelve al reloj real
+    """
+    global _clock
+    _clock = clock
+
+
+def reset_clock() -> None:
+    global _clock
+    _clock = None
+
+
 def utc_now() -> datetime:
+    if _clock is not None:
+        return _clock()
     return _AUTH.utc_now()
 
 
 def utc_iso(dt: datetime | None = None) -> str:
+    if dt is None and _clock is not None:
+        dt = _clock()
     return _AUTH.utc_iso(dt)
 
 
@@ -32,3 +52,10 @@ def to_local(value: TimestampLike, *, legacy: bool = False) -> datetime:
 
 def format_local(value: TimestampLike, fmt: str = "%Y-%m-%d %H:%M:%S", *, legacy: bool = False) -> str:
     return _AUTH.format_local(value, fmt, assume_utc_on_naive=legacy)
+
+
+def local_day_start(day: date) -> datetime:
+    """
+    00:00 hora local del dia calendario `day` (aware, en la zona de to_local)
+    """
+    return datetime.combine(day, time.min, tzinfo=to_local(utc_now()).tzinfo)
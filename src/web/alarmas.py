@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import dash
+from dash import dcc, html, dash_table
+from dash.dependencies import Input, Output
+
+from src.alarmas.notif_metrics import alarm_metrics, summarize
+import config
+
+_COLUMNS = (
+    ("Fase", "phase"),
+    ("Nombre", "name"),
+    ("Cantidad", "count"),
+    ("Errores", "errors"),
+    ("Prom. ms", "avg_ms"),
+    ("p50 ms", "p50_ms"),
+    ("p95 ms", "p95_ms"),
+    ("p99 ms", "p99_ms"),
+    ("Max ms", "max_ms"),
+    ("Ultimo ms", "last_ms"),
+)
+
+
+def get_alarmas_layout() -> html.Div:
+    """
+    Retorna el layout con los tiempos del pipeline de alarmas (histogramas por fase) y sus contadores.
+    """
+    return html.Div(
+        children=[
+            html.H1("Pipeline de alarmas", className="main-title"),
+            html.Div(id="alarmas-totales", className="info-message"),
+            dash_table.DataTable(
+                id="alarmas-metrics-table",
+                columns=[{"name": label, "id": key} for label, key in _COLUMNS],
+                data=[],
+                sort_action="native",
+                style_table={'overflowX': 'auto'},
+                style_cell={'textAlign': 'left', 'fontFamily': 'Inter, sans-serif', 'padding': '8px 12px'},
+                style_header={'backgroundColor': '#66A5AD', 'color': 'white', 'fontWeight': 'bold'},
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': '#C4DFE6'
+                    },
+                    {
+                        'if': {'filter_query': '{errors} > 0', 'column_id': 'errors'},
+                        'color': 'red',
+                        'fontWeight': 'bold'
+                    },
+                ],
+            ),
+            dcc.Interval(id="alarmas-metrics-interval", interval=config.DASH_REFRESH_SECONDS, n_intervals=0),
+        ],
+    )
+
+
+def register_alarmas_callbacks(app: dash.Dash) -> None:
+    """
+    Registra el refresco periodico de la tabla de metricas (lee el registro en memoria del proceso).
+    """
+
+    @app.callback(
+        Output("alarmas-metrics-table", "data"),
+        Output("alarmas-totales", "children"),
+        Input("alarmas-metrics-interval", "n_intervals"),
+    )
+    def update_alarmas_metrics(_n_intervals: int):
+        snapshot = alarm_metrics.snapshot()
+        totals = snapshot.get("totals", {})
+        label = (
+            f"Desde hace {int(snapshot.get('uptime_seconds', 0)) // 60} min: "
+            f"{totals.get('triggered', 0)} alarmas disparadas, "
+            f"{totals.get('resolved', 0)} resueltas, "
+            f"{totals.get('flap_started', 0)} intermitencias"
+        )
+        return summarize(snapshot), label
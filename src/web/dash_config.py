@@ -10,6 +10,7 @@ from src.web.dashboard.middleware_dash import get_dashboard, register_dashboard_
 from src.web.dashboard.middleware_kpi import register_kpi_panel_callbacks
 from src.web.dashboard.middleware_histograma import register_controls_and_graph_callbacks
 from src.web.dashboard.middleware_tabla import register_main_data_table_callbacks
+from src.web.dashboard.middleware_disponibilidad import register_disponibilidad_callbacks
 from src.web.reles_panel import get_reles_micom_layout, register_reles_micom_callbacks
 from src.web.mantenimiento import get_mantenimiento_layout, register_mantenimiento_callbacks
 from src.web.email import get_email_layout, register_email_callbacks
@@ -20,6 +21,7 @@ from src.web.broker.broker_view import (
 )
 from src.web.proxmox import get_proxmox_layout, register_proxmox_callbacks
 from src.web.charito import get_charito_layout, register_charito_callbacks
+from src.web.alarmas import get_alarmas_layout, register_alarmas_callbacks
 
 import config
 
@@ -34,6 +36,7 @@ BASE_TABS = (
     ("Email", f"{BASE}/email"),
     ("Proxmox", f"{BASE}/proxmox"),
     ("Charito", f"{BASE}/charito"),
+    ("Alarmas", f"{BASE}/alarmas"),
 )
 
 PROTECTED_TABS = (
@@ -82,6 +85,7 @@ def configure_dash_app(
     email_layout = get_email_layout()
     broker_layout = get_broker_layout()
     charito_layout = get_charito_layout()
+    alarmas_layout = get_alarmas_layout()
 
     def serve_layout():
         mode = _current_mode()
@@ -125,6 +129,7 @@ def configure_dash_app(
         f"{BASE}/email": email_layout,
         f"{BASE}/proxmox": get_proxmox_layout,
         f"{BASE}/charito": charito_layout,
+        f"{BASE}/alarmas": alarmas_layout,
     }
 
     @app.callback(Output("page-content", "children"), Input("url", "pathname"))
@@ -155,9 +160,11 @@ def configure_dash_app(
     register_kpi_panel_callbacks(app, config)
     register_controls_and_graph_callbacks(app)
     register_main_data_table_callbacks(app)
+    register_disponibilidad_callbacks(app)
     register_reles_micom_callbacks(app)
     register_mantenimiento_callbacks(app)
     register_email_callbacks(app, api_key)
     register_broker_callbacks(app)
     register_proxmox_callbacks(app)
     register_charito_callbacks(app)
+    register_alarmas_callbacks(app)
@@ -5,6 +5,7 @@ import config
 from src.web.dashboard.middleware_kpi import get_kpi_panel_layout
 from src.web.dashboard.middleware_histograma import get_controls_and_graph_layout
 from src.web.dashboard.middleware_tabla import get_main_data_table_layout
+from src.web.dashboard.middleware_disponibilidad import get_disponibilidad_layout
 from src.web.clients.router_client import router_client
 
 def get_dashboard(db_grd_descriptions, initial_grd_value):
@@ -66,6 +67,7 @@ def get_dashboard(db_grd_descriptions, initial_grd_value):
         ),
 
         get_kpi_panel_layout(),
+        get_disponibilidad_layout(),
         dcc.Store(id='time-window-state', data={'time_window': '1sem', 'page_number': 0, 'current_grd_id': initial_grd_value}),
         html.Div(
             className='grd-focus-section',
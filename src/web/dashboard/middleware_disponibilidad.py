@@ -0,0 +1,99 @@
+import dash
+from dash import dcc, html, dash_table
+from dash.dependencies import Input, Output
+
+import config
+from src.servicios.modbus.grd_disponibilidad import grd_disponibilidad
+from src.web.clients.modbus_client import modbus_client
+
+PERIOD_OPTIONS = [
+    {'label': 'Ultimo dia', 'value': 1},
+    {'label': 'Ultima semana', 'value': 7},
+    {'label': 'Ultimo mes', 'value': 30},
+    {'label': 'Ultimos 90 dias', 'value': 90},
+    {'label': 'Ultimo ano', 'value': 365},
+]
+
+_COLUMNS = (
+    ("Equipo", "equipo"),
+    ("Disponibilidad %", "porcentaje"),
+    ("Desconectado (min)", "desconectado_min"),
+    ("Caidas", "caidas"),
+)
+
+
+def get_disponibilidad_layout():
+    """
+    Define el layout del ranking de GRD con peor disponibilidad en el periodo elegido.
+    """
+    return html.Div(className='grd-focus-section', children=[
+        html.Div(className='grd-focus-header', children=[
+            html.Div(className='grd-focus-title-block', children=[
+                html.H2("Peor disponibilidad", className='grd-focus-title'),
+                html.P(
+                    "Calculada desde el resumen diario por GRD (dias UTC, incluye el dia en curso).",
+                    className='grd-focus-subtitle',
+                ),
+            ]),
+            dcc.Dropdown(
+                id='disponibilidad-periodo',
+                options=PERIOD_OPTIONS,
+                value=7,
+                clearable=False,
+                className='grd-focus-dropdown',
+            ),
+        ]),
+        dash_table.DataTable(
+            id='disponibilidad-table',
+            columns=[{"name": label, "id": key} for label, key in _COLUMNS],
+            data=[],
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left', 'fontFamily': 'Inter, sans-serif', 'padding': '8px 12px'},
+            style_header={'backgroundColor': '#66A5AD', 'color': 'white', 'fontWeight': 'bold'},
+            style_data_conditional=[
+                {
+                    'if': {'row_index': 'odd'},
+                    'backgroundColor': '#C4DFE6'
+                },
+                {
+                    'if': {'filter_query': f'{{porcentaje}} < {config.GLOBAL_THRESHOLD_AMARILLO}', 'column_id': 'porcentaje'},
+                    'color': 'red',
+                    'fontWeight': 'bold'
+                },
+            ],
+        ),
+        html.P(id='disponibilidad-info', className='info-text'),
+    ])
+
+
+def register_disponibilidad_callbacks(app: dash.Dash):
+    """
+    Registra el refresco del ranking (lee solo el resumen diario, sin consultar el middleware).
+    """
+    @app.callback(
+        Output('disponibilidad-table', 'data'),
+        Output('disponibilidad-info', 'children'),
+        [Input('disponibilidad-periodo', 'value'),
+         Input('interval-component', 'n_intervals')]
+    )
+    def update_disponibilidad(days, _n_intervals):
+        try:
+            ranking = grd_disponibilidad.worst(days or 7, limit=config.GRD_AVAILABILITY_RANKING)
+        except Exception as exc:
+            return [], f"No se pudo calcular la disponibilidad: {exc}"
+        if not ranking:
+            return [], "Sin datos de disponibilidad todavia (el historial de GRD se esta sincronizando)."
+        try:
+            descriptions = modbus_client.get_descriptions()
+        except Exception:
+            descriptions = {}
+        rows = [
+            {
+                "equipo": descriptions.get(item["grd_id"], f"GRD {item['grd_id']}"),
+                "porcentaje": item["porcentaje"],
+                "desconectado_min": item["desconectado_min"],
+                "caidas": item["caidas"],
+            }
+            for item in ranking
+        ]
+        return rows, ""
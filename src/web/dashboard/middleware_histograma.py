@@ -4,6 +4,7 @@ from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import timedelta
+from src.servicios.modbus.grd_historial import grd_historial
 from src.utils import timebox
 from src.web.clients.modbus_client import modbus_client
 
@@ -117,8 +118,7 @@ def register_controls_and_graph_callbacks(app: dash.Dash):
             raise dash.exceptions.PreventUpdate
 
         try:
-            history_meta = modbus_client.get_history(grd_id, time_window, page_number)
-            total_segments = int(history_meta.get("total_periods", 0))
+            total_segments = grd_historial.total_periods(grd_id, time_window)
         except Exception:
             total_segments = 0
 
@@ -153,8 +153,7 @@ def register_controls_and_graph_callbacks(app: dash.Dash):
             return {'display': 'none'}, True, True
 
         try:
-            history_meta = modbus_client.get_history(grd_id, time_window, page_number)
-            total_segments = int(history_meta.get("total_periods", 0))
+            total_segments = grd_historial.total_periods(grd_id, time_window)
         except Exception:
             total_segments = 0
 
@@ -208,7 +207,8 @@ def register_controls_and_graph_callbacks(app: dash.Dash):
         xaxis_dtick = None
         xaxis_tickangle = 0
         try:
-            history_payload = modbus_client.get_history(selected_grd_id, time_window, page_number)
+            # espejo local (grd_historial): no se pide el historial al middleware por refresco
+            history_payload = grd_historial.get_history(selected_grd_id, time_window, page_number)
         except Exception:
             history_payload = {
                 "data": [],
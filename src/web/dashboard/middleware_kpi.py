@@ -4,6 +4,7 @@ from dash.dependencies import Input, Output
 import plotly.graph_objects as go
 from src.utils import timebox
 from src.web.clients.modbus_client import modbus_client
+from src.servicios.modbus.grd_state_table import grd_state_table
 
 def get_kpi_panel_layout():
     """
@@ -60,19 +61,9 @@ def register_kpi_panel_callbacks(app: dash.Dash, config):
         Input('interval-component', 'n_intervals')
     )
     def update_kpi_panel(n_intervals):
-        try:
-            summary = modbus_client.get_summary()
-        except Exception:
-            summary = {"summary": {"porcentaje": 0, "total": 0, "conectados": 0}, "disconnected": [], "states": {}}
-        latest_states_from_db = summary.get("states", {})
-
-        total_grds_for_kpi = len(latest_states_from_db)
-        connected_grds_count = sum(1 for state in latest_states_from_db.values() if state == 1)
-
-        if total_grds_for_kpi > 0:
-            connection_percentage = (connected_grds_count / total_grds_for_kpi) * 100
-        else:
-            connection_percentage = 0
+        # tabla de estados compartida con alarmas y RPC: mismo porcentaje y misma lista
+        summary = grd_state_table.snapshot()
+        connection_percentage = summary.get("summary", {}).get("porcentaje", 0)
 
         gauge_figure = go.Figure(
             go.Indicator(
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
 import time
+from datetime import date, timedelta
 import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash import dcc, html, dash_table
+from dash.dependencies import Input, Output, State
 
 from src.utils.paths import load_observar
 from src.servicios.email.mensagelo_client import MensageloClient
+from src.dao.dao_mensajes_enviados import mensajes_enviados_dao
 from src.servicios.mqtt import mqtt_event_bus
 from src.utils import timebox
 import config
 
+HISTORY_PAGE_SIZE = 25
+SUCCESS_OPTIONS = [
+    {"label": "Todos", "value": "todos"},
+    {"label": "Aceptados", "value": "ok"},
+    {"label": "Fallidos", "value": "fallo"},
+]
+
 
 def get_email_layout() -> html.Div:
     """
@@ -91,10 +100,127 @@ def get_email_layout() -> html.Div:
                 ],
                 style={"textAlign": "center", "marginTop": "20px"},
             ),
+            _get_history_layout(),
         ]
     )
 
 
+def _get_history_layout() -> html.Div:
+    """
+    Historial de envios (mensajes_enviados) con filtros y paginacion por clave en el servidor.
+    """
+    return html.Div(
+        className="kpi-item",
+        style={"marginTop": "24px"},
+        children=[
+            html.H2("Historial de envios", className="sub-title"),
+            html.Div(
+                className="email-history-filters",
+                style={"display": "flex", "flexWrap": "wrap", "gap": "12px", "marginBottom": "12px"},
+                children=[
+                    dcc.Dropdown(
+                        id="email-hist-type",
+                        placeholder="Tipo de mensaje",
+                        options=[],
+                        style={"minWidth": "200px"},
+                    ),
+                    dcc.Dropdown(
+                        id="email-hist-success",
+                        options=SUCCESS_OPTIONS,
+                        value="todos",
+                        clearable=False,
+                        style={"minWidth": "160px"},
+                    ),
+                    dcc.DatePickerRange(
+                        id="email-hist-range",
+                        display_format="YYYY-MM-DD",
+                        start_date_placeholder_text="Desde",
+                        end_date_placeholder_text="Hasta",
+                        clearable=True,
+                    ),
+                    dcc.Input(
+                        id="email-hist-subject",
+                        type="text",
+                        placeholder="Buscar en asunto",
+                        debounce=True,
+                    ),
+                ],
+            ),
+            dash_table.DataTable(
+                id="email-hist-table",
+                columns=[
+                    {"name": "Fecha", "id": "fecha"},
+                    {"name": "Tipo", "id": "message_type"},
+                    {"name": "Asunto", "id": "subject"},
+                    {"name": "Resultado", "id": "resultado"},
+                    {"name": "Destinatarios", "id": "destinatarios"},
+                ],
+                data=[],
+                page_action="none",
+                style_table={'overflowX': 'auto'},
+                style_cell={'textAlign': 'left', 'fontFamily': 'Inter, sans-serif', 'padding': '8px 12px'},
+                style_header={'backgroundColor': '#66A5AD', 'color': 'white', 'fontWeight': 'bold'},
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': '#C4DFE6'
+                    },
+                    {
+                        'if': {'filter_query': '{resultado} = "fallo"', 'column_id': 'resultado'},
+                        'color': 'red',
+                        'fontWeight': 'bold'
+                    },
+                ],
+            ),
+            html.Div(
+                className="pagination-controls-container",
+                style={"marginTop": "10px"},
+                children=[
+                    html.Button("Mas recientes", id="email-hist-newer", n_clicks=0, className="pagination-button"),
+                    html.Span(id="email-hist-page", style={"margin": "0 12px"}),
+                    html.Button("Anteriores", id="email-hist-older", n_clicks=0, className="pagination-button"),
+                ],
+            ),
+            # pila de cursores (ts, id) de las paginas ya vistas; "next" es el de la pagina siguiente
+            dcc.Store(id="email-hist-state", data={"stack": [], "cursor": None, "next": None}),
+        ],
+    )
+
+
+def _history_filters(msg_type, success, start_date, end_date, subject) -> dict:
+    # el selector entrega dias locales; ts se guarda en UTC ISO: se comparan limites en UTC
+    ts_from = ts_to = None
+    if start_date:
+        ts_from = timebox.utc_iso(timebox.local_day_start(date.fromisoformat(str(start_date)[:10])))
+    if end_date:
+        # fin inclusivo en la UI: se consulta hasta el inicio del dia siguiente
+        ts_to = timebox.utc_iso(timebox.local_day_start(date.fromisoformat(str(end_date)[:10]) + timedelta(days=1)))
+    return {
+        "message_type": msg_type or None,
+        "success": {"ok": True, "fallo": False}.get(success),
+        "ts_from": ts_from,
+        "ts_to": ts_to,
+        "subject": (subject or "").strip() or None,
+    }
+
+
+def _history_row(item: dict) -> dict:
+    recipients = item.get("recipients")
+    if isinstance(recipients, list):
+        recipients = ", ".join(str(r) for r in recipients)
+    try:
+        fecha = timebox.format_local(item.get("ts"), legacy=True)
+    except Exception:
+        fecha = str(item.get("ts"))
+    return {
+        "fecha": fecha,
+        "message_type": item.get("message_type"),
+        "subject": item.get("subject"),
+        "resultado": "aceptado" if item.get("success") else "fallo",
+        "destinatarios": recipients,
+    }
+
+
 def register_email_callbacks(app: dash.Dash, key) -> None:
     """
     Registra callbacks encargados de la prueba y el monitoreo del servidor de correo.
@@ -213,3 +339,55 @@ def register_email_callbacks(app: dash.Dash, key) -> None:
 
 
 
+
+    @app.callback(
+        Output("email-hist-table", "data"),
+        Output("email-hist-state", "data"),
+        Output("email-hist-page", "children"),
+        Output("email-hist-newer", "disabled"),
+        Output("email-hist-older", "disabled"),
+        Output("email-hist-type", "options"),
+        Input("email-hist-type", "value"),
+        Input("email-hist-success", "value"),
+        Input("email-hist-range", "start_date"),
+        Input("email-hist-range", "end_date"),
+        Input("email-hist-subject", "value"),
+        Input("email-hist-newer", "n_clicks"),
+        Input("email-hist-older", "n_clicks"),
+        State("email-hist-state", "data"),
+    )
+    def update_email_history(msg_type, success, start_date, end_date, subject, _newer, _older, state):
+        ctx = dash.callback_context
+        triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
+        state = dict(state or {})
+        stack = list(state.get("stack") or [])
+        cursor = state.get("cursor")
+
+        if triggered_id == "email-hist-older":
+            if not state.get("next"):
+                raise dash.exceptions.PreventUpdate
+            stack.append(cursor)
+            cursor = state["next"]
+        elif triggered_id == "email-hist-newer":
+            if not stack:
+                raise dash.exceptions.PreventUpdate
+            cursor = stack.pop()
+        else:
+            # cambio de filtros: vuelve a la pagina mas reciente
+            stack, cursor = [], None
+
+        try:
+            page = mensajes_enviados_dao.query_messages(
+                after=cursor,
+                limit=HISTORY_PAGE_SIZE,
+                **_history_filters(msg_type, success, start_date, end_date, subject),
+            )
+            types = mensajes_enviados_dao.list_message_types()
+        except Exception as exc:
+            return [], state, f"Error consultando historial: {exc}", True, True, dash.no_update
+
+        rows = [_history_row(item) for item in page["items"]]
+        new_state = {"stack": stack, "cursor": cursor, "next": page["next"]}
+        label = f"Pagina {len(stack) + 1}" if rows else "Sin envios para los filtros elegidos"
+        options = [{"label": t, "value": t} for t in types]
+        return rows, new_state, label, not stack, not page["next"], options
@@ -7,10 +7,9 @@ import plotly.graph_objects as go
 from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
 
-from src.web.clients.proxmox_client import ProxmoxClient
+from src.servicios.proxmox.pve_history import pve_history
+from src.servicios.proxmox.pve_poller import pve_poller
 from src.utils.paths import (
-    load_proxmox_state,
-    update_proxmox_state,
     load_proxmox_view_preference,
     update_proxmox_view_preference,
 )
@@ -575,34 +574,8 @@ def _build_classic_cards(vms: List[Dict[str, Any]]) -> List[html.Div]:
 
     return cards
 
-def _latest_history_timestamp(history_map: Dict[int, Dict[str, Any]]) -> Optional[str]:
-    latest_dt: Optional[datetime] = None
-    for info in history_map.values():
-        history = info.get("history") if isinstance(info, dict) else None
-        if not isinstance(history, dict):
-            continue
-        for series in history.values():
-            if not isinstance(series, list):
-                continue
-            for point in series:
-                if not isinstance(point, dict):
-                    continue
-                ts = point.get("ts")
-                dt = _parse_timestamp(ts)
-                if dt is None:
-                    continue
-                if latest_dt is None or dt > latest_dt:
-                    latest_dt = dt
-    if latest_dt is None:
-        return None
-    return timebox.utc_iso(latest_dt)
-
-
-
 
 def _render_proxmox_snapshot(view_toggle_value: Any, logger: Optional[Any] = None):
-    client = ProxmoxClient(config.PVE_API_BASE)
-
     selected_view = "history" if _view_pref_to_bool(_default_view_preference()) else "classic"
     if isinstance(view_toggle_value, bool):
         selected_view = "history" if view_toggle_value else "classic"
@@ -615,11 +588,8 @@ def _render_proxmox_snapshot(view_toggle_value: Any, logger: Optional[Any] = Non
     if selected_view not in {"history", "classic"}:
         selected_view = "history"
 
-    try:
-        prox = client.get_state()
-        update_proxmox_state(prox)
-    except Exception:
-        prox = load_proxmox_state({})
+    # snapshot del poller de fondo: la vista no consulta pve-service por cada refresco
+    prox = pve_poller.get_last_good()
 
     ts = prox.get("ts") if isinstance(prox, dict) else None
     vms = prox.get("vms") if isinstance(prox, dict) else []
@@ -629,12 +599,8 @@ def _render_proxmox_snapshot(view_toggle_value: Any, logger: Optional[Any] = Non
     history_map: Dict[str, Any] = {}
     history_meta: Dict[str, Any] = {}
     if selected_view == "history":
-        try:
-            hist = client.get_history()
-            history_map = hist.get("vms", {}) if isinstance(hist, dict) else {}
-            history_meta = hist.get("meta", {}) if isinstance(hist, dict) else {}
-        except Exception:
-            history_map, history_meta = {}, {}
+        # serie local alimentada por el poller: sin trafico a /api/pve/history
+        history_map = pve_history.history_map([key for key, *_ in _HISTORY_METRICS])
     if not isinstance(vms, list):
         vms = []
     for vm in vms:
@@ -669,7 +635,7 @@ def _render_proxmox_snapshot(view_toggle_value: Any, logger: Optional[Any] = Non
             )
         vms = synthetic_vms
         if not ts:
-            ts = _latest_history_timestamp(history_map)
+            ts = pve_history.latest_iso()
 
     if history_only:
         selected_view = "history"
@@ -720,7 +686,7 @@ def _render_proxmox_snapshot(view_toggle_value: Any, logger: Optional[Any] = Non
             )
         status_element = html.Div(status_children)
 
-    history_signature = _latest_history_timestamp(history_map) or ""
+    history_signature = (pve_history.latest_iso() or "") if history_map else ""
     signature = f"{selected_view}|{ts or history_signature or ''}|{history_signature}|{','.join(str(m) for m in sorted(missing)) if missing else ''}|{error or ''}"
 
     return cards, last_update, status_element, signature
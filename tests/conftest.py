@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+
+# config exige estas variables al importarse; valores locales para correr sin servicios
+_ENV = {
+    "PANELEXEMYS_HOST": "127.0.0.1",
+    "PANELEXEMYS_PORT": "8052",
+    "PANELEXEMYS_DATA_DIR": tempfile.mkdtemp(prefix="panelexemys-tests-"),
+    "MODBUS_MW_API_BASE": "http://127.0.0.1:9",
+    "MODBUS_MW_HTTP_TIMEOUT": "1",
+    "MODBUS_HTTP_POLL_SECONDS": "5",
+    "PUBLIC_BASE_URL": "http://127.0.0.1",
+    "DASH_REFRESH_SECONDS": "5000",
+    "GLOBAL_THRESHOLD_ROJO": "40",
+    "GLOBAL_THRESHOLD_AMARILLO": "90",
+    "ALARM_CHECK_INTERVAL_SECONDS": "30",
+    "ALARM_MIN_SUSTAINED_DURATION_MINUTES": "10",
+    "ALARM_EMAIL_RECIPIENT": "alarmas@example.com",
+    "ALARM_EMAIL_SUBJECT_PREFIX": "[panelexemys] ",
+    "MENSAGELO_BASE_URL": "http://127.0.0.1:9",
+    "MENSAGELO_TIMEOUT_SECONDS": "1",
+    "MENSAGELO_API_KEY": "test",
+    "MENSAGELO_MAX_RETRIES": "1",
+    "MENSAGELO_BACKOFF_INITIAL": "0.1",
+    "MENSAGELO_BACKOFF_MAX": "1",
+    "MQTT_BROKER_HOST": "127.0.0.1",
+    "MQTT_BROKER_PORT": "1883",
+    "MQTT_BROKER_USERNAME": "test",
+    "MQTT_BROKER_PASSWORD": "test",
+    "MQTT_BROKER_KEEPALIVE": "30",
+    "MQTT_CONNECT_TIMEOUT": "1",
+    "MQTT_RECONNECT_DELAY_MIN": "1",
+    "MQTT_RECONNECT_DELAY_MAX": "5",
+    "MQTT_BROKER_USE_TLS": "0",
+    "MQTT_TLS_INSECURE": "0",
+    "MQTT_SERVICE_STATUS_TOPIC": "panelexemys/status",
+    "MQTT_SERVICE_STATUS_QOS": "1",
+    "MQTT_SERVICE_STATUS_RETAIN": "1",
+    "MQTT_WILL_PAYLOAD": "offline",
+    "MQTT_TOPIC_MODEM_CONEXION": "estado/sensor",
+    "MQTT_TOPIC_GRADO": "estado/exemys",
+    "MQTT_TOPIC_GRDS": "estado/grds",
+    "MQTT_TOPIC_EMAIL_ESTADO": "estado/email",
+    "MQTT_TOPIC_EMAIL_EVENT": "evento/email",
+    "MQTT_TOPIC_PROXMOX_ESTADO": "estado/proxmox",
+    "MQTT_PUBLISH_QOS_STATE": "1",
+    "MQTT_PUBLISH_RETAIN_STATE": "1",
+    "MQTT_PUBLISH_QOS_EVENT": "1",
+    "MQTT_PUBLISH_RETAIN_EVENT": "0",
+    "ROUTER_SERVICE_BASE_URL": "http://127.0.0.1:9",
+    "ROUTER_CLIENT_TIMEOUT_SECONDS": "1",
+    "CHARITO_API_BASE": "http://127.0.0.1:9",
+    "CHARITO_STALE_THRESHOLD_SECONDS": "60",
+    "PVE_API_BASE": "http://127.0.0.1:9",
+    "PVE_NODE_NAME": "pve",
+    "PVE_VHOST_IDS": "100,101",
+    "PVE_POLL_INTERVAL_SECONDS": "10",
+    "PVE_HTTP_TIMEOUT_SECONDS": "2",
+    "PVE_VERIFY_SSL": "0",
+    "PVE_HISTORY_HOURS": "24",
+    "PVE_MQTT_PUBLISH_FACTOR": "6",
+}
+for _name, _value in _ENV.items():
+    os.environ.setdefault(_name, _value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+import config
+from src.alarmas.notif_manager import NotifManager
+from src.alarmas.recorder import SnapshotRecorder
+from src.alarmas.replay import DecisionLog, load_records, run_replay
+from src.utils import timebox
+
+
+class _Logger:
+    def log(self, message, origin=""):
+        pass
+
+
+class _Modbus:
+    def get_summary(self):
+        return {
+            "states": {"1": 1, "2": 0},
+            "disconnected": [
+                {"id_grd": 2, "description": "GRD dos", "last_disconnected_timestamp": "2026-01-01T00:00:00Z"}
+            ],
+        }
+
+
+class _Status:
+    def get_status(self):
+        return {"state": "ok"}
+
+
+class _Proxmox:
+    def get_snapshot(self):
+        vms = [{"vmid": int(vmid), "name": f"vm{vmid}", "status": "running"} for vmid in config.PVE_VHOST_IDS]
+        return {"status": "online", "vms": vms, "ts": timebox.utc_iso()}
+
+
+class _Charito:
+    def get_state(self):
+        return {}
+
+
+def _clients():
+    return {"modbus": _Modbus(), "router": _Status(), "ge": _Status(), "proxmox": _Proxmox(), "charito": _Charito()}
+
+
+def test_replay_of_own_recording(tmp_path):
+    path = tmp_path / "alarmas.jsonl"
+    now = [datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)]
+    start = timebox.utc_iso(now[0])
+    timebox.set_clock(lambda: now[0])
+    try:
+        manager = NotifManager(
+            _Logger(),
+            set(),
+            key=None,
+            clients=_clients(),
+            delivery=DecisionLog(),
+            recorder=SnapshotRecorder(str(path)),
+            persist_state=False,
+            digest_clock=lambda: now[0].timestamp(),
+        )
+        # GRD 2 desconectado durante mas que el minimo sostenido, un ciclo por minuto
+        for _ in range(config.ALARM_MIN_SUSTAINED_DURATION_MINUTES + 3):
+            manager.run_alarm_processing()
+            now[0] += timedelta(minutes=1)
+    finally:
+        timebox.reset_clock()
+
+    records = load_records(str(path))
+    assert {r["source"] for r in records} == {"modbus", "router", "ge", "proxmox", "charito"}
+
+    result = run_replay(records, interval_seconds=60)
+    assert result["cycles"] == config.ALARM_MIN_SUSTAINED_DURATION_MINUTES + 3
+    assert [d["idem_key"] for d in result["decisions"]] == [f"nodo:2:{start}"]
+    assert result["decisions"][0]["subject"] == "GRD dos sin conexion"
+
+
+def test_proxmox_fetch_error_is_reported():
+    class _Broken:
+        def get_snapshot(self):
+            raise RuntimeError("pve caido")
+
+    clients = _clients()
+    clients["proxmox"] = _Broken()
+    manager = NotifManager(_Logger(), set(), key=None, clients=clients, delivery=DecisionLog(), persist_state=False)
+    assert manager._fetch_proxmox_snapshot() == {"error": "pve caido"}